@@ -1,46 +1,83 @@
 '''
 Soffos Inc. Python SDK package
 '''
-
-from .client import SoffosAiResponse
-from .common.constants import ServiceString
-from .core.services import (
-    AmbiguityDetectionService, 
-    AnswerScoringService, 
-    ContradictionDetectionService,
-    DocumentsIngestService, DocumentsSearchService, DocumentsDeleteService, DocumentsService,
-    EmailAnalysisService,
-    EmotionDetectionService,
-    FileConverterService,
-    LanguageDetectionService,
-    LetsDiscussService,
-    LogicalErrorDetectionService,
-    MicrolessonService,
-    NamedEntityRecognitionService,
-    ParaphraseService,
-    ProfanityService,
-    QuestionAndAnswerGenerationService,
-    QuestionAnsweringService,
-    ReviewTaggerService,
-    SentimentAnalysisService,
-    SimplifyService,
-    SummarizationService,
-    TableGeneratorService,
-    TagGenerationService,
-    TranscriptCorrectionService,
-)
-from .common.constants import ServiceString
-
 import os
+from .utils.lazy_import import lazy_attributes
 
 api_key = os.environ.get("SOFFOSAI_API_KEY")
+# a soffosai.core.caching.FileConverterCache used by every FileConverterService when set
+file_converter_cache = None
+# a soffosai.core.documents.DocumentCatalog kept in sync by every Documents service when set
+document_catalog = None
+# a soffosai.core.caching.SearchCache used by every Documents service when set
+search_cache = None
+# a soffosai.core.caching.QuestionAnsweringCache used by every QuestionAnsweringService when set
+question_answering_cache = None
+# a soffosai.core.discuss.MessageStore kept in sync by every LetsDiscuss service when set
+discuss_message_store = None
+# a soffosai.client.AdaptiveTimeouts that learns the request timeouts of every service when set
+adaptive_timeouts = None
+# a soffosai.client.ConcurrencyLimits that limits the concurrent requests of every service when set
+concurrency_limits = None
+# a soffosai.client.RequestScheduler that orders the requests of every service when set
+request_scheduler = None
+# a soffosai.client.ApiKeyPool that spreads the requests of every service over several api keys when set
+api_key_pool = None
+
+# public names are imported on first access to keep `import soffosai` cheap
+_LAZY_ATTRIBUTES = {
+    "client": ".client",
+    "common": ".common",
+    "core": ".core",
+    "ServiceString": ".common.constants",
+    "SoffosAiResponse": ".client",
+    "AmbiguityDetectionService": ".core.services",
+    "AnswerScoringService": ".core.services",
+    "BatchService": ".core.services",
+    "ContradictionDetectionService": ".core.services",
+    "DocumentsIngestService": ".core.services",
+    "DocumentsSearchService": ".core.services",
+    "DocumentsDeleteService": ".core.services",
+    "DocumentsService": ".core.services",
+    "EmailAnalysisService": ".core.services",
+    "EmotionDetectionService": ".core.services",
+    "FileConverterService": ".core.services",
+    "LanguageDetectionService": ".core.services",
+    "LetsDiscussService": ".core.services",
+    "LogicalErrorDetectionService": ".core.services",
+    "MicrolessonService": ".core.services",
+    "NamedEntityRecognitionService": ".core.services",
+    "ParaphraseService": ".core.services",
+    "ProfanityService": ".core.services",
+    "QuestionAndAnswerGenerationService": ".core.services",
+    "QuestionAnsweringService": ".core.services",
+    "ReviewTaggerService": ".core.services",
+    "SentimentAnalysisService": ".core.services",
+    "SimplifyService": ".core.services",
+    "SummarizationService": ".core.services",
+    "TableGeneratorService": ".core.services",
+    "TagGenerationService": ".core.services",
+    "TranscriptCorrectionService": ".core.services",
+}
+
+__getattr__, __dir__ = lazy_attributes(__name__, globals(), _LAZY_ATTRIBUTES)
 
 __all__ = [
     "api_key",
+    "file_converter_cache",
+    "document_catalog",
+    "search_cache",
+    "question_answering_cache",
+    "discuss_message_store",
+    "adaptive_timeouts",
+    "concurrency_limits",
+    "request_scheduler",
+    "api_key_pool",
     "ServiceString",
     "SoffosAiResponse",
     "AmbiguityDetectionService",
     "AnswerScoringService",
+    "BatchService",
     "ContradictionDetectionService",
     "DocumentsIngestService", "DocumentsSearchService", "DocumentsDeleteService", "DocumentsService",
     "EmailAnalysisService",
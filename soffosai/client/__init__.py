@@ -1 +1,7 @@
 from .ai_response import SoffosAiResponse
+from .search_result import SearchResult
+from .timeouts import Deadline, get_timeout, set_timeout
+from .latency import AdaptiveTimeouts, LatencyHistogram
+from .concurrency import AdaptiveLimiter, ConcurrencyLimits
+from .scheduler import RequestScheduler
+from .key_pool import ApiKeyPool
@@ -0,0 +1,151 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Limit the concurrent requests of each service with additive increase, multiplicative decrease
+-----------------------------------------------------
+'''
+import time
+import threading
+
+
+class AdaptiveLimiter:
+    '''
+    The limit of concurrent requests of one service, adapted like TCP's congestion window:
+    - each request that succeeds while the limit is reached, with a latency up to latency_tolerance
+    times the service's latency without load, raises the limit by increase / limit (about increase
+    per round of limit requests).
+    - an overload (429, 5xx, timeout, connection error) or a smoothed latency above
+    latency_tolerance times the latency without load multiplies the limit by decrease, at most once
+    per round: requests sent before the last decrease do not decrease it again.
+    The latency without load is the lowest latency seen, drifting up slowly to follow the service.
+    '''
+    def __init__(self, initial:int=8, min_limit:int=1, max_limit:int=64, increase:float=1.0,
+        decrease:float=0.5, latency_tolerance:float=2.0, smoothing:float=0.1) -> None:
+        if not 1 <= min_limit <= initial <= max_limit or not 0 < decrease < 1 or latency_tolerance <= 1:
+            raise ValueError("min_limit <= initial <= max_limit, 0 < decrease < 1 and latency_tolerance > 1 are required.")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self._limit = float(initial)
+        self._condition = threading.Condition()
+        self._decreased_at = 0.0
+        self.in_flight = 0
+        self.waiting = 0
+        self.baseline = None # latency without load
+        self.latency = None # smoothed latency
+        self.increases = 0
+        self.decreases = 0
+
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+
+    @property
+    def metrics(self) -> dict:
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "latency": self.latency,
+                "baseline": self.baseline,
+                "increases": self.increases,
+                "decreases": self.decreases
+            }
+
+
+    def acquire(self, timeout:float=None) -> float:
+        '''
+        Waits for a free slot, at most timeout seconds. Returns the start time of the request
+        to give to release, or None when no slot was free in time.
+        '''
+        end = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            self.waiting += 1
+            try:
+                while self.in_flight >= self.limit:
+                    remaining = end - time.monotonic() if end is not None else None
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            return time.monotonic()
+
+
+    def release(self, started:float, overloaded:bool=False):
+        '''
+        Frees the slot of a request started at started and adapts the limit to how it went
+        '''
+        latency = time.monotonic() - started
+        with self._condition:
+            saturated = self.in_flight >= self.limit
+            self.in_flight -= 1
+            if not overloaded:
+                if self.baseline is None or latency < self.baseline:
+                    self.baseline = latency
+                else:
+                    self.baseline += self.smoothing * 0.1 * (latency - self.baseline)
+                self.latency = latency if self.latency is None else self.latency + self.smoothing * (latency - self.latency)
+
+            if overloaded or self.latency > self.baseline * self.latency_tolerance:
+                if started >= self._decreased_at:
+                    self._limit = max(float(self.min_limit), self._limit * self.decrease)
+                    self._decreased_at = time.monotonic()
+                    self.decreases += 1
+                    # the smoothed latency starts again from the latest one
+                    self.latency = None if overloaded else latency
+            elif saturated and self._limit < self.max_limit:
+                self._limit = min(float(self.max_limit), self._limit + self.increase / self._limit)
+                self.increases += 1
+            self._condition.notify_all()
+
+
+    def cancel(self):
+        '''
+        Frees the slot of a request that was not sent, without adapting the limit
+        '''
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+
+class ConcurrencyLimits:
+    '''
+    An AdaptiveLimiter per service, shared by every call that goes through the services: direct
+    calls, pipelines, chunked and batched calls. limits maps services to their AdaptiveLimiter
+    keyword arguments, the other keyword arguments are the defaults of the other services.
+    Services use it when it is given to them (concurrency_limits=) or set as soffosai.concurrency_limits.
+    ```
+    soffosai.concurrency_limits = ConcurrencyLimits(initial=8, max_limit=64,
+        limits={ServiceString.FILE_CONVERTER: {"initial": 2, "max_limit": 8}})
+    ```
+    '''
+    def __init__(self, limits:dict=None, **kwargs) -> None:
+        self._limits = limits or {}
+        self._defaults = kwargs
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+
+    def get_limiter(self, service:str) -> AdaptiveLimiter:
+        with self._lock:
+            if service not in self._limiters:
+                self._limiters[service] = AdaptiveLimiter(**dict(self._defaults, **self._limits.get(service, {})))
+            return self._limiters[service]
+
+
+    @property
+    def metrics(self) -> dict:
+        '''
+        service -> limit, in flight and waiting requests, latencies and adjustments
+        '''
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {service: limiter.metrics for service, limiter in limiters.items()}
@@ -0,0 +1,245 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Spread the requests over several api keys
+-----------------------------------------------------
+'''
+import time
+import threading
+
+
+LEAST_LOADED = "least_loaded"
+WEIGHTED_ROUND_ROBIN = "weighted_round_robin"
+
+# services whose data belongs to the api key that created it. Their calls only use the pool when a
+# key is pinned, as a pipeline run does, so that they do not land on another key's documents or sessions.
+KEY_BOUND_SERVICES = [
+    "documents/ingest", "documents/search", "documents/delete",
+    "discuss/create", "discuss", "discuss/count", "discuss/delete",
+]
+
+
+class _KeyState:
+    def __init__(self, key:str, weight:float, max_concurrency:int, rate:float) -> None:
+        self.key = key
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.tokens = max(1.0, rate) if rate else None
+        self.refilled = time.monotonic()
+        self.current = 0.0 # smooth weighted round robin counter
+        self.in_flight = 0
+        self.leases = 0 # runs that send all their requests with this key
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.removed = None # the reason a key was taken out for good
+        self.disabled_until = 0.0
+
+
+    def refill(self, now:float):
+        if self.rate:
+            self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.refilled) * self.rate)
+            self.refilled = now
+
+
+    def healthy(self, now:float) -> bool:
+        return self.removed is None and now >= self.disabled_until
+
+
+    def load(self) -> float:
+        return (self.in_flight + self.leases) / self.weight
+
+
+    def available(self, now:float) -> bool:
+        if not self.healthy(now):
+            return False
+        if self.max_concurrency and self.in_flight >= self.max_concurrency:
+            return False
+        return self.tokens is None or self.tokens >= 1
+
+
+class ApiKeyPool:
+    '''
+    Spreads the requests over several api keys, least loaded first ((in flight requests + leases) / weight)
+    or by smooth weighted round robin. keys is a list of keys or a dictionary of key -> weight.
+    Each key has at most max_concurrency requests in flight and sends at most rate requests per
+    second; limits maps keys to their own {"max_concurrency": ..., "rate": ...}.
+    A key is taken out for good on an authentication error (401, 403), for quota_cooldown seconds on
+    a quota error (402, or a 429 about the quota), and for failure_cooldown seconds after
+    failure_threshold consecutive server or connection errors.
+
+    Services use it when it is given to them (key_pool=) or set as soffosai.api_key_pool, unless
+    they are given an apikey. The Documents and Let's Discuss services only use it through the
+    key pinned by a pipeline run, since their data belongs to one key: a Pipeline run leases one
+    key for all its stages and gives it back with unlease when it ends.
+    '''
+    def __init__(self, keys, strategy:str=LEAST_LOADED, max_concurrency:int=None, rate:float=None,
+        limits:dict=None, quota_cooldown:float=3600, failure_threshold:int=5, failure_cooldown:float=30) -> None:
+        if strategy not in (LEAST_LOADED, WEIGHTED_ROUND_ROBIN):
+            raise ValueError(f"strategy should be {LEAST_LOADED} or {WEIGHTED_ROUND_ROBIN}.")
+        weights = keys if isinstance(keys, dict) else {key: 1.0 for key in keys}
+        if not weights:
+            raise ValueError("The pool needs at least one api key.")
+        limits = limits or {}
+        self.strategy = strategy
+        self.quota_cooldown = quota_cooldown
+        self.failure_threshold = failure_threshold
+        self.failure_cooldown = failure_cooldown
+        self._keys = {}
+        for key, weight in weights.items():
+            if weight <= 0:
+                raise ValueError("api key weights should be positive.")
+            key_limits = limits.get(key, {})
+            self._keys[key] = _KeyState(
+                key, weight, key_limits.get("max_concurrency", max_concurrency), key_limits.get("rate", rate)
+            )
+        self._condition = threading.Condition()
+
+
+    def __contains__(self, key:str) -> bool:
+        return key in self._keys
+
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+    @property
+    def metrics(self) -> dict:
+        '''
+        key (shortened) -> health, in flight requests, leases, requests and failures
+        '''
+        now = time.monotonic()
+        with self._condition:
+            return {
+                f"{state.key[:4]}...{state.key[-4:]}": {
+                    "healthy": state.healthy(now),
+                    "removed": state.removed,
+                    "in_flight": state.in_flight,
+                    "leases": state.leases,
+                    "requests": state.requests,
+                    "failures": state.failures
+                }
+                for state in self._keys.values()
+            }
+
+
+    def lease(self) -> str:
+        '''
+        The key a series of requests, like a pipeline run, should stay on: the least loaded healthy
+        key, or None when every key is out. The lease counts in the load of the key until unlease.
+        '''
+        now = time.monotonic()
+        with self._condition:
+            healthy = [state for state in self._keys.values() if state.healthy(now)]
+            if not healthy:
+                return None
+            state = min(healthy, key=lambda state: (state.load(), state.requests))
+            state.leases += 1
+            return state.key
+
+
+    def unlease(self, key:str):
+        with self._condition:
+            self._keys[key].leases -= 1
+
+
+    def acquire(self, key:str=None, deadline=None) -> str:
+        '''
+        Waits for a key with a free slot and a rate token, the given key only when there is one.
+        Returns the key to send the request with and to give to release, or None when there is no
+        healthy key or none is free before the deadline.
+        '''
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                if key is not None:
+                    candidates = [self._keys[key]]
+                else:
+                    candidates = list(self._keys.values())
+                healthy = [state for state in candidates if state.healthy(now)]
+                if not healthy:
+                    return None
+                for state in healthy:
+                    state.refill(now)
+                available = [state for state in healthy if state.available(now)]
+                if available:
+                    state = self._choose(available)
+                    state.in_flight += 1
+                    state.requests += 1
+                    if state.tokens is not None:
+                        state.tokens -= 1
+                    return state.key
+
+                wait = self._next_token(healthy, now)
+                if deadline is not None:
+                    remaining = deadline.remaining()
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._condition.wait(wait)
+
+
+    def release(self, key:str, status:int=None, failed:bool=False, quota:bool=False) -> bool:
+        '''
+        Frees the key's slot and tracks its health from the response status, or failed for a
+        connection error or timeout. Returns whether the key was taken out.
+        '''
+        now = time.monotonic()
+        with self._condition:
+            state = self._keys[key]
+            state.in_flight -= 1
+            taken_out = True
+            if status in (401, 403):
+                state.removed = f"authentication error {status}"
+            elif quota or status == 402:
+                state.disabled_until = now + self.quota_cooldown
+            elif failed or (status is not None and status >= 500):
+                state.consecutive_failures += 1
+                taken_out = state.consecutive_failures >= self.failure_threshold
+                if taken_out:
+                    state.disabled_until = now + self.failure_cooldown
+                    state.consecutive_failures = 0
+            else:
+                state.consecutive_failures = 0
+                taken_out = False
+            if taken_out or state.consecutive_failures:
+                state.failures += 1
+            self._condition.notify_all()
+            return taken_out
+
+
+    def cancel(self, key:str):
+        '''
+        Frees the key's slot for a request that was not sent, without tracking its health
+        '''
+        with self._condition:
+            state = self._keys[key]
+            state.in_flight -= 1
+            state.requests -= 1
+            self._condition.notify_all()
+
+
+    def _choose(self, states:list) -> _KeyState:
+        if self.strategy == LEAST_LOADED:
+            return min(states, key=lambda state: (state.load(), state.requests))
+        # smooth weighted round robin: every key gains its weight, the chosen one pays the total
+        total = sum(state.weight for state in states)
+        for state in states:
+            state.current += state.weight
+        chosen = max(states, key=lambda state: state.current)
+        chosen.current -= total
+        return chosen
+
+
+    def _next_token(self, states:list, now:float) -> float:
+        '''
+        Seconds until a rate-limited key gets its next token, None when the keys wait for a free slot
+        '''
+        waits = [
+            (1 - state.tokens) / state.rate for state in states
+            if state.tokens is not None and state.tokens < 1
+            and not (state.max_concurrency and state.in_flight >= state.max_concurrency)
+        ]
+        return max(0.001, min(waits)) if waits else None
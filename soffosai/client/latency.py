@@ -0,0 +1,241 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Request timeouts learned from the latencies observed per service
+-----------------------------------------------------
+'''
+import os
+import math
+import json
+import time
+import atexit
+import threading
+
+
+DEFAULT_PROFILE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "soffosai", "latency_profiles.json")
+
+
+def get_size_bucket(size:int) -> int:
+    '''
+    Payload sizes grouped by powers of 4: 0 up to 4 characters, 1 up to 16, ... 5 up to 4096
+    '''
+    return int(math.log(max(size, 1), 4))
+
+
+class LatencyHistogram:
+    '''
+    A streaming histogram of latencies in the style of HDR histograms: bucket bounds grow
+    geometrically by precision, so a percentile is read within precision of its true value from a
+    few hundred counters whatever the number of samples.
+    When count reaches max_count the counts are halved so that the histogram follows recent latencies.
+    '''
+    def __init__(self, precision:float=0.05, min_value:float=0.001, max_count:int=10000) -> None:
+        self.precision = precision
+        self.min_value = min_value
+        self.max_count = max_count
+        self._log_base = math.log(1 + precision)
+        self._counts = {} # bucket -> number of samples
+        self.count = 0
+
+
+    def record(self, seconds:float):
+        bucket = int(math.log(max(seconds, self.min_value) / self.min_value) / self._log_base)
+        self._counts[bucket] = self._counts.get(bucket, 0) + 1
+        self.count += 1
+        if self.count >= self.max_count:
+            self.halve()
+
+
+    def halve(self):
+        self._counts = {bucket: count // 2 for bucket, count in self._counts.items() if count // 2}
+        self.count = sum(self._counts.values())
+
+
+    def percentile(self, fraction:float) -> float:
+        '''
+        The latency that fraction of the samples do not exceed, e.g. percentile(0.99). None without samples.
+        '''
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self._counts):
+            seen += self._counts[bucket]
+            if seen >= rank:
+                break
+        return self.min_value * (1 + self.precision) ** (bucket + 1) # the upper bound of the bucket
+
+
+    def to_dict(self) -> dict:
+        return {
+            "precision": self.precision,
+            "min_value": self.min_value,
+            "counts": {str(bucket): count for bucket, count in self._counts.items()}
+        }
+
+
+    @classmethod
+    def from_dict(cls, data:dict, max_count:int=10000):
+        histogram = cls(precision=data["precision"], min_value=data["min_value"], max_count=max_count)
+        histogram._counts = {int(bucket): count for bucket, count in data["counts"].items()}
+        histogram.count = sum(histogram._counts.values())
+        return histogram
+
+
+class AdaptiveTimeouts:
+    '''
+    Learns the timeout of each service from the latencies of its requests. The timeout is
+    multiplier times the percentile of the observed latencies, between floor and ceiling seconds.
+    With by_size, latencies are also kept per payload size bucket and the bucket's timeout is used
+    once it has min_samples samples.
+    Requests that time out are censored samples: their latency is only known to be above their
+    timeout. They are kept apart and count as the slowest samples when the percentile is ranked,
+    so a few timeouts below 1 - percentile of the requests do not change the timeout. When more
+    requests time out, the percentile falls among them and the timeout is censored_growth times
+    the timeout that expired, without the multiplier.
+
+    The profiles are saved to path, at most every save_interval seconds and when the process exits,
+    and loaded when it is created, so that new processes start with the learned timeouts.
+    Services use it when it is given to them (adaptive_timeouts=) or set as soffosai.adaptive_timeouts.
+    ```
+    soffosai.adaptive_timeouts = AdaptiveTimeouts(percentile=0.99, multiplier=3)
+    ```
+    '''
+    def __init__(self, path:str=DEFAULT_PROFILE_PATH, percentile:float=0.99, multiplier:float=3.0,
+        floor:float=2.0, ceiling:float=600.0, min_samples:int=20, by_size:bool=True, save_interval:float=60,
+        precision:float=0.05, censored_growth:float=1.5) -> None:
+        if not 0 < percentile <= 1 or multiplier <= 0 or not 0 < floor <= ceiling:
+            raise ValueError("percentile should be between 0 and 1, multiplier positive and floor between 0 and ceiling.")
+        self.path = path
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.floor = floor
+        self.ceiling = ceiling
+        self.min_samples = min_samples
+        self.by_size = by_size
+        self.save_interval = save_interval
+        self.precision = precision
+        self.censored_growth = censored_growth
+        self._histograms = {} # service or "service|size bucket" -> LatencyHistogram
+        self._censored = {} # the same keys -> LatencyHistogram of the timeouts that expired
+        self._lock = threading.Lock()
+        self._saved = time.monotonic()
+        self._changed = False
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+
+    def timeout(self, service:str, size:int=None) -> float:
+        '''
+        The learned timeout of a request, or None while the service has fewer than min_samples latencies
+        '''
+        with self._lock:
+            key = None
+            if self.by_size and size is not None:
+                key = self._key(service, size)
+                if self._count(key) < self.min_samples:
+                    key = None
+            if key is None and self._count(service) >= self.min_samples:
+                key = service
+            if key is None:
+                return None
+            timeout = self._percentile_timeout(key)
+        return min(self.ceiling, max(self.floor, timeout))
+
+
+    def record(self, service:str, seconds:float, size:int=None, timed_out:bool=False):
+        '''
+        Records the latency of a request, or its timeout with timed_out=True
+        '''
+        keys = [service]
+        if self.by_size and size is not None:
+            keys.append(self._key(service, size))
+        with self._lock:
+            for key in keys:
+                histograms = self._censored if timed_out else self._histograms
+                if key not in histograms:
+                    histograms[key] = LatencyHistogram(precision=self.precision)
+                histogram = histograms[key]
+                count = histogram.count
+                histogram.record(seconds)
+                if histogram.count <= count: # halved, the other samples of the key are halved with it
+                    other = (self._histograms if timed_out else self._censored).get(key)
+                    if other is not None:
+                        other.halve()
+            self._changed = True
+            save = self.path and time.monotonic() - self._saved >= self.save_interval
+        if save:
+            self.save()
+
+
+    @property
+    def profiles(self) -> dict:
+        '''
+        service -> samples, timeouts, median latency, percentile latency and timeout
+        '''
+        with self._lock:
+            services = [key for key in self._histograms if "|" not in key]
+            histograms = {service: self._histograms[service] for service in services}
+            timeouts = {service: self._censored[service].count for service in services if service in self._censored}
+        profiles = {}
+        for service, histogram in histograms.items():
+            profiles[service] = {
+                "samples": histogram.count,
+                "timeouts": timeouts.get(service, 0),
+                "median": histogram.percentile(0.5),
+                "percentile": histogram.percentile(self.percentile),
+                "timeout": self.timeout(service)
+            }
+        return profiles
+
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for key, histogram in data.get("histograms", {}).items():
+                self._histograms[key] = LatencyHistogram.from_dict(histogram)
+            for key, histogram in data.get("censored", {}).items():
+                self._censored[key] = LatencyHistogram.from_dict(histogram)
+
+
+    def save(self):
+        with self._lock:
+            if not self._changed:
+                return
+            data = {
+                "histograms": {key: histogram.to_dict() for key, histogram in self._histograms.items()},
+                "censored": {key: histogram.to_dict() for key, histogram in self._censored.items()}
+            }
+            self._changed = False
+            self._saved = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temporary, self.path)
+
+
+    def _count(self, key:str) -> int:
+        return sum(histograms[key].count for histograms in (self._histograms, self._censored) if key in histograms)
+
+
+    def _percentile_timeout(self, key:str) -> float:
+        '''
+        The timeout from the latencies of a key, with its timeouts ranked above every latency
+        '''
+        histogram = self._histograms.get(key)
+        censored = self._censored.get(key)
+        observed = histogram.count if histogram is not None else 0
+        rank = self.percentile * self._count(key)
+        if rank <= observed:
+            return histogram.percentile(rank / observed) * self.multiplier
+        return censored.percentile((rank - observed) / censored.count) * self.censored_growth
+
+
+    def _key(self, service:str, size:int) -> str:
+        return f"{service}|{get_size_bucket(size)}"
@@ -0,0 +1,170 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Stream multipart/form-data uploads without loading the file in memory
+-----------------------------------------------------
+'''
+import os
+import mmap
+import uuid
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _get_remaining_size(file_stream):
+    '''
+    The number of bytes left to be read from file_stream. None if it cannot be determined.
+    '''
+    try:
+        position = file_stream.tell()
+        try:
+            size = os.fstat(file_stream.fileno()).st_size
+        except (AttributeError, OSError, ValueError):
+            size = file_stream.seek(0, os.SEEK_END)
+            file_stream.seek(position)
+        return max(size - position, 0)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class MultipartEncoder:
+    '''
+    A file-like multipart/form-data body that reads the file in chunks while it is being sent.
+    Only one chunk of the file is held in memory at a time so concurrent uploads of large files
+    use constant memory.
+
+    ** use_mmap=True memory maps the file and sends slices of the map instead of reading the
+    file handle. Only applies to files backed by a file descriptor.
+    ** progress_callback is called as progress_callback(bytes_sent, total_bytes) after each
+    chunk of the file is read. total_bytes is None if the size of the file is unknown.
+    '''
+    def __init__(self, fields:dict, file_field:str, file_stream, filename:str, mime_type:str=None,
+        chunk_size:int=DEFAULT_CHUNK_SIZE, progress_callback=None, use_mmap:bool=False) -> None:
+        if chunk_size <= 0:
+            raise ValueError("chunk_size should be a positive integer.")
+
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self._file = file_stream
+        self._chunk_size = chunk_size
+        self._progress_callback = progress_callback
+        self._file_size = _get_remaining_size(file_stream)
+        self._file_sent = 0
+        self._mmap = None
+        self._mmap_start = 0
+        self._view = None
+
+        if use_mmap and self._file_size:
+            try:
+                self._mmap = mmap.mmap(file_stream.fileno(), 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mmap)
+                self._mmap_start = file_stream.tell()
+                self._file_size = len(self._mmap) - self._mmap_start
+            except (AttributeError, OSError, ValueError):
+                self._mmap = None
+                self._view = None
+
+        self._head = self._encode_fields(fields) + self._encode_file_header(file_field, filename, mime_type)
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._head_sent = 0
+        self._tail_sent = 0
+
+
+    def _encode_fields(self, fields:dict) -> bytes:
+        parts = []
+        for name, value in fields.items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for item in values:
+                if item is None:
+                    continue
+                if isinstance(item, bytes):
+                    item = item.decode("utf-8")
+                parts.append(
+                    f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{item}\r\n'
+                )
+        return "".join(parts).encode("utf-8")
+
+
+    def _encode_file_header(self, file_field:str, filename:str, mime_type:str) -> bytes:
+        header = f'--{self.boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        if mime_type:
+            header += f"Content-Type: {mime_type}\r\n"
+        return (header + "\r\n").encode("utf-8")
+
+
+    @property
+    def size(self):
+        '''
+        The length of the whole body in bytes. None if the size of the file is unknown.
+        '''
+        if self._file_size is None:
+            return None
+        return len(self._head) + self._file_size + len(self._tail)
+
+
+    def __len__(self):
+        if self._file_size is None:
+            raise TypeError("The size of the file to be uploaded is unknown.")
+        return len(self._head) + self._file_size + len(self._tail)
+
+
+    def __iter__(self):
+        while True:
+            chunk = self.read()
+            if not chunk:
+                break
+            yield chunk
+
+
+    def read(self, size:int=-1):
+        '''
+        Returns the next part of the body. At most one chunk of the file is returned per call.
+        '''
+        if self._head_sent < len(self._head):
+            chunk = self._head[self._head_sent:]
+            self._head_sent = len(self._head)
+            return chunk
+
+        chunk = self._read_file()
+        if chunk:
+            self._file_sent += len(chunk)
+            if self._progress_callback:
+                self._progress_callback(self._file_sent, self._file_size)
+            return chunk
+
+        if self._tail_sent < len(self._tail):
+            self._tail_sent = len(self._tail)
+            return self._tail
+
+        return b""
+
+
+    def _read_file(self):
+        if self._view is not None:
+            start = self._mmap_start + self._file_sent
+            return self._view[start:start + self._chunk_size]
+        return self._file.read(self._chunk_size)
+
+
+    def close(self):
+        '''
+        Releases the memory map if one was used. The file itself is left open.
+        '''
+        try:
+            if self._view is not None:
+                self._view.release()
+            if self._mmap is not None:
+                self._mmap.close()
+        except BufferError: # a chunk is still referenced; the map is closed when it is collected
+            pass
+        self._view = None
+        self._mmap = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,180 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Share the requests of an api key between priority classes and users
+-----------------------------------------------------
+'''
+import time
+import heapq
+import itertools
+import threading
+
+
+class Ticket:
+    '''
+    A request admitted by the RequestScheduler. It is given back to release.
+    '''
+    def __init__(self, priority:str, user:str, tag:float, deadline) -> None:
+        self.priority = priority
+        self.user = user
+        self.tag = tag
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.started = None
+        self.cancelled = False
+
+
+class RequestScheduler:
+    '''
+    Admits at most max_concurrency requests at a time, whatever their service:
+    - requests of a higher priority class go first. classes lists the classes from the highest
+    priority to the lowest.
+    - within a class, users get turns in proportion to their user_weights (default 1): weighted
+    fair queuing on the payloads' user field, so that a user with many requests cannot starve the others.
+    - the queue of each class holds at most queue_limits[class] requests (max_queue by default).
+    A request is rejected when its queue is full, and shed when its deadline would pass before
+    its turn, either by the estimated wait when it arrives or while it waits.
+    metrics reports per class the queued and running requests, the admitted, rejected and shed
+    ones and their waiting times.
+    Services use it when it is given to them (scheduler=) or set as soffosai.request_scheduler,
+    with their priority= class.
+    ```
+    soffosai.request_scheduler = RequestScheduler(max_concurrency=16, queue_limits={"bulk": 100})
+    SummarizationService(priority="bulk")
+    ```
+    '''
+    def __init__(self, max_concurrency:int=16, classes:list=("interactive", "default", "bulk"),
+        default_class:str="default", max_queue:int=1000, queue_limits:dict=None, user_weights:dict=None) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency should be at least 1.")
+        if default_class not in classes:
+            raise ValueError(f"default_class should be one of {list(classes)}.")
+        self.max_concurrency = max_concurrency
+        self.classes = list(classes)
+        self.default_class = default_class
+        self.queue_limits = {name: (queue_limits or {}).get(name, max_queue) for name in self.classes}
+        self.user_weights = user_weights or {}
+        self._condition = threading.Condition()
+        self._order = itertools.count()
+        self._queues = {name: [] for name in self.classes} # heaps of (tag, order, ticket)
+        self._virtual_time = {name: 0.0 for name in self.classes}
+        self._finish_tags = {} # (class, user) -> tag of the user's last queued request
+        self._hold = None # smoothed seconds a request holds its slot
+        self.in_flight = 0
+        self._stats = {
+            name: {"queued": 0, "running": 0, "admitted": 0, "rejected": 0, "shed": 0, "wait": 0.0, "max_wait": 0.0}
+            for name in self.classes
+        }
+
+
+    @property
+    def metrics(self) -> dict:
+        '''
+        class -> queue depth, running, admitted, rejected and shed requests, mean and max wait in seconds
+        '''
+        with self._condition:
+            metrics = {}
+            for name, stats in self._stats.items():
+                metrics[name] = {
+                    "queued": stats["queued"],
+                    "running": stats["running"],
+                    "admitted": stats["admitted"],
+                    "rejected": stats["rejected"],
+                    "shed": stats["shed"],
+                    "mean_wait": stats["wait"] / stats["admitted"] if stats["admitted"] else 0.0,
+                    "max_wait": stats["max_wait"]
+                }
+            return metrics
+
+
+    def acquire(self, priority:str=None, user:str=None, deadline=None) -> tuple:
+        '''
+        Waits for the request's turn. Returns (ticket, None) once it is admitted,
+        or (None, reason) when it is rejected or shed.
+        '''
+        priority = priority or self.default_class
+        if priority not in self._queues:
+            raise ValueError(f"priority should be one of {self.classes}.")
+        with self._condition:
+            stats = self._stats[priority]
+            if stats["queued"] >= self.queue_limits[priority]:
+                stats["rejected"] += 1
+                return None, f"the {priority} queue is full."
+            if deadline is not None and self._estimate_wait(priority) >= deadline.remaining():
+                stats["shed"] += 1
+                return None, f"the {priority} request could not start before its deadline."
+
+            # weighted fair queuing: a request finishes 1/weight after the user's previous one
+            key = (priority, user)
+            start = max(self._virtual_time[priority], self._finish_tags.get(key, 0.0))
+            tag = start + 1.0 / self.user_weights.get(user, 1.0)
+            self._finish_tags[key] = tag
+            ticket = Ticket(priority, user, tag, deadline)
+            heapq.heappush(self._queues[priority], (tag, next(self._order), ticket))
+            stats["queued"] += 1
+            self._dispatch()
+
+            while ticket.started is None:
+                remaining = deadline.remaining() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    ticket.cancelled = True
+                    stats["queued"] -= 1
+                    stats["shed"] += 1
+                    return None, f"the {priority} request waited past its deadline."
+                self._condition.wait(remaining)
+            return ticket, None
+
+
+    def release(self, ticket:Ticket):
+        with self._condition:
+            held = time.monotonic() - ticket.started
+            self._hold = held if self._hold is None else self._hold + 0.1 * (held - self._hold)
+            self.in_flight -= 1
+            self._stats[ticket.priority]["running"] -= 1
+            self._dispatch()
+
+
+    def _dispatch(self):
+        '''
+        Gives the free slots to the queued requests, highest class first, lowest tag first
+        '''
+        dispatched = False
+        for name in self.classes:
+            queue = self._queues[name]
+            while queue and self.in_flight < self.max_concurrency:
+                tag, _, ticket = heapq.heappop(queue)
+                if ticket.cancelled:
+                    continue
+                self._virtual_time[name] = tag
+                ticket.started = time.monotonic()
+                waited = ticket.started - ticket.enqueued
+                stats = self._stats[name]
+                stats["queued"] -= 1
+                stats["running"] += 1
+                stats["admitted"] += 1
+                stats["wait"] += waited
+                stats["max_wait"] = max(stats["max_wait"], waited)
+                self.in_flight += 1
+                dispatched = True
+        if dispatched:
+            self._condition.notify_all()
+        # users that have no queued request start again from the class's virtual time
+        if len(self._finish_tags) > 10000:
+            self._finish_tags = {
+                key: tag for key, tag in self._finish_tags.items() if tag > self._virtual_time[key[0]]
+            }
+
+
+    def _estimate_wait(self, priority:str) -> float:
+        '''
+        The time before a new request of the class would start, from the requests ahead of it
+        and the time a request usually holds its slot
+        '''
+        ahead = 0
+        for name in self.classes:
+            ahead += self._stats[name]["queued"]
+            if name == priority:
+                break
+        if self.in_flight + ahead < self.max_concurrency or self._hold is None:
+            return 0.0
+        return (ahead // self.max_concurrency + 1) * self._hold
@@ -0,0 +1,140 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Documents Search response with lazy passages and text
+-----------------------------------------------------
+'''
+from itertools import islice
+
+
+def get_passage_text(passage) -> str:
+    '''
+    The content of a passage returned by the Documents Search
+    '''
+    if isinstance(passage, dict):
+        return passage.get("content") or ""
+    return str(passage)
+
+
+class SearchResult(dict):
+    '''
+    The response of a Documents Search. It is the response dictionary itself so it can be used
+    wherever the response was used, but the concatenated "text" of the passages is only built
+    the first time it is read, looked up or listed with the other keys (keys, items, iteration,
+    json.dumps):
+    ```
+    result = DocumentsSearchService()(user="client_id", query="Who is Neo?", top_n_natural_language=50)
+    for page in result.pages(page_size=10):
+        ...
+    print(result["text"])
+    ```
+    The passages are joined by separator, a new line, so that the content of one passage does not
+    run into the next. Set SearchResult.separator = "" to concatenate them as before.
+    Paging only slices the passages of the response, which is received and parsed whole.
+    '''
+    separator = "\n"
+
+    def __missing__(self, key):
+        if key != "text":
+            raise KeyError(key)
+        text = self.text
+        self["text"] = text
+        return text
+
+
+    def __contains__(self, key) -> bool:
+        return key == "text" or super().__contains__(key)
+
+
+    def get(self, key, default=None):
+        if key == "text":
+            return self["text"]
+        return super().get(key, default)
+
+
+    def __iter__(self):
+        self["text"] # the text is listed like the other keys
+        return super().__iter__()
+
+
+    def __len__(self) -> int:
+        self["text"]
+        return super().__len__()
+
+
+    def keys(self):
+        self["text"]
+        return super().keys()
+
+
+    def values(self):
+        self["text"]
+        return super().values()
+
+
+    def items(self):
+        self["text"]
+        return super().items()
+
+
+    @property
+    def passages(self):
+        '''
+        An iterator over the passages
+        '''
+        return iter(super().get("passages") or [])
+
+
+    @property
+    def passage_count(self) -> int:
+        return len(super().get("passages") or [])
+
+
+    @property
+    def text(self) -> str:
+        '''
+        The content of all the passages joined by the separator
+        '''
+        if super().__contains__("text"):
+            return super().__getitem__("text")
+        return self.separator.join(get_passage_text(passage) for passage in self.passages)
+
+
+    def iter_text(self):
+        '''
+        The content of the passages one at a time
+        '''
+        for passage in self.passages:
+            yield get_passage_text(passage)
+
+
+    def pages(self, page_size:int=10):
+        '''
+        The passages in lists of at most page_size passages
+        '''
+        if page_size <= 0:
+            raise ValueError("page_size should be a positive integer.")
+        passages = self.passages
+        while True:
+            page = list(islice(passages, page_size))
+            if not page:
+                return
+            yield page
+
+
+    def page(self, number:int, page_size:int=10) -> list:
+        '''
+        The passages of one page. Pages are numbered from 0.
+        '''
+        if number < 0 or page_size <= 0:
+            raise ValueError("number should not be negative and page_size should be a positive integer.")
+        return list(islice(self.passages, number * page_size, (number + 1) * page_size))
+
+
+    def to_dict(self) -> dict:
+        '''
+        A plain dictionary of the response including the text
+        '''
+        response = dict(self)
+        response["text"] = self["text"]
+        return response
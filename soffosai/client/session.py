@@ -0,0 +1,47 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: The HTTP session shared by all the services
+-----------------------------------------------------
+'''
+import threading
+
+
+# the most connections kept open to the Soffos API. Concurrent calls beyond this wait for a connection.
+POOL_SIZE = 32
+
+_session = None
+_lock = threading.Lock()
+
+
+def get_session():
+    '''
+    The requests.Session used by every service so that connections to the Soffos API are reused
+    across calls and threads instead of being opened for every request.
+    It keeps no cookies, so that no state is shared between the api keys and users that use it.
+    '''
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import requests
+                from http.cookiejar import DefaultCookiePolicy
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, pool_block=True)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def reset_session():
+    '''
+    Closes the shared session. The next request opens a new one, e.g. after changing POOL_SIZE.
+    '''
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
@@ -0,0 +1,75 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Request timeouts per service and deadlines shared by several requests
+-----------------------------------------------------
+'''
+import time
+
+
+# seconds an HTTP request waits for the Soffos API when its service has no timeout of its own
+DEFAULT_TIMEOUT = 120
+
+# service -> seconds. e.g. SERVICE_TIMEOUTS[ServiceString.FILE_CONVERTER] = 300
+SERVICE_TIMEOUTS = {}
+
+# requests are not sent with less time than this left before their deadline
+MIN_TIMEOUT = 0.5
+
+
+def get_timeout(service:str) -> float:
+    '''
+    The default timeout of the requests of a service
+    '''
+    return SERVICE_TIMEOUTS.get(service, DEFAULT_TIMEOUT)
+
+
+def set_timeout(service:str, seconds:float):
+    '''
+    Sets the default timeout of the requests of a service. None restores DEFAULT_TIMEOUT.
+    '''
+    if seconds is None:
+        SERVICE_TIMEOUTS.pop(service, None)
+    elif seconds <= 0:
+        raise ValueError("timeout should be positive.")
+    else:
+        SERVICE_TIMEOUTS[service] = seconds
+
+
+class Deadline:
+    '''
+    The time by which a call, with its retries, or a whole pipeline run should be done.
+    Deadline(30) expires 30 seconds after it is created.
+    '''
+    def __init__(self, seconds:float) -> None:
+        self.expires_at = time.monotonic() + seconds
+
+
+    @classmethod
+    def at(cls, expires_at:float):
+        '''
+        A deadline at a time.monotonic() value
+        '''
+        deadline = cls(0)
+        deadline.expires_at = expires_at
+        return deadline
+
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+    def within(self, seconds:float):
+        '''
+        The earlier of this deadline and seconds from now
+        '''
+        return Deadline.at(min(self.expires_at, time.monotonic() + seconds))
+
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f})"
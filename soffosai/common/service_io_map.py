@@ -4,11 +4,74 @@ Created at: 2023-04-21
 Purpose: get all service IO definitions
 -----------------------------------------------------
 '''
-import sys
-import inspect
-from .serviceio_fields import *
+import importlib
+from collections.abc import Mapping
+from .constants import ServiceString
 
-attrs = dir()
-classes = [getattr(sys.modules[__name__], name) for name in attrs if inspect.isclass(getattr(sys.modules[__name__], name))]
 
-SERVICE_IO_MAP = {obj.service: obj for obj in classes}
+# service -> (module inside soffosai.common.serviceio_fields, IO class name)
+_SERVICE_IO_REGISTRY = {
+    ServiceString.AMBIGUITY_DETECTION: ("ambiguity_detection_io", "AmbiguityDetectionIO"),
+    ServiceString.ANSWER_SCORING: ("answer_scoring_io", "AnswerScoringIO"),
+    ServiceString.CONTRADICTION_DETECTION: ("contradiction_detection_io", "ContradictionDetectionIO"),
+    ServiceString.DOCUMENTS_INGEST: ("documents_io", "DocumentsIngestIO"),
+    ServiceString.DOCUMENTS_SEARCH: ("documents_io", "DocumentSearchIO"),
+    ServiceString.DOCUMENTS_DELETE: ("documents_io", "DocumentDeleteIO"),
+    ServiceString.EMAIL_ANALYSIS: ("email_analysis_io", "EmailAnalysisIO"),
+    ServiceString.EMOTION_DETECTION: ("emotion_detection_io", "EmotionDetectionIO"),
+    ServiceString.FILE_CONVERTER: ("file_converter_io", "FileConverterIO"),
+    ServiceString.LANGUAGE_DETECTION: ("language_detection_io", "LanguageDetectionIO"),
+    ServiceString.LETS_DISCUSS_CREATE: ("lets_discuss_io", "LetsDiscussCreateIO"),
+    ServiceString.LETS_DISCUSS: ("lets_discuss_io", "LetsDiscussIO"),
+    ServiceString.LETS_DISCUSS_RETRIEVE: ("lets_discuss_io", "LetsDiscussRetrieveIO"),
+    ServiceString.LETS_DISCUSS_DELETE: ("lets_discuss_io", "LetsDiscussDeleteIO"),
+    ServiceString.LOGICAL_ERROR_DETECTION: ("logical_error_detection_io", "LogicalErrorDetectionIO"),
+    ServiceString.MICROLESSON: ("microlesson", "MicrolessonIO"),
+    ServiceString.NER: ("named_entity_recognition_io", "NamedEntityRecognitionIO"),
+    ServiceString.PARAPHRASE: ("paraphrase_io", "ParaphraseIO"),
+    ServiceString.PROFANITY: ("profanity_io", "ProfanityIO"),
+    ServiceString.QUESTION_AND_ANSWER_GENERATION: ("qna_generation_io", "QuestionAndAnswerGenerationIO"),
+    ServiceString.QUESTION_ANSWERING: ("question_answering_io", "QuestionAnsweringIO"),
+    ServiceString.REVIEW_TAGGER: ("review_tagger_io", "ReviewTaggerIO"),
+    ServiceString.SENTIMENT_ANALYSIS: ("sentiment_analysis_io", "SentimentAnalysisIO"),
+    ServiceString.SIMPLIFY: ("simplify_io", "SimplifyIO"),
+    ServiceString.SUMMARIZATION: ("summarization_io", "SummarizaionIO"),
+    ServiceString.TABLE_GENERATOR: ("table_generator_io", "TableGeneratorIO"),
+    ServiceString.TAG_GENERATION: ("tag_generation_io", "TagGenerationIO"),
+    ServiceString.TRANSCRIPTION_CORRECTION: ("transcript_correction", "TranscriptCorrectionIO"),
+    ServiceString.BATCH_SERVICE: ("batch_service_io", "BatchServiceIO"),
+}
+
+
+class ServiceIOMap(Mapping):
+    '''
+    A read-only mapping of service -> ServiceIO class.
+    The ServiceIO module of a service is only imported the first time the service is looked up.
+    '''
+    def __init__(self, registry:dict) -> None:
+        self._registry = registry
+        self._resolved = {}
+
+
+    def __getitem__(self, service):
+        try:
+            return self._resolved[service]
+        except KeyError:
+            pass
+
+        module_name, class_name = self._registry[service]
+        module = importlib.import_module(f"soffosai.common.serviceio_fields.{module_name}")
+        serviceio = getattr(module, class_name)
+        self._resolved[service] = serviceio
+        return serviceio
+
+
+    def __iter__(self):
+        return iter(self._registry)
+
+
+    def __len__(self):
+        return len(self._registry)
+
+
+SERVICE_IO_MAP = ServiceIOMap(_SERVICE_IO_REGISTRY)
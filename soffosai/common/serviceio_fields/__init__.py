@@ -1,24 +1,39 @@
-from .service_io import ServiceIO
-from .ambiguity_detection_io import AmbiguityDetectionIO
-from .answer_scoring_io import AnswerScoringIO
-from .contradiction_detection_io import ContradictionDetectionIO
-from .documents_io import DocumentsIngestIO, DocumentSearchIO, DocumentDeleteIO
-from .email_analysis_io import EmailAnalysisIO
-from .emotion_detection_io import EmotionDetectionIO
-from .file_converter_io import FileConverterIO
-from .language_detection_io import LanguageDetectionIO
-from .lets_discuss_io import LetsDiscussCreateIO, LetsDiscussDeleteIO, LetsDiscussIO, LetsDiscussRetrieveIO
-from .logical_error_detection_io import LogicalErrorDetectionIO
-from .microlesson import MicrolessonIO
-from .named_entity_recognition_io import NamedEntityRecognitionIO
-from .paraphrase_io import ParaphraseIO
-from .simplify_io import SimplifyIO
-from .profanity_io import ProfanityIO
-from .qna_generation_io import QuestionAndAnswerGenerationIO
-from .question_answering_io import QuestionAnsweringIO
-from .review_tagger_io import ReviewTaggerIO
-from .sentiment_analysis_io import SentimentAnalysisIO
-from .summarization_io import SummarizaionIO
-from .table_generator_io import TableGeneratorIO
-from .tag_generation_io import TagGenerationIO
-from .transcript_correction import TranscriptCorrectionIO
+from soffosai.utils.lazy_import import lazy_attributes
+
+# each IO definition is only imported when it is first accessed
+_LAZY_ATTRIBUTES = {
+    "ServiceIO": ".service_io",
+    "AmbiguityDetectionIO": ".ambiguity_detection_io",
+    "AnswerScoringIO": ".answer_scoring_io",
+    "BatchServiceIO": ".batch_service_io",
+    "ContradictionDetectionIO": ".contradiction_detection_io",
+    "DocumentsIngestIO": ".documents_io",
+    "DocumentSearchIO": ".documents_io",
+    "DocumentDeleteIO": ".documents_io",
+    "EmailAnalysisIO": ".email_analysis_io",
+    "EmotionDetectionIO": ".emotion_detection_io",
+    "FileConverterIO": ".file_converter_io",
+    "LanguageDetectionIO": ".language_detection_io",
+    "LetsDiscussCreateIO": ".lets_discuss_io",
+    "LetsDiscussDeleteIO": ".lets_discuss_io",
+    "LetsDiscussIO": ".lets_discuss_io",
+    "LetsDiscussRetrieveIO": ".lets_discuss_io",
+    "LogicalErrorDetectionIO": ".logical_error_detection_io",
+    "MicrolessonIO": ".microlesson",
+    "NamedEntityRecognitionIO": ".named_entity_recognition_io",
+    "ParaphraseIO": ".paraphrase_io",
+    "SimplifyIO": ".simplify_io",
+    "ProfanityIO": ".profanity_io",
+    "QuestionAndAnswerGenerationIO": ".qna_generation_io",
+    "QuestionAnsweringIO": ".question_answering_io",
+    "ReviewTaggerIO": ".review_tagger_io",
+    "SentimentAnalysisIO": ".sentiment_analysis_io",
+    "SummarizaionIO": ".summarization_io",
+    "TableGeneratorIO": ".table_generator_io",
+    "TagGenerationIO": ".tag_generation_io",
+    "TranscriptCorrectionIO": ".transcript_correction",
+}
+
+__getattr__, __dir__ = lazy_attributes(__name__, globals(), _LAZY_ATTRIBUTES)
+
+__all__ = list(_LAZY_ATTRIBUTES)
@@ -0,0 +1,14 @@
+from .service_io import ServiceIO
+from ..constants import ServiceString
+
+
+class BatchServiceIO(ServiceIO):
+    service = ServiceString.BATCH_SERVICE
+    required_input_fields = ["requests"]
+    input_structure = {
+        "requests": list
+    }
+    output_structure = {
+        "responses": list,
+        "cost": dict
+    }
@@ -1,4 +1,13 @@
-from .services import *
-from .services.service import inspect_arguments
-from .nodes import Node
-from .pipelines import Pipeline
+from soffosai.utils.lazy_import import lazy_attributes
+from .services import _LAZY_ATTRIBUTES as _SERVICE_ATTRIBUTES
+
+# services, nodes and pipelines are only imported when they are first accessed
+_LAZY_ATTRIBUTES = {
+    **{name: f".services{module}" for name, module in _SERVICE_ATTRIBUTES.items()},
+    "Node": ".nodes",
+    "Pipeline": ".pipelines",
+}
+
+__getattr__, __dir__ = lazy_attributes(__name__, globals(), _LAZY_ATTRIBUTES)
+
+__all__ = list(_LAZY_ATTRIBUTES)
@@ -0,0 +1,4 @@
+from .memory_cache import LRUCache
+from .file_cache import FileConverterCache, hash_file
+from .search_cache import SearchCache
+from .qa_cache import QuestionAnsweringCache, normalize_question
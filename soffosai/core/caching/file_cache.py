@@ -0,0 +1,158 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Content-addressed disk cache of the File Converter's output
+-----------------------------------------------------
+'''
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "soffosai", "file-converter")
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file, chunk_size:int=_HASH_CHUNK_SIZE):
+    '''
+    The BLAKE2 hex digest of a file's content, read in chunks.
+    file can be a path or a seekable file-like object whose position is restored afterwards.
+    Returns None, without reading it, if the file-like object is not seekable.
+    '''
+    digest = hashlib.blake2b(digest_size=32)
+    if isinstance(file, str):
+        with open(file, "rb") as stream:
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    try:
+        # a pipe, socket or HTTP body would be consumed by the hash and uploaded empty
+        if not file.seekable():
+            return None
+        position = file.tell()
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+        file.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return digest.hexdigest()
+
+
+class FileConverterCache:
+    '''
+    Keeps the text and tagged_elements returned by the File Converter on the local disk, keyed by
+    the hash of the file's content and the normalize flag. The same file is only uploaded and
+    converted once no matter its name, path or who uploads it.
+    The least recently used entries are deleted once the cache is larger than max_bytes.
+    '''
+    def __init__(self, directory:str=DEFAULT_CACHE_DIRECTORY, max_bytes:int=512 * 1024 * 1024) -> None:
+        if max_bytes <= 0:
+            raise ValueError("max_bytes should be a positive integer.")
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        # key -> (size, last access time) of the entries on disk
+        self._entries = {}
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(directory, name))
+                self._entries[name[:-len(".json")]] = (stat.st_size, stat.st_mtime)
+        self._size = sum(size for size, _ in self._entries.values())
+
+
+    @property
+    def size(self) -> int:
+        '''
+        The total size of the cached entries in bytes
+        '''
+        return self._size
+
+
+    def get_key(self, file, normalize:int=0):
+        '''
+        The cache key of a file. None if the file cannot be hashed without consuming it.
+        '''
+        file_hash = hash_file(file)
+        if file_hash is None:
+            return None
+        return f"{file_hash}-{int(normalize)}"
+
+
+    def _path(self, key:str) -> str:
+        return os.path.join(self._directory, key + ".json")
+
+
+    def get(self, key:str):
+        '''
+        The cached {"text", "tagged_elements"} of the key or None
+        '''
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as file:
+                    value = json.load(file)
+                os.utime(self._path(key)) # mark as recently used
+            except (OSError, ValueError):
+                self._forget(key)
+                self.misses += 1
+                return None
+            self._entries[key] = (self._entries[key][0], time.time())
+            self.hits += 1
+            return value
+
+
+    def set(self, key:str, response:dict):
+        '''
+        Stores the text and tagged_elements of a File Converter response
+        '''
+        data = json.dumps({
+            "text": response.get("text"),
+            "tagged_elements": response.get("tagged_elements")
+        }).encode("utf-8")
+        if len(data) > self._max_bytes:
+            return
+
+        with self._lock:
+            # write then rename so that readers never see a partial entry
+            descriptor, temp_path = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, self._path(key))
+            if key in self._entries:
+                self._size -= self._entries[key][0]
+            self._entries[key] = (len(data), time.time())
+            self._size += len(data)
+            self._evict()
+
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._forget(key)
+
+
+    def _evict(self):
+        if self._size <= self._max_bytes:
+            return
+        for key, _ in sorted(self._entries.items(), key=lambda entry: entry[1][1]):
+            self._forget(key)
+            if self._size <= self._max_bytes:
+                break
+
+
+    def _forget(self, key:str):
+        size, _ = self._entries.pop(key)
+        self._size -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
@@ -0,0 +1,60 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: A bounded in-memory cache
+-----------------------------------------------------
+'''
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    '''
+    A thread-safe in-memory cache that evicts the least recently used entries once it holds
+    more than max_entries entries.
+    '''
+    def __init__(self, max_entries:int=1024) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries should be a positive integer.")
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._entries.pop(key, default)
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,224 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Cache of Question Answering responses matched by similar questions
+-----------------------------------------------------
+'''
+import re
+import copy
+import json
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+# fields that do not change the answer or that are compared by similarity
+_IGNORED_FIELDS = ["user", "apikey", "question", "message"]
+_CONTRACTIONS = [
+    (re.compile(r"n't\b"), " not"),
+    (re.compile(r"'re\b"), " are"),
+    (re.compile(r"'m\b"), " am"),
+    (re.compile(r"'ll\b"), " will"),
+    (re.compile(r"'ve\b"), " have"),
+    (re.compile(r"'d\b"), " would"),
+    (re.compile(r"'s\b"), " is"),
+]
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+_PRIME = (1 << 61) - 1
+
+
+def normalize_question(question:str) -> str:
+    '''
+    Lowercase question without punctuation and with expanded contractions: "Who's Neo?" -> "who is neo"
+    '''
+    text = question.lower().replace("’", "'")
+    for pattern, replacement in _CONTRACTIONS:
+        text = pattern.sub(replacement, text)
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _hash(value:str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class _Entry:
+    def __init__(self, question:str, context:str, signature:tuple, response:dict) -> None:
+        self.question = question
+        self.context = context
+        self.signature = signature
+        self.response = response
+
+
+class QuestionAnsweringCache:
+    '''
+    Answers a question from the response to an earlier question that is worded almost the same
+    ("who is Neo?" and "Who's Neo") about exactly the same document_ids or document_text.
+
+    Questions are normalized (see normalize_question) and compared by the Jaccard similarity of
+    their character shingles, estimated with MinHash signatures. Locality sensitive hashing splits
+    the signatures into bands so that only the questions sharing a band are compared.
+    A cached response is used when the similarity is at least threshold. Lower thresholds catch
+    more rewordings but also questions that differ by a single word ("France" and "Spain").
+    A similarity function taking two normalized questions and returning a value between 0 and 1
+    can be given instead, in which case the questions about the same context are all compared with it.
+
+    The least recently used entries are dropped once there are more than max_entries.
+    '''
+    def __init__(self, threshold:float=0.9, max_entries:int=1024, num_perm:int=64, bands:int=16,
+        shingle_size:int=3, similarity=None, seed:int=1) -> None:
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold should be between 0 and 1.")
+        if max_entries <= 0:
+            raise ValueError("max_entries should be a positive integer.")
+        if bands <= 0 or num_perm % bands:
+            raise ValueError("num_perm should be a multiple of bands.")
+        self.threshold = threshold
+        self._max_entries = max_entries
+        self._rows = num_perm // bands
+        self._bands = bands
+        self._shingle_size = shingle_size
+        self._similarity = similarity
+        generator = random.Random(seed)
+        self._permutations = [
+            (generator.randrange(1, _PRIME), generator.randrange(0, _PRIME)) for _ in range(num_perm)
+        ]
+        self._entries = OrderedDict() # key -> _Entry
+        self._buckets = {} # (context, band, band signature) -> keys
+        self._by_context = {} # context -> keys
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+
+    @property
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+    def get_context(self, apikey:str, payload:dict) -> str:
+        '''
+        The fingerprint of everything in the payload besides the question
+        '''
+        fields = {key: value for key, value in payload.items() if key not in _IGNORED_FIELDS}
+        if isinstance(fields.get("document_ids"), list):
+            fields["document_ids"] = sorted(fields["document_ids"])
+        if isinstance(fields.get("document_text"), str):
+            fields["document_text"] = hashlib.blake2b(fields["document_text"].encode("utf-8"), digest_size=32).hexdigest()
+        fields["apikey"] = hashlib.blake2b(str(apikey).encode("utf-8"), digest_size=16).hexdigest()
+        return hashlib.blake2b(json.dumps(fields, sort_keys=True, default=str).encode("utf-8"), digest_size=16).hexdigest()
+
+
+    def get_signature(self, question:str) -> tuple:
+        '''
+        The MinHash signature of a normalized question
+        '''
+        size = self._shingle_size
+        padded = f" {question} "
+        shingles = {padded[index:index + size] for index in range(max(len(padded) - size + 1, 1))}
+        hashes = [_hash(shingle) for shingle in shingles]
+        return tuple(
+            min((a * value + b) % _PRIME for value in hashes)
+            for a, b in self._permutations
+        )
+
+
+    def get(self, apikey:str, payload:dict):
+        '''
+        The cached response to a similar question or None
+        '''
+        question = normalize_question(payload.get("question") or payload.get("message") or "")
+        context = self.get_context(apikey, payload)
+        key = (context, question)
+        with self._lock:
+            entry = self._entries.get(key)
+            near = False
+            if entry is None:
+                near = True
+                key = self._find_similar(context, question)
+                entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if near:
+                self.near_hits += 1
+            return copy.deepcopy(entry.response)
+
+
+    def set(self, apikey:str, payload:dict, response:dict):
+        question = normalize_question(payload.get("question") or payload.get("message") or "")
+        context = self.get_context(apikey, payload)
+        key = (context, question)
+        signature = self.get_signature(question) if self._similarity is None else None
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = _Entry(question, context, signature, copy.deepcopy(response))
+            self._by_context.setdefault(context, set()).add(key)
+            for bucket in self._get_buckets(context, signature):
+                self._buckets.setdefault(bucket, set()).add(key)
+            while len(self._entries) > self._max_entries:
+                self._drop(next(iter(self._entries)))
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._by_context.clear()
+
+
+    def _get_buckets(self, context:str, signature:tuple) -> list:
+        if signature is None:
+            return []
+        rows = self._rows
+        return [(context, band, signature[band * rows:(band + 1) * rows]) for band in range(self._bands)]
+
+
+    def _find_similar(self, context:str, question:str):
+        if self._similarity is not None:
+            candidates = self._by_context.get(context, ())
+            scored = ((self._similarity(question, self._entries[key].question), key) for key in candidates)
+        else:
+            signature = self.get_signature(question)
+            candidates = set()
+            for bucket in self._get_buckets(context, signature):
+                candidates.update(self._buckets.get(bucket, ()))
+            scored = (
+                (sum(a == b for a, b in zip(signature, self._entries[key].signature)) / len(signature), key)
+                for key in candidates
+            )
+
+        best_score, best_key = 0.0, None
+        for score, key in scored:
+            if score > best_score:
+                best_score, best_key = score, key
+        return best_key if best_score >= self.threshold else None
+
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_context.get(entry.context)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_context[entry.context]
+        for bucket in self._get_buckets(entry.context, entry.signature):
+            keys = self._buckets.get(bucket)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[bucket]
@@ -0,0 +1,161 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Cache of Documents Search responses invalidated by ingest and delete
+-----------------------------------------------------
+'''
+import copy
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+_IGNORED_FIELDS = ["user", "apikey"]
+
+
+def _owner(apikey:str) -> str:
+    return hashlib.blake2b(str(apikey).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _filters_match(filters:dict, meta:dict) -> bool:
+    '''
+    Whether a document with this meta could be returned by a search with these filters.
+    Filters that cannot be evaluated locally always match.
+    '''
+    for key, value in filters.items():
+        if key.startswith("$") or isinstance(value, dict):
+            return True
+        values = value if isinstance(value, list) else [value]
+        if meta.get(key) not in values:
+            return False
+    return True
+
+
+class _Entry:
+    def __init__(self, response:dict, owner:str, filters:dict, generation, document_ids:set) -> None:
+        self.response = response
+        self.owner = owner
+        self.filters = filters
+        self.generation = generation # None when the entry is not affected by new documents
+        self.document_ids = document_ids
+
+
+class SearchCache:
+    '''
+    Caches Documents Search responses and invalidates them when documents are ingested or deleted
+    through the SDK's Documents services:
+    - searches by document_ids only depend on those documents. They are dropped when one of them is deleted.
+    - searches by filters are dropped when a document whose meta matches the filters is ingested.
+    - searches by query can return any new document. Ingesting a document moves the api key to a
+    new generation which makes them stale.
+    - any entry whose passages come from a deleted document is dropped.
+    The hits, misses, invalidations and generation bumps are counted, see metrics.
+    '''
+    def __init__(self, max_entries:int=1024) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries should be a positive integer.")
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._by_document = {} # document_id -> keys of the entries that depend on it
+        self._generations = {} # owner -> generation of the query-wide entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.generation_bumps = 0
+
+
+    @property
+    def metrics(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "generation_bumps": self.generation_bumps
+        }
+
+
+    def get_key(self, apikey:str, payload:dict) -> str:
+        fields = {key: value for key, value in payload.items() if key not in _IGNORED_FIELDS}
+        return _owner(apikey) + ":" + json.dumps(fields, sort_keys=True, default=str)
+
+
+    def get(self, apikey:str, payload:dict):
+        key = self.get_key(apikey, payload)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.generation is not None and entry.generation != self._generations.get(entry.owner, 0):
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry.response)
+
+
+    def set(self, apikey:str, payload:dict, response:dict):
+        key = self.get_key(apikey, payload)
+        owner = _owner(apikey)
+        document_ids = set(payload.get("document_ids") or [])
+        for passage in response.get("passages") or []:
+            if isinstance(passage, dict) and passage.get("document_id"):
+                document_ids.add(passage["document_id"])
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key, count=False)
+            generation = None
+            if not payload.get("document_ids") and not payload.get("filters"):
+                generation = self._generations.get(owner, 0)
+            self._entries[key] = _Entry(copy.deepcopy(response), owner, payload.get("filters"), generation, document_ids)
+            for document_id in document_ids:
+                self._by_document.setdefault(document_id, set()).add(key)
+            while len(self._entries) > self._max_entries:
+                self._drop(next(iter(self._entries)), count=False)
+
+
+    def on_ingest(self, apikey:str, document_id:str, meta:dict=None):
+        '''
+        Invalidates the searches that the new document could be part of
+        '''
+        owner = _owner(apikey)
+        with self._lock:
+            self._generations[owner] = self._generations.get(owner, 0) + 1
+            self.generation_bumps += 1
+            for key, entry in list(self._entries.items()):
+                if entry.owner == owner and entry.filters and _filters_match(entry.filters, meta or {}):
+                    self._drop(key)
+
+
+    def on_delete(self, apikey:str, document_ids:list):
+        '''
+        Invalidates the searches that depend on the deleted documents
+        '''
+        with self._lock:
+            for document_id in document_ids:
+                for key in list(self._by_document.get(document_id, [])):
+                    self._drop(key)
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_document.clear()
+
+
+    def _drop(self, key:str, count:bool=True):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        if count:
+            self.invalidations += 1
+        for document_id in entry.document_ids:
+            keys = self._by_document.get(document_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_document[document_id]
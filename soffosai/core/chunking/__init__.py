@@ -0,0 +1,4 @@
+from .text_chunker import TextChunker, TextChunk
+from .content_defined_chunker import ContentDefinedChunker
+from .mergers import merge_responses
+from .chunked_service import ChunkedService
@@ -0,0 +1,65 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Run extraction services on long texts chunk by chunk in parallel
+-----------------------------------------------------
+'''
+from concurrent.futures import ThreadPoolExecutor
+from .text_chunker import TextChunker
+from .mergers import RESPONSE_MERGERS, merge_responses
+
+
+class ChunkedService:
+    '''
+    Splits a long text into chunks, sends the chunks to the service in parallel then merges
+    the responses as if the whole text was sent in a single call.
+    Spans and offsets in the merged response refer to the original text. Entities, spans and tags
+    found twice because of the chunks' overlap are only kept once.
+
+    Supports NamedEntityRecognitionService, TagGenerationService, EmotionDetectionService and
+    SentimentAnalysisService:
+    ```
+    ner = ChunkedService(NamedEntityRecognitionService, max_chars=5000, overlap=1, max_workers=4)
+    output = ner(user="client_id", text=long_text)
+    ```
+    The keyword arguments other than max_chars, overlap and max_workers (e.g. apikey) are
+    passed to the service's constructor.
+    '''
+    def __init__(self, service, max_chars:int=5000, overlap:int=1, max_workers:int=4, **kwargs) -> None:
+        self._service_class = service
+        self._service_kwargs = kwargs
+        self._service = service(**kwargs)._service
+        if self._service not in RESPONSE_MERGERS:
+            raise ValueError(f"{self._service}: chunking is only supported for {list(RESPONSE_MERGERS.keys())}.")
+        if max_workers <= 0:
+            raise ValueError("max_workers should be a positive integer.")
+        self._chunker = TextChunker(max_chars=max_chars, overlap=overlap)
+        self._max_workers = max_workers
+
+
+    def split(self, text:str) -> list:
+        '''
+        The chunks that the text will be sent as
+        '''
+        return self._chunker.split(text)
+
+
+    def _call_service(self, user:str, text:str, kwargs:dict) -> dict:
+        # services keep the state of their last call so each chunk gets its own instance
+        service = self._service_class(**self._service_kwargs)
+        return service(user=user, text=text, **kwargs)
+
+
+    def __call__(self, user:str, text:str, **kwargs) -> dict:
+        chunks = self.split(text)
+        if len(chunks) <= 1:
+            return self._call_service(user, text, kwargs)
+
+        with ThreadPoolExecutor(max_workers=min(self._max_workers, len(chunks))) as executor:
+            responses = list(executor.map(lambda chunk: self._call_service(user, chunk.text, kwargs), chunks))
+
+        for response in responses:
+            if "error" in response:
+                return response
+
+        return merge_responses(self._service, chunks, responses)
@@ -0,0 +1,54 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Split texts into chunks whose boundaries depend on the content only
+-----------------------------------------------------
+'''
+import hashlib
+from .text_chunker import TextChunker, TextChunk
+
+
+class ContentDefinedChunker(TextChunker):
+    '''
+    Splits a text into sentence aligned chunks whose boundaries are decided by the sentences
+    themselves instead of their position in the text. Editing one part of a text only changes
+    the chunks around the edit, the chunks before and after it stay the same.
+
+    A sentence ends a chunk with a probability proportional to its length so that chunks are
+    average_chars long on average, never shorter than min_chars (except the last one) and never
+    longer than max_chars.
+    '''
+    def __init__(self, average_chars:int=4000, min_chars:int=1000, max_chars:int=8000) -> None:
+        super().__init__(max_chars=max_chars, overlap=0)
+        if not 0 < min_chars <= average_chars <= max_chars:
+            raise ValueError("Chunk sizes should satisfy 0 < min_chars <= average_chars <= max_chars.")
+        self.average_chars = average_chars
+        self.min_chars = min_chars
+
+
+    def _is_boundary(self, sentence_text:str) -> bool:
+        digest = hashlib.blake2b(sentence_text.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % self.average_chars < len(sentence_text)
+
+
+    def split(self, text:str) -> list:
+        chunks = []
+        start = None
+        end = None
+        for sentence in self._get_sentences(text):
+            if start is not None and sentence.end - start > self.max_chars:
+                chunks.append(TextChunk(text[start:end], start, end))
+                start = None
+
+            if start is None:
+                start = sentence.start
+            end = sentence.end
+
+            if end - start >= self.min_chars and self._is_boundary(text[sentence.start:sentence.end]):
+                chunks.append(TextChunk(text[start:end], start, end))
+                start = None
+
+        if start is not None:
+            chunks.append(TextChunk(text[start:end], start, end))
+
+        return chunks
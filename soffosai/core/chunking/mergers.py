@@ -0,0 +1,133 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Merge the responses of chunked service calls into a single response
+-----------------------------------------------------
+'''
+from soffosai.common.constants import ServiceString
+
+
+def _owned_start(chunks:list, index:int) -> int:
+    '''
+    Overlapping text belongs to the earlier chunk. Chunk index owns the text from this offset onwards.
+    '''
+    if index == 0:
+        return chunks[0].start
+    return max(chunks[index].start, chunks[index - 1].end)
+
+
+def _merge_cost(responses:list) -> dict:
+    merged = {}
+    costs = [response.get("cost") for response in responses if response.get("cost")]
+    if costs:
+        merged["cost"] = {
+            key: sum(cost.get(key, 0) for cost in costs)
+            for key in costs[0] if isinstance(costs[0][key], (int, float))
+        }
+    charged = [response.get("charged_character_count") for response in responses]
+    if any(count is not None for count in charged):
+        merged["charged_character_count"] = sum(count or 0 for count in charged)
+    return merged
+
+
+def _merge_spans(chunks:list, responses:list, field:str, get_span, set_span) -> list:
+    '''
+    Moves the spans of each chunk's response to the offsets of the original text and
+    drops the spans found in text that an earlier chunk already covered.
+    '''
+    merged = []
+    seen = set()
+    for index, (chunk, response) in enumerate(zip(chunks, responses)):
+        owned_start = _owned_start(chunks, index)
+        for item in response.get(field) or []:
+            start, end = get_span(item)
+            start, end = start + chunk.start, end + chunk.start
+            key = (start, end, item.get("tag"))
+            if start < owned_start or key in seen:
+                continue
+            seen.add(key)
+            item = dict(item)
+            set_span(item, start, end)
+            merged.append(item)
+    return merged
+
+
+def _get_keyed_span(start_key:str, end_key:str):
+    def get_span(item):
+        return item[start_key], item[end_key]
+
+    def set_span(item, start, end):
+        item[start_key] = start
+        item[end_key] = end
+
+    return get_span, set_span
+
+
+def _set_entity_span(entity, start, end):
+    entity["span"] = [start, end]
+
+
+def merge_named_entities(chunks:list, responses:list) -> dict:
+    return {"named_entities": _merge_spans(chunks, responses, "named_entities", lambda entity: entity["span"], _set_entity_span)}
+
+
+def merge_tags(chunks:list, responses:list) -> dict:
+    '''
+    Tags found by several chunks are kept once with their highest score
+    '''
+    best = {}
+    for response in responses:
+        for label, tags in (response.get("tags") or {}).items():
+            label_tags = best.setdefault(label, {})
+            for tag in tags:
+                key = tag["tag"].strip().lower()
+                if key not in label_tags or tag.get("score", 0) > label_tags[key].get("score", 0):
+                    label_tags[key] = tag
+    return {
+        "tags": {
+            label: sorted(tags.values(), key=lambda tag: tag.get("score", 0), reverse=True)
+            for label, tags in best.items()
+        }
+    }
+
+
+def merge_emotions(chunks:list, responses:list) -> dict:
+    return {"spans": _merge_spans(chunks, responses, "spans", *_get_keyed_span("span_start", "span_end"))}
+
+
+def merge_sentiments(chunks:list, responses:list) -> dict:
+    breakdown = _merge_spans(chunks, responses, "sentiment_breakdown", *_get_keyed_span("start", "end"))
+    # the overall sentiment is the average of the segments weighted by their length
+    totals = {}
+    total_length = 0
+    for segment in breakdown:
+        length = max(segment["end"] - segment["start"], 1)
+        total_length += length
+        for sentiment, score in segment["sentiment"].items():
+            totals[sentiment] = totals.get(sentiment, 0) + score * length
+    overall = {sentiment: score / total_length for sentiment, score in totals.items()} if total_length else {}
+    return {
+        "sentiment_breakdown": breakdown,
+        "sentiment_overall": overall
+    }
+
+
+RESPONSE_MERGERS = {
+    ServiceString.NER: merge_named_entities,
+    ServiceString.TAG_GENERATION: merge_tags,
+    ServiceString.EMOTION_DETECTION: merge_emotions,
+    ServiceString.SENTIMENT_ANALYSIS: merge_sentiments,
+}
+
+
+def merge_responses(service:str, chunks:list, responses:list) -> dict:
+    '''
+    Combines the responses of the chunks of a text into the response of the whole text
+    '''
+    merger = RESPONSE_MERGERS.get(service)
+    if merger is None:
+        raise ValueError(f"{service}: merging of chunked responses is not supported.")
+    merged = merger(chunks, responses)
+    merged.update(_merge_cost(responses))
+    merged["chunk_count"] = len(chunks)
+    return merged
@@ -0,0 +1,129 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Split long texts into sentence and paragraph aligned chunks
+-----------------------------------------------------
+'''
+import re
+from collections import namedtuple
+
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+_WHITESPACE = re.compile(r"\s+")
+
+# start and end are the offsets of the chunk's text inside the original text
+TextChunk = namedtuple("TextChunk", ["text", "start", "end"])
+_Sentence = namedtuple("_Sentence", ["start", "end", "paragraph"])
+
+
+class TextChunker:
+    '''
+    Splits a text into chunks of at most max_chars characters.
+    Chunks end on sentence boundaries and prefer to end on paragraph boundaries.
+    Sentences longer than max_chars are split on whitespace.
+
+    ** overlap is the number of sentences at the end of a chunk that are repeated at the start
+    of the next chunk so that the context around the chunk boundaries is not lost.
+    '''
+    def __init__(self, max_chars:int=5000, overlap:int=1) -> None:
+        if max_chars <= 0:
+            raise ValueError("max_chars should be a positive integer.")
+        if overlap < 0:
+            raise ValueError("overlap should not be negative.")
+        self.max_chars = max_chars
+        self.overlap = overlap
+
+
+    def split(self, text:str) -> list:
+        '''
+        Returns the list of TextChunks of the text in order
+        '''
+        if len(text) <= self.max_chars:
+            return [TextChunk(text, 0, len(text))] if text.strip() else []
+
+        sentences = self._get_sentences(text)
+        paragraph_ends = {}
+        for sentence in sentences:
+            paragraph_ends[sentence.paragraph] = sentence.end
+
+        chunks = []
+        current = []
+        carried = 0 # number of sentences in current that were already in the previous chunk
+        for sentence in sentences:
+            if len(current) > carried:
+                size = current[-1].end - current[0].start
+                too_long = sentence.end - current[0].start > self.max_chars
+                # close the chunk on a paragraph boundary if the next paragraph will not fit in it
+                paragraph_break = (
+                    sentence.paragraph != current[-1].paragraph
+                    and paragraph_ends[sentence.paragraph] - current[0].start > self.max_chars
+                    and size >= self.max_chars // 2
+                )
+                if too_long or paragraph_break:
+                    chunks.append(self._make_chunk(text, current))
+                    current = current[len(current) - self.overlap:] if self.overlap else []
+                    carried = len(current)
+
+            while current and sentence.end - current[0].start > self.max_chars:
+                current.pop(0)
+                carried = max(carried - 1, 0)
+            current.append(sentence)
+
+        if len(current) > carried:
+            chunks.append(self._make_chunk(text, current))
+
+        return chunks
+
+
+    def _make_chunk(self, text:str, sentences:list) -> TextChunk:
+        start = sentences[0].start
+        end = sentences[-1].end
+        return TextChunk(text[start:end], start, end)
+
+
+    def _get_sentences(self, text:str) -> list:
+        sentences = []
+        for paragraph, (paragraph_start, paragraph_end) in enumerate(self._get_spans(text, _PARAGRAPH_BREAK, 0, len(text))):
+            for start, end in self._get_spans(text, _SENTENCE_END, paragraph_start, paragraph_end):
+                for piece_start, piece_end in self._split_long_span(text, start, end):
+                    sentences.append(_Sentence(piece_start, piece_end, paragraph))
+        return sentences
+
+
+    def _get_spans(self, text:str, separator, start:int, end:int):
+        '''
+        The (start, end) of the non-blank pieces of text[start:end] between separator matches
+        '''
+        spans = []
+        position = start
+        for match in separator.finditer(text, start, end):
+            spans.append((position, match.start()))
+            position = match.end()
+        spans.append((position, end))
+        return [self._strip_span(text, *span) for span in spans if text[span[0]:span[1]].strip()]
+
+
+    def _strip_span(self, text:str, start:int, end:int):
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return start, end
+
+
+    def _split_long_span(self, text:str, start:int, end:int):
+        spans = []
+        while end - start > self.max_chars:
+            limit = start + self.max_chars
+            cut = None
+            for match in _WHITESPACE.finditer(text, start + 1, limit):
+                cut = match
+            if cut is None:
+                spans.append((start, limit))
+                start = limit
+            else:
+                spans.append((start, cut.start()))
+                start = cut.end()
+        spans.append((start, end))
+        return spans
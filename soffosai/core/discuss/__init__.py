@@ -0,0 +1,2 @@
+from .session_pool import LetsDiscussSessionPool, context_fingerprint
+from .message_store import MessageStore
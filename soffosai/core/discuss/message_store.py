@@ -0,0 +1,226 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Local SQLite record of the Let's Discuss sessions and messages
+-----------------------------------------------------
+'''
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "soffosai", "discuss_messages.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    user TEXT,
+    context TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_owner_user ON sessions (owner, user, created_at);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    message_id INTEGER NOT NULL,
+    query TEXT,
+    response TEXT,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (session_id, message_id)
+);
+"""
+
+
+def _owner(apikey:str) -> str:
+    return hashlib.blake2b(str(apikey).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class MessageStore:
+    '''
+    Records the Let's Discuss sessions and messages as they are created through the SDK so that
+    the conversation history is read locally instead of from full retrieve_sessions dumps.
+    Sessions belong to an api key and a user, and each user only reads and reconciles their own.
+    The LetsDiscussService keeps it in sync when it is given to it (or set as
+    soffosai.discuss_message_store) and answers retrieve_sessions from it.
+
+    Sessions and messages created elsewhere are picked up by reconcile, at most every
+    reconcile_interval seconds: it compares the sessions of the discuss/count call without
+    messages to the local ones, and their message counts when the server returns them
+    (message_count). The messages are fetched when they differ or when the counts are unknown,
+    so that messages added to a known session elsewhere are picked up too.
+    '''
+    def __init__(self, path:str=DEFAULT_STORE_PATH, reconcile_interval:float=300) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.reconcile_interval = reconcile_interval
+        self._reconciled = {} # (owner, user) -> monotonic time of the last reconcile
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(_SCHEMA)
+
+
+    def add_session(self, apikey:str, user:str, session_id:str, context:str=None):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO sessions (session_id, owner, user, context, created_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, _owner(apikey), user, context, _now())
+            )
+
+
+    def add_message(self, apikey:str, user:str, session_id:str, query:str, response:str, message_id:int=None) -> int:
+        '''
+        Records a query and its response. Returns the message_id.
+        Without a message_id, the message is numbered after the last one of the session.
+        '''
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO sessions (session_id, owner, user, context, created_at) VALUES (?, ?, ?, NULL, ?)",
+                (session_id, _owner(apikey), user, _now())
+            )
+            if message_id is None:
+                row = self._connection.execute(
+                    "SELECT COALESCE(MAX(message_id), 0) FROM messages WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                message_id = row[0] + 1
+            self._connection.execute(
+                "INSERT OR REPLACE INTO messages (session_id, message_id, query, response, created_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, message_id, query, response, _now())
+            )
+        return message_id
+
+
+    def remove_sessions(self, apikey:str, user:str, session_ids:list):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM sessions WHERE owner = ? AND user = ? AND session_id = ?",
+                [(_owner(apikey), user, session_id) for session_id in session_ids]
+            )
+
+
+    def get_messages(self, session_id:str, after:int=None, limit:int=None) -> list:
+        '''
+        The messages of a session in order. after only returns the messages that follow that message_id.
+        '''
+        query = "SELECT query, response, message_id FROM messages WHERE session_id = ? AND message_id > ? ORDER BY message_id"
+        parameters = [session_id, after if after is not None else -1]
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+        return [{"query": row[0], "response": row[1], "message_id": row[2]} for row in rows]
+
+
+    def get_sessions(self, apikey:str, user:str, return_messages:bool=False) -> dict:
+        '''
+        The sessions of the user of the api key in the shape of a retrieve_sessions response
+        '''
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT session_id, context FROM sessions WHERE owner = ? AND user = ? ORDER BY created_at",
+                (_owner(apikey), user)
+            ).fetchall()
+        sessions = []
+        for session_id, context in rows:
+            session = {"context": context, "session_id": session_id}
+            if return_messages:
+                session["messages"] = self.get_messages(session_id)
+            sessions.append(session)
+        return {"sessions": sessions, "session_count": len(sessions)}
+
+
+    def needs_reconcile(self, apikey:str, user:str) -> bool:
+        last = self._reconciled.get((_owner(apikey), user))
+        return last is None or time.monotonic() - last >= self.reconcile_interval
+
+
+    def reconcile(self, apikey:str, user:str, retrieve) -> dict:
+        '''
+        Brings the user's sessions up to date with the server.
+        retrieve(return_messages) calls discuss/count for the user and returns its response.
+        Returns the first error response or None.
+        '''
+        owner = _owner(apikey)
+        response = retrieve(False)
+        if "error" in response:
+            return response
+        remote = {session["session_id"]: session for session in response.get("sessions") or []}
+        with self._lock:
+            local = {
+                row[0]: row[1] for row in self._connection.execute(
+                    "SELECT s.session_id, COUNT(m.message_id) FROM sessions s LEFT JOIN messages m "
+                    "ON m.session_id = s.session_id WHERE s.owner = ? AND s.user = ? GROUP BY s.session_id",
+                    (owner, user)
+                ).fetchall()
+            }
+
+        # without messages, the response only tells whether the sessions changed
+        in_sync = set(remote) == set(local) and all(
+            self._message_count(session) == local[session_id] for session_id, session in remote.items()
+        )
+        if not in_sync:
+            response = retrieve(True)
+            if "error" in response:
+                return response
+            self._merge(owner, user, response.get("sessions") or [])
+        self._reconciled[(owner, user)] = time.monotonic()
+        return None
+
+
+    def close(self):
+        self._connection.close()
+
+
+    def _message_count(self, session:dict) -> int:
+        '''
+        The number of messages of a session of a discuss/count response, None when it is not given
+        '''
+        if "messages" in session:
+            return len(session["messages"] or [])
+        return session.get("message_count")
+
+
+    def _merge(self, owner:str, user:str, sessions:list):
+        '''
+        Makes the local sessions of the owner's user match the server's. The other users' sessions are left as they are.
+        Only the sessions whose messages differ are rewritten.
+        '''
+        remote_ids = {session["session_id"] for session in sessions}
+        with self._lock, self._connection:
+            local_ids = {
+                row[0] for row in self._connection.execute(
+                    "SELECT session_id FROM sessions WHERE owner = ? AND user = ?", (owner, user)
+                )
+            }
+            self._connection.executemany(
+                "DELETE FROM sessions WHERE owner = ? AND user = ? AND session_id = ?",
+                [(owner, user, session_id) for session_id in local_ids - remote_ids]
+            )
+            for session in sessions:
+                session_id = session["session_id"]
+                self._connection.execute(
+                    "INSERT OR IGNORE INTO sessions (session_id, owner, user, context, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (session_id, owner, user, session.get("context"), _now())
+                )
+                messages = session.get("messages") or []
+                count = self._connection.execute(
+                    "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+                ).fetchone()[0]
+                if count == len(messages):
+                    continue
+                self._connection.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO messages (session_id, message_id, query, response, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (session_id, message.get("message_id", position + 1), message.get("query"), message.get("response"), _now())
+                        for position, message in enumerate(messages)
+                    ]
+                )
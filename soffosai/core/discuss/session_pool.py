@@ -0,0 +1,265 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Reuse, pre-create and clean up Let's Discuss sessions
+-----------------------------------------------------
+'''
+import time
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from soffosai.core.services import LetsDiscussService, LetsDiscussCreateService, LetsDiscussDeleteService
+
+
+def context_fingerprint(context:str) -> str:
+    return hashlib.blake2b(context.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def is_session_not_found(response:dict) -> bool:
+    '''
+    Whether a Let's Discuss error response says that the session does not exist (anymore)
+    '''
+    if "error" not in response:
+        return False
+    error = str(response["error"]).lower()
+    # HTTP errors are reported as "404 Client Error: ..."
+    status = response.get("status")
+    if not isinstance(status, int):
+        status = int(error[:3]) if error[:3].isdigit() else None
+    if status in (404, 410):
+        return True
+    return "session" in error and ("not found" in error or "not exist" in error)
+
+
+class _Session:
+    # user is the user the session was created for, it is used to delete it
+    def __init__(self, session_id:str, user:str, fingerprint:str) -> None:
+        self.session_id = session_id
+        self.user = user
+        self.fingerprint = fingerprint
+        self.last_used = time.monotonic()
+
+
+class LetsDiscussSessionPool:
+    '''
+    Hands out Let's Discuss sessions so that conversations do not wait for discuss/create and
+    sessions do not pile up on the server:
+    - a user who opens a context again gets the session they already have for that context.
+    - a context that a user opens at least hot_threshold times between two collections is hot for
+    them: warm_sessions sessions are created for the user in the background and handed out when
+    they start a new conversation about it. Sessions always belong to the user they are given to.
+    - sessions unused for idle_timeout seconds are deleted with batched discuss/delete calls.
+    Collections run in the background every collect_interval seconds while the pool is used, or with collect().
+    - a query whose session is not found on the server is sent again once in a new session. Other
+    errors are returned as they are and the conversation keeps its session.
+    ```
+    pool = LetsDiscussSessionPool()
+    response = pool.discuss(user="client_id", context=context, query="Who is Neo?")
+    pool.close() # deletes all the sessions of the pool
+    ```
+    '''
+    def __init__(self, idle_timeout:float=1800, warm_sessions:int=2, hot_threshold:int=3,
+        collect_interval:float=60, delete_batch_size:int=100, **kwargs) -> None:
+        if idle_timeout <= 0 or collect_interval <= 0:
+            raise ValueError("idle_timeout and collect_interval should be positive.")
+        if warm_sessions < 0 or hot_threshold <= 0 or delete_batch_size <= 0:
+            raise ValueError("warm_sessions should not be negative, hot_threshold and delete_batch_size should be positive.")
+        self.idle_timeout = idle_timeout
+        self.warm_sessions = warm_sessions
+        self.hot_threshold = hot_threshold
+        self.collect_interval = collect_interval
+        self.delete_batch_size = delete_batch_size
+        self._service_kwargs = kwargs
+        self._sessions = {} # (user, fingerprint) -> _Session
+        self._warm = {} # (user, fingerprint) -> deque of warm _Sessions
+        self._creating = {} # (user, fingerprint) -> number of warm sessions being created
+        self._usage = {} # (user, fingerprint) -> acquisitions since the last collection
+        self._retired = []
+        self._last_collect = time.monotonic()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        self.reused = 0
+        self.warm_hits = 0
+        self.created = 0
+        self.deleted = 0
+
+
+    @property
+    def metrics(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "warm_sessions": sum(len(sessions) for sessions in self._warm.values()),
+            "reused": self.reused,
+            "warm_hits": self.warm_hits,
+            "created": self.created,
+            "deleted": self.deleted
+        }
+
+
+    def acquire(self, user:str, context:str, new:bool=False, use_warm:bool=True) -> str:
+        '''
+        The session_id of the user's conversation about the context.
+        new=True starts a new conversation and the previous session is deleted at the next collection.
+        use_warm=False creates the new session instead of taking one of the user's warm sessions.
+        '''
+        self._collect_if_due()
+        fingerprint = context_fingerprint(context)
+        key = (user, fingerprint)
+        with self._lock:
+            self._usage[key] = self._usage.get(key, 0) + 1
+            session = self._sessions.get(key)
+            if session is not None and not new:
+                session.last_used = time.monotonic()
+                self.reused += 1
+                self._refill(user, fingerprint, context)
+                return session.session_id
+
+            if session is not None:
+                self._retire(self._sessions.pop(key))
+            warm = self._warm.get(key) if use_warm else None
+            session = warm.popleft() if warm else None
+            if session is not None:
+                self.warm_hits += 1
+            self._refill(user, fingerprint, context)
+
+        if session is None:
+            session = _Session(self._create(user, context), user, fingerprint)
+        session.last_used = time.monotonic()
+        with self._lock:
+            previous = self._sessions.get(key)
+            if previous is not None and previous is not session:
+                self._retire(previous)
+            self._sessions[key] = session
+        return session.session_id
+
+
+    def discuss(self, user:str, context:str, query:str, new:bool=False) -> dict:
+        '''
+        Sends the query in the user's conversation about the context
+        '''
+        session_id = self.acquire(user, context, new=new)
+        response = LetsDiscussService(**self._service_kwargs)(user=user, session_id=session_id, query=query)
+        if is_session_not_found(response) and not new:
+            # the session was deleted on the server, start a new one once
+            self.forget(user, context)
+            session_id = self.acquire(user, context, new=True, use_warm=False)
+            response = LetsDiscussService(**self._service_kwargs)(user=user, session_id=session_id, query=query)
+        response.setdefault("session_id", session_id)
+        return response
+
+
+    def forget(self, user:str, context:str):
+        '''
+        Stops handing out the user's session for the context. It is deleted at the next collection.
+        '''
+        with self._lock:
+            session = self._sessions.pop((user, context_fingerprint(context)), None)
+            if session is not None:
+                self._retire(session)
+
+
+    def collect(self, force:bool=False) -> int:
+        '''
+        Deletes the sessions that have been idle for idle_timeout seconds, or all of them with force=True.
+        Returns the number of deleted sessions.
+        '''
+        now = time.monotonic()
+        with self._lock:
+            self._last_collect = now
+            self._usage.clear()
+            expired = []
+            for key, session in list(self._sessions.items()):
+                if force or now - session.last_used >= self.idle_timeout:
+                    expired.append(self._sessions.pop(key))
+            for key, warm in list(self._warm.items()):
+                while warm and (force or now - warm[0].last_used >= self.idle_timeout):
+                    expired.append(warm.popleft())
+                if not warm:
+                    del self._warm[key]
+            expired.extend(self._retired)
+            self._retired = []
+        return self._delete(expired)
+
+
+    def close(self):
+        '''
+        Waits for the sessions being created and deletes all the sessions of the pool
+        '''
+        self._executor.shutdown(wait=True)
+        self.collect(force=True)
+
+
+    def _retire(self, session:_Session):
+        # replaced sessions are deleted at the next collection
+        self._retired.append(session)
+
+
+    def _collect_if_due(self):
+        # the discuss/delete calls are not made on the caller's request
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_collect < self.collect_interval:
+                return
+            self._last_collect = now
+        try:
+            self._executor.submit(self.collect)
+        except RuntimeError: # the pool is closing
+            pass
+
+
+    def _create(self, user:str, context:str) -> str:
+        response = LetsDiscussCreateService(**self._service_kwargs)(user=user, context=context)
+        if "error" in response:
+            raise ValueError(response)
+        with self._lock:
+            self.created += 1
+        return response["session_id"]
+
+
+    def _refill(self, user:str, fingerprint:str, context:str):
+        # called with the lock held
+        key = (user, fingerprint)
+        if self._usage.get(key, 0) < self.hot_threshold:
+            return
+        missing = self.warm_sessions - len(self._warm.get(key, ())) - self._creating.get(key, 0)
+        for _ in range(max(missing, 0)):
+            self._creating[key] = self._creating.get(key, 0) + 1
+            try:
+                self._executor.submit(self._create_warm, user, fingerprint, context)
+            except RuntimeError: # the pool is closing
+                self._creating[key] -= 1
+                return
+
+
+    def _create_warm(self, user:str, fingerprint:str, context:str):
+        key = (user, fingerprint)
+        session = None
+        try:
+            session = _Session(self._create(user, context), user, fingerprint)
+        except (ValueError, KeyError):
+            pass
+        finally:
+            with self._lock:
+                self._creating[key] -= 1
+                if not self._creating[key]:
+                    del self._creating[key]
+                if session is not None:
+                    self._warm.setdefault(key, deque()).append(session)
+
+
+    def _delete(self, sessions:list) -> int:
+        by_user = {}
+        for session in sessions:
+            by_user.setdefault(session.user, []).append(session.session_id)
+
+        deleted = 0
+        for user, session_ids in by_user.items():
+            for start in range(0, len(session_ids), self.delete_batch_size):
+                batch = session_ids[start:start + self.delete_batch_size]
+                response = LetsDiscussDeleteService(**self._service_kwargs)(user=user, session_ids=batch)
+                if "error" not in response:
+                    deleted += len(batch)
+        with self._lock:
+            self.deleted += deleted
+        return deleted
@@ -0,0 +1,2 @@
+from .catalog import DocumentCatalog
+from .delta_ingest import DeltaIngestor
@@ -0,0 +1,179 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Local SQLite record of the documents ingested to Soffos
+-----------------------------------------------------
+'''
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.expanduser("~"), ".cache", "soffosai", "documents.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    name TEXT,
+    meta TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_content_hash ON documents (owner, content_hash);
+CREATE INDEX IF NOT EXISTS documents_name ON documents (owner, name);
+CREATE INDEX IF NOT EXISTS documents_created_at ON documents (owner, created_at);
+CREATE TABLE IF NOT EXISTS document_meta (
+    document_id TEXT NOT NULL REFERENCES documents (document_id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (document_id, key)
+);
+CREATE INDEX IF NOT EXISTS document_meta_key_value ON document_meta (key, value);
+"""
+
+
+def _owner(apikey:str) -> str:
+    # documents belong to the project of the api key. Only a hash of the key is stored.
+    return hashlib.blake2b(str(apikey).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, sort_keys=True)
+
+
+class DocumentCatalog:
+    '''
+    Records the documents ingested through the SDK: their content hash, name, meta and creation
+    date. The DocumentsService, DocumentsIngestService and DocumentsDeleteService keep it in sync
+    when it is given to them (or set as soffosai.document_catalog):
+    - ingesting a text that was already ingested with the same name and meta returns the
+    existing document_id instead of ingesting it again.
+    - deleted documents are removed from the catalog.
+    - if authoritative=True (all the documents of the api key are ingested through this
+    catalog), searches by filters are narrowed locally to the matching document_ids.
+    The catalog only sees the deletions made through the SDK with it. A document deleted
+    elsewhere (another process, the dashboard) stays in the catalog and its ingest keeps returning
+    the deleted document_id: forget it with remove, or set verify=True to check with a
+    documents/search by document_id that a known document still exists before skipping its ingest.
+    '''
+    def __init__(self, path:str=DEFAULT_CATALOG_PATH, authoritative:bool=False, verify:bool=False) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.authoritative = authoritative
+        self.verify = verify
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(_SCHEMA)
+
+
+    @staticmethod
+    def content_hash(text:str=None, tagged_elements:list=None) -> str:
+        '''
+        The hash that identifies the content of a document
+        '''
+        content = text if text is not None else _dumps(tagged_elements)
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=32).hexdigest()
+
+
+    def find(self, apikey:str, content_hash:str, name:str=None, meta:dict=None):
+        '''
+        The document_id of a document with the same content, name and meta. None if there is none.
+        '''
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT document_id FROM documents WHERE owner = ? AND content_hash = ? AND name IS ? AND meta = ? LIMIT 1",
+                (_owner(apikey), content_hash, name, _dumps(meta or {}))
+            ).fetchone()
+        return row[0] if row else None
+
+
+    def add(self, apikey:str, document_id:str, content_hash:str, name:str=None, meta:dict=None, created_at:str=None):
+        meta = meta or {}
+        created_at = created_at or datetime.now(timezone.utc).isoformat()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO documents (document_id, owner, content_hash, name, meta, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (document_id, _owner(apikey), content_hash, name, _dumps(meta), created_at)
+            )
+            self._connection.execute("DELETE FROM document_meta WHERE document_id = ?", (document_id,))
+            self._connection.executemany(
+                "INSERT INTO document_meta (document_id, key, value) VALUES (?, ?, ?)",
+                [(document_id, key, _dumps(value)) for key, value in meta.items()]
+            )
+
+
+    def remove(self, apikey:str, document_ids:list):
+        '''
+        Forgets documents, e.g. ones deleted without the catalog
+        '''
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM documents WHERE owner = ? AND document_id = ?",
+                [(_owner(apikey), document_id) for document_id in document_ids]
+            )
+
+
+    def get(self, apikey:str, document_id:str):
+        '''
+        The catalog record of a document of the api key or None
+        '''
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT document_id, content_hash, name, meta, created_at FROM documents WHERE owner = ? AND document_id = ?",
+                (_owner(apikey), document_id)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "document_id": row[0],
+            "content_hash": row[1],
+            "name": row[2],
+            "meta": json.loads(row[3]),
+            "created_at": row[4]
+        }
+
+
+    def resolve(self, apikey:str, filters:dict=None, name:str=None, date_from:str=None, date_until:str=None):
+        '''
+        The document_ids of the catalog that match the name, the meta filters and the creation dates.
+        filters maps a meta key to a value or to a list of accepted values.
+        Returns None when a filter cannot be evaluated locally.
+        '''
+        conditions = ["owner = ?"]
+        parameters = [_owner(apikey)]
+        if name is not None:
+            conditions.append("name = ?")
+            parameters.append(name)
+        if date_from is not None:
+            conditions.append("created_at >= ?")
+            parameters.append(date_from)
+        if date_until is not None:
+            conditions.append("created_at <= ?")
+            parameters.append(date_until)
+
+        for key, value in (filters or {}).items():
+            if key.startswith("$") or isinstance(value, dict):
+                return None # operators are left to the Soffos API
+            values = value if isinstance(value, list) else [value]
+            conditions.append(
+                "document_id IN (SELECT document_id FROM document_meta WHERE key = ? AND value IN (%s))"
+                % ", ".join("?" for _ in values)
+            )
+            parameters.append(key)
+            parameters.extend(_dumps(item) for item in values)
+
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT document_id FROM documents WHERE {' AND '.join(conditions)} ORDER BY created_at",
+                parameters
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,187 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Re-ingest only the changed chunks of updated documents
+-----------------------------------------------------
+'''
+import os
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import soffosai
+from soffosai.core.chunking import ContentDefinedChunker
+from soffosai.core.services import DocumentsIngestService, DocumentsDeleteService
+
+
+DEFAULT_MANIFEST_PATH = os.path.join(os.path.expanduser("~"), ".cache", "soffosai", "chunk_manifest.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    owner TEXT NOT NULL,
+    document_name TEXT NOT NULL,
+    chunk_hash TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (owner, document_name, chunk_hash)
+);
+"""
+
+
+def _hash(value:str) -> str:
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class DeltaIngestor:
+    '''
+    Ingests a large document as separate chunks so that updating it only ingests the chunks that
+    changed and deletes the chunks that were removed. The cost of an update follows the size of the
+    edit instead of the size of the document.
+
+    Chunk boundaries depend on the content (see ContentDefinedChunker) so an edit does not move
+    the chunks around it. A manifest on the local disk maps each chunk's hash to its document_id.
+    Every chunk is ingested with the meta key group_key set to the document's name, so the whole
+    document is searched with filters={group_key: document_name}:
+    ```
+    ingestor = DeltaIngestor()
+    ingestor.ingest(user="client_id", document_name="handbook", text=handbook_text)
+    ingestor.ingest(user="client_id", document_name="handbook", text=updated_handbook_text)
+    DocumentsSearchService()(user="client_id", filters=ingestor.get_filters("handbook"))
+    ```
+    '''
+    def __init__(self, manifest_path:str=DEFAULT_MANIFEST_PATH, chunker:ContentDefinedChunker=None,
+        group_key:str="document_group", max_workers:int=4, **kwargs) -> None:
+        if manifest_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+        if max_workers <= 0:
+            raise ValueError("max_workers should be a positive integer.")
+        self._chunker = chunker or ContentDefinedChunker(average_chars=2000, min_chars=500, max_chars=4000)
+        self._group_key = group_key
+        self._max_workers = max_workers
+        self._service_kwargs = kwargs
+        self._apikey = kwargs['apikey'] if kwargs.get('apikey') else soffosai.api_key
+        self._owner = _hash(str(self._apikey))
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(manifest_path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+
+
+    def get_filters(self, document_name:str) -> dict:
+        '''
+        The search filters that match all the chunks of a document
+        '''
+        return {self._group_key: document_name}
+
+
+    def get_manifest(self, document_name:str) -> dict:
+        '''
+        chunk hash -> document_id of the chunks of a document
+        '''
+        rows = self._connection.execute(
+            "SELECT chunk_hash, document_id FROM chunks WHERE owner = ? AND document_name = ? ORDER BY position",
+            (self._owner, document_name)
+        ).fetchall()
+        return dict(rows)
+
+
+    def get_document_ids(self, document_name:str) -> list:
+        '''
+        The document_ids of the chunks of a document in the order of the chunks
+        '''
+        return list(self.get_manifest(document_name).values())
+
+
+    def ingest(self, user:str, document_name:str, text:str, meta:dict=None) -> dict:
+        '''
+        Ingests the chunks of the text that are not ingested yet and deletes the chunks of the
+        previous version of the document that are no longer in the text.
+        '''
+        with self._lock:
+            chunks = self._chunker.split(text)
+            chunk_hashes = [_hash(chunk.text) for chunk in chunks]
+            manifest = self.get_manifest(document_name)
+
+            new_chunks = {}
+            for chunk_hash, chunk in zip(chunk_hashes, chunks):
+                if chunk_hash not in manifest:
+                    new_chunks[chunk_hash] = chunk
+            current_hashes = set(chunk_hashes)
+            removed = [chunk_hash for chunk_hash in manifest if chunk_hash not in current_hashes]
+
+            chunk_meta = dict(meta or {})
+            chunk_meta[self._group_key] = document_name
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                responses = list(executor.map(
+                    lambda chunk: DocumentsIngestService(**self._service_kwargs)(
+                        user=user, document_name=document_name, text=chunk.text, meta=chunk_meta
+                    ),
+                    new_chunks.values()
+                ))
+
+            total_cost = 0.0
+            errors = []
+            for chunk_hash, response in zip(new_chunks, responses):
+                if "error" in response:
+                    errors.append(response)
+                    continue
+                manifest[chunk_hash] = response["document_id"]
+                total_cost += (response.get("cost") or {}).get("total_cost", 0)
+
+            positions = {chunk_hash: position for position, chunk_hash in enumerate(chunk_hashes)}
+            self._save(document_name, manifest, positions)
+            if errors:
+                # the previous chunks are kept until the new ones are all ingested
+                raise ValueError(errors)
+
+            if removed:
+                response = DocumentsDeleteService(**self._service_kwargs)(
+                    user=user, document_ids=[manifest[chunk_hash] for chunk_hash in removed]
+                )
+                if "error" in response:
+                    raise ValueError(response)
+                total_cost += (response.get("cost") or {}).get("total_cost", 0)
+                self._forget(document_name, removed)
+
+            return {
+                "document_ids": [manifest[chunk_hash] for chunk_hash in dict.fromkeys(chunk_hashes)],
+                "filters": self.get_filters(document_name),
+                "ingested_chunks": len(new_chunks),
+                "deleted_chunks": len(removed),
+                "unchanged_chunks": len(current_hashes) - len(new_chunks),
+                "cost": {"total_cost": total_cost}
+            }
+
+
+    def delete(self, user:str, document_name:str) -> dict:
+        '''
+        Deletes all the chunks of a document
+        '''
+        with self._lock:
+            manifest = self.get_manifest(document_name)
+            if not manifest:
+                return {"success": True, "deleted_chunks": 0}
+            response = DocumentsDeleteService(**self._service_kwargs)(user=user, document_ids=list(manifest.values()))
+            if "error" in response:
+                return response
+            self._forget(document_name, list(manifest))
+            response["deleted_chunks"] = len(manifest)
+            return response
+
+
+    def _save(self, document_name:str, manifest:dict, positions:dict):
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO chunks (owner, document_name, chunk_hash, document_id, position) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (self._owner, document_name, chunk_hash, document_id, positions.get(chunk_hash, -1))
+                    for chunk_hash, document_id in manifest.items()
+                ]
+            )
+
+
+    def _forget(self, document_name:str, chunk_hashes:list):
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM chunks WHERE owner = ? AND document_name = ? AND chunk_hash = ?",
+                [(self._owner, document_name, chunk_hash) for chunk_hash in chunk_hashes]
+            )
@@ -1,23 +1,37 @@
-from .node import Node
-from .ambiguity_detection import AmbiguityDetectionNode
-from .answer_scoring import AnswerScoringNode
-from .contradiction_detection import ContradictionDetectionNode
-from .documents import DocumentsIngestNode, DocumentsSearchNode, DocumentsDeleteNode
-from .email_analysis import EmailAnalysisNode
-from .emotion_detection import EmotionDetectionNode
-from .file_converter import FileConverterNode
-from .language_detection import LanguageDetectionNode
-from .lets_discuss import LetsDiscussCreateNode, LetsDiscussNode, LetsDiscussRetrieveNode, LetsDiscussDeleteNode
-from .logical_error_detection import LogicalErrorDetectionNode
-from .microlesson import MicrolessonNode
-from .named_entity_recognition import NamedEntityRecognitionNode
-from .paraphrase import ParaphraseNode
-from .qna_generation import QuestionAndAnswerGenerationNode
-from .question_answering import QuestionAnsweringNode
-from .review_tagger import ReviewTaggerNode
-from .sentiment_analysis import SentimentAnalysisNode
-from .simplify import SimplifyNode
-from .summarization import SummarizationNode
-from .table_generator import TableGeneratorNode
-from .tag_generation import TagGenerationNode
-from .transcript_correction import TranscriptCorrectionNode
+from soffosai.utils.lazy_import import lazy_attributes
+
+# each node module is only imported when its node is first accessed
+_LAZY_ATTRIBUTES = {
+    "Node": ".node",
+    "AmbiguityDetectionNode": ".ambiguity_detection",
+    "AnswerScoringNode": ".answer_scoring",
+    "ContradictionDetectionNode": ".contradiction_detection",
+    "DocumentsIngestNode": ".documents",
+    "DocumentsSearchNode": ".documents",
+    "DocumentsDeleteNode": ".documents",
+    "EmailAnalysisNode": ".email_analysis",
+    "EmotionDetectionNode": ".emotion_detection",
+    "FileConverterNode": ".file_converter",
+    "LanguageDetectionNode": ".language_detection",
+    "LetsDiscussCreateNode": ".lets_discuss",
+    "LetsDiscussNode": ".lets_discuss",
+    "LetsDiscussRetrieveNode": ".lets_discuss",
+    "LetsDiscussDeleteNode": ".lets_discuss",
+    "LogicalErrorDetectionNode": ".logical_error_detection",
+    "MicrolessonNode": ".microlesson",
+    "NamedEntityRecognitionNode": ".named_entity_recognition",
+    "ParaphraseNode": ".paraphrase",
+    "QuestionAndAnswerGenerationNode": ".qna_generation",
+    "QuestionAnsweringNode": ".question_answering",
+    "ReviewTaggerNode": ".review_tagger",
+    "SentimentAnalysisNode": ".sentiment_analysis",
+    "SimplifyNode": ".simplify",
+    "SummarizationNode": ".summarization",
+    "TableGeneratorNode": ".table_generator",
+    "TagGenerationNode": ".tag_generation",
+    "TranscriptCorrectionNode": ".transcript_correction",
+}
+
+__getattr__, __dir__ = lazy_attributes(__name__, globals(), _LAZY_ATTRIBUTES)
+
+__all__ = list(_LAZY_ATTRIBUTES)
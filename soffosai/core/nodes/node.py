@@ -24,7 +24,9 @@ class Node:
         self.source = source
         if isinstance(service, str):
             self.service:SoffosAIService = SoffosAIService(service=service)
-        elif issubclass(service, SoffosAIService):
+        elif isinstance(service, SoffosAIService): # an already configured service
+            self.service:SoffosAIService = service
+        elif isinstance(service, type) and issubclass(service, SoffosAIService):
             self.service:SoffosAIService = service()
         else:
             raise ValueError("Upon initialization of the Node: invalid argument value for <service>.")
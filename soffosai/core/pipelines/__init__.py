@@ -1,5 +1,17 @@
-from .pipeline import Pipeline
-from .document_summary import DocumentSummaryPipeline
-from .file_ingest import FileIngestPipeline
-from .file_summary_ingest import FileSummaryIngestPipeline
-from .file_summary import FileSummaryPipeline
+from soffosai.utils.lazy_import import lazy_attributes
+
+# each pipeline module is only imported when its pipeline is first accessed
+_LAZY_ATTRIBUTES = {
+    "Pipeline": ".pipeline",
+    "DocumentSummaryPipeline": ".document_summary",
+    "FileIngestPipeline": ".file_ingest",
+    "FileSummaryIngestPipeline": ".file_summary_ingest",
+    "FileSummaryPipeline": ".file_summary",
+    "MultiPipeline": ".multi_pipeline",
+    "io_bound": ".pre_process",
+    "cpu_bound": ".pre_process",
+}
+
+__getattr__, __dir__ = lazy_attributes(__name__, globals(), _LAZY_ATTRIBUTES)
+
+__all__ = list(_LAZY_ATTRIBUTES)
@@ -7,23 +7,37 @@ Purpose: Define the standard Pipeline for converting and summarizing a file
 from soffosai.core import Node, inspect_arguments
 from soffosai.core.nodes import FileConverterNode, SummarizationNode
 from soffosai.core.pipelines import Pipeline
+from soffosai.core.summarizers import MapReduceSummarizationService
 
 class FileSummaryPipeline(Pipeline):
     '''
     A Soffos Pipeline that takes a file, convert it to its text content then summarizes it.
     The output is a list containing the output object of file converter and summarization.
+
+    ** map_reduce=True summarizes the text by sections in parallel before summarizing the
+    summaries. Use it for book-length files. See MapReduceSummarizationService.
     '''
-    def __init__(self, **kwargs) -> None:
+    def __init__(self, map_reduce:bool=False, **kwargs) -> None:
 
         file_converter_node = FileConverterNode(
             name = "fileconverter",
             file = {"source":"user_input", "field": "file"}
         )
-        summarization_node = SummarizationNode(
-            name = "summary",
-            text = {"source":"fileconverter", "field": "text"},
-            sent_length = {"source":"user_input", "field": "sent_length"}
-        )
+        if map_reduce:
+            summarization_node = Node(
+                name = "summary",
+                service = MapReduceSummarizationService(),
+                source = {
+                    "text": {"source":"fileconverter", "field": "text"},
+                    "sent_length": {"source":"user_input", "field": "sent_length"}
+                }
+            )
+        else:
+            summarization_node = SummarizationNode(
+                name = "summary",
+                text = {"source":"fileconverter", "field": "text"},
+                sent_length = {"source":"user_input", "field": "sent_length"}
+            )
 
         nodes = [file_converter_node, summarization_node]
         use_defaults = False
@@ -0,0 +1,112 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Free the outputs of pipeline stages once no later stage reads them
+-----------------------------------------------------
+'''
+import os
+import json
+import tempfile
+
+
+def is_node_input(value):
+    if not isinstance(value, dict):
+        return False
+    return "source" in value and "field" in value
+
+
+def get_last_uses(stages:list) -> dict:
+    '''
+    (source, field) -> index of the last stage that reads it
+    '''
+    last_uses = {}
+    for index, stage in enumerate(stages):
+        for notation in stage.source.values():
+            if is_node_input(notation):
+                last_uses[(notation['source'], notation['field'])] = index
+    return last_uses
+
+
+class OutputFilter:
+    '''
+    Which stage outputs are returned by a pipeline run.
+    keep_outputs lists stage names, whose whole responses are kept, and "stage.field" names.
+    '''
+    def __init__(self, keep_outputs:list) -> None:
+        self._stages = set()
+        self._fields = set()
+        for name in keep_outputs:
+            if "." in name:
+                self._fields.add(tuple(name.split(".", 1)))
+            else:
+                self._stages.add(name)
+
+
+    def keeps(self, stage_name:str, field:str) -> bool:
+        return stage_name in self._stages or (stage_name, field) in self._fields
+
+
+class SpilledValue:
+    '''
+    A stage output written to a temporary file while the pipeline runs
+    '''
+    def __init__(self, path:str, size:int) -> None:
+        self.path = path
+        self.size = size
+
+
+    def load(self):
+        with open(self.path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class Spiller:
+    '''
+    Moves the outputs larger than threshold characters to temporary files in directory
+    '''
+    def __init__(self, threshold:int, directory:str=None) -> None:
+        self.threshold = threshold
+        self.directory = directory
+        self._spilled = []
+
+
+    def spill(self, value):
+        if isinstance(value, str):
+            if len(value) <= self.threshold:
+                return value
+            data = json.dumps(value)
+        elif isinstance(value, (list, dict)) and value:
+            data = json.dumps(value)
+            if len(data) <= self.threshold:
+                return value
+        else:
+            return value
+
+        descriptor, path = tempfile.mkstemp(prefix="soffosai-pipeline-", suffix=".json", dir=self.directory)
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            file.write(data)
+        spilled = SpilledValue(path, len(data))
+        self._spilled.append(spilled)
+        return spilled
+
+
+    def cleanup(self):
+        for spilled in self._spilled:
+            spilled.remove()
+        self._spilled = []
+
+
+def load(value):
+    '''
+    The value itself or the content of a spilled value
+    '''
+    if isinstance(value, SpilledValue):
+        return value.load()
+    return value
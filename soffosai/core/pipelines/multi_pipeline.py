@@ -0,0 +1,155 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Run several pipelines on the same input, executing their identical stages once
+-----------------------------------------------------
+'''
+import copy
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from soffosai.client.search_result import SearchResult
+from .pipeline import Pipeline
+from .liveness import get_last_uses, Spiller
+
+
+def get_stage_key(service, payload:dict) -> tuple:
+    '''
+    Stages with the same key send the same request. Values that are not JSON, like file
+    handles, are only the same when they are the same object.
+    '''
+    def default(value):
+        return f"<{type(value).__name__} {id(value)}>"
+    return type(service), service._service, json.dumps(payload, sort_keys=True, default=default)
+
+
+class MultiPipeline:
+    '''
+    Runs several pipelines on the same user_input. Stages of different pipelines that would send
+    the same request (same service and same payload, after the sources and pre_process functions
+    are resolved) are executed once and their response is given to every pipeline that needs it.
+    ```
+    multi = MultiPipeline([FileIngestPipeline(), FileSummaryPipeline(), FileSummaryIngestPipeline()])
+    ingested, summarized, summary_ingested = multi.run({"user": user, "file": file, "sent_length": 5})
+    ```
+    converts the file once and summarizes it once.
+    The pipelines advance together one stage at a time and the distinct requests of each step are
+    sent concurrently, with up to max_workers at a time. Execution codes are not used.
+    metrics reports the stages of the last run, how many requests were sent and their total cost.
+    With a key pool, a run leases one key of the first pipeline's pool for all the requests, since
+    they are shared between the pipelines.
+    '''
+    def __init__(self, pipelines:list, max_workers:int=8) -> None:
+        if not isinstance(pipelines, list) or not pipelines:
+            raise ValueError("pipelines should be a non-empty list of Pipelines.")
+        for pipeline in pipelines:
+            if not isinstance(pipeline, Pipeline):
+                raise ValueError(f"{pipeline} is not an instance of Pipeline.")
+        self._pipelines = pipelines
+        self._max_workers = max_workers
+        self._lock = threading.Lock()
+        self.stages = 0
+        self.executions = 0
+        self.total_cost = 0.0
+
+
+    @property
+    def metrics(self) -> dict:
+        return {
+            "stages": self.stages,
+            "executions": self.executions,
+            "shared": self.stages - self.executions,
+            "total_cost": self.total_cost
+        }
+
+
+    def run(self, user_input:dict) -> list:
+        '''
+        The results of the pipelines, in order
+        '''
+        runs = []
+        for pipeline in self._pipelines:
+            # each pipeline gets its own copy as pipelines add fields to their user_input
+            pipeline_input = dict(user_input)
+            stages, _ = pipeline._start(pipeline_input, use_execution_code=False)
+            runs.append({
+                "pipeline": pipeline,
+                "stages": stages,
+                "infos": {"user_input": pipeline_input},
+                "total_cost": 0.00,
+                "last_uses": get_last_uses(stages) if pipeline._keep_outputs is not None else None,
+                "spiller": Spiller(pipeline._spill_threshold, pipeline._spill_directory) if pipeline._spill_threshold else None
+            })
+        self.stages = sum(len(run["stages"]) for run in runs)
+        self.executions = 0
+        self.total_cost = 0.0
+        apikey = None
+
+        responses = {} # stage key -> response of the stages already executed
+        try:
+            apikey = self._pipelines[0]._lease_key()
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                for index in range(max(len(run["stages"]) for run in runs)):
+                    requests = {} # stage key -> (service, payload) to send in this step
+                    waiting = [] # (run, stage, stage key)
+                    for run in runs:
+                        if index >= len(run["stages"]):
+                            continue
+                        stage = run["stages"][index]
+                        pipeline = run["pipeline"]
+                        payload = pipeline._get_payload(stage, index, run["infos"], {})
+                        if 'user' not in payload:
+                            payload["user"] = run["infos"]["user_input"]["user"]
+                        payload['apikey'] = apikey or pipeline._apikey
+                        key = get_stage_key(stage.service, payload)
+                        if key not in responses and key not in requests:
+                            requests[key] = (stage.service, payload)
+                        waiting.append((run, stage, key))
+
+                    print(f"running {len(requests)} requests for {len(waiting)} stages.")
+                    keys = list(requests)
+                    # services keep the state of their last call so each request gets its own copy
+                    for key, response in zip(keys, executor.map(lambda key: self._execute(*requests[key], apikey), keys)):
+                        if "error" in response:
+                            raise ValueError(response)
+                        responses[key] = response
+
+                    for run, stage, key in waiting:
+                        response = self._copy_response(responses[key])
+                        run["total_cost"] += response['cost']['total_cost']
+                        run["pipeline"]._store(run["infos"], stage, index, response, run["last_uses"], run["spiller"])
+
+            results = []
+            for run in runs:
+                run["infos"]['total_cost'] = run["total_cost"]
+                results.append(run["pipeline"]._finish(run["infos"], run["pipeline"]._keep_outputs))
+            return results
+
+        finally:
+            for run in runs:
+                if run["spiller"] is not None:
+                    run["spiller"].cleanup()
+            self._pipelines[0]._unlease_key(apikey)
+
+
+    def _copy_response(self, response:dict) -> dict:
+        '''
+        A copy of a shared response for one pipeline, so that its pre_process functions cannot
+        change what the other pipelines read
+        '''
+        if isinstance(response, SearchResult):
+            response = response.to_dict()
+        return copy.deepcopy(response)
+
+
+    def _execute(self, service, payload:dict, apikey:str=None) -> dict:
+        response = copy.copy(service).get_response(payload, apikey=apikey)
+        with self._lock:
+            self.executions += 1
+            if "error" not in response:
+                self.total_cost += response['cost']['total_cost']
+        return response
+
+
+    def __call__(self, user_input:dict) -> list:
+        return self.run(user_input)
@@ -4,14 +4,15 @@ Created at: 2023-08-14
 Purpose: Define the basic pipeline object
 -----------------------------------------------------
 '''
+import copy
 import soffosai
+from concurrent.futures import ThreadPoolExecutor
 from soffosai.core.nodes.node import Node
-
-
-def is_node_input(value):
-    if not isinstance(value, dict):
-        return False
-    return "source" in value and "field" in value
+from soffosai.client.timeouts import Deadline, MIN_TIMEOUT
+from soffosai.client.search_result import SearchResult
+from .liveness import is_node_input, get_last_uses, OutputFilter, Spiller, SpilledValue, load
+from soffosai.core.services.batch_service import BatchService, is_batchable
+from .pre_process import INLINE, has_pre_process, get_mode, pre_process, pre_process_many
 
 
 class Pipeline:
@@ -25,9 +26,28 @@ class Pipeline:
     If the previous stages does not have it, it will take from the
     pipeline's user_input.  Also, the stages will only be supplied with the required fields + default
     of the require_one_of_choice fields.
+
+    ** keep_outputs lists the outputs returned by run: stage names for whole responses and
+    "stage.field" for single fields. The other outputs are freed as soon as the last stage that
+    reads them has run. By default every output is kept until the end of the run.
+    ** spill_threshold: outputs larger than this number of characters are written to temporary
+    files in spill_directory while the pipeline runs and read back when they are used.
+    ** batch_stages=True sends a stage of a cheap analysis service (see BATCHABLE_SERVICES) in one
+    batch-service request together with the following ones whose inputs are already available.
+    The stages of a batch run together: a termination requested with the run's execution code
+    stops the stages after the batch, not the later stages already sent in it.
+    ** key_pool: a soffosai.client.ApiKeyPool, soffosai.api_key_pool by default and none when the
+    pipeline is given an apikey. Each run leases one key of the pool and sends all its stages with
+    it, since its stages use the documents and sessions of that key.
     '''
-    def __init__(self, nodes:list, use_defaults:bool=False, **kwargs) -> None:
+    def __init__(self, nodes:list, use_defaults:bool=False, keep_outputs:list=None, spill_threshold:int=None,
+        spill_directory:str=None, batch_stages:bool=False, **kwargs) -> None:
         self._apikey = kwargs['apikey'] if kwargs.get('apikey') else soffosai.api_key
+        self._key_pool = None if kwargs.get('apikey') else kwargs.get('key_pool', soffosai.api_key_pool)
+        self._keep_outputs = OutputFilter(keep_outputs) if keep_outputs is not None else None
+        self._spill_threshold = spill_threshold
+        self._spill_directory = spill_directory
+        self._batch_stages = batch_stages
         self._stages = nodes
         self._input:dict = {}
         self._infos = []
@@ -49,7 +69,163 @@ class Pipeline:
         self._outputfields = [list(stage.service._serviceio.output_structure.keys()) for stage in self._stages]
 
     
-    def run(self, user_input):
+    def run(self, user_input, deadline=None, priority:str=None):
+        '''
+        Runs the stages on the user_input. deadline, in seconds or a soffosai.client.Deadline, is the
+        time the whole run has: each stage gets a share of the time left, in proportion to the
+        timeouts of the services left, and the run fails as soon as the time left is too short.
+        priority is the RequestScheduler class of the stages' requests.
+        '''
+        stages, execution_code = self._start(user_input)
+        if deadline is not None and not isinstance(deadline, Deadline):
+            deadline = Deadline(deadline)
+
+        # Initialization of values
+        infos = {}
+        infos['user_input'] = user_input
+        total_cost = 0.00
+        keep_outputs = self._keep_outputs
+        last_uses = get_last_uses(stages) if keep_outputs is not None else None
+        spiller = Spiller(self._spill_threshold, self._spill_directory) if self._spill_threshold else None
+        pending = {} # (stage index, key) -> pre_process future started before its stage
+        self._start_pre_processes(stages, infos, 0, pending)
+
+        executed = set()
+        freed = -1 # the dead outputs of the stages up to this index are freed
+        apikey = self._lease_key()
+
+        try:
+            # Execute per stage
+            for index, stage in enumerate(stages):
+                stage: Node
+                if index in executed: # already sent in the batch of an earlier stage
+                    continue
+                # premature termination
+                if execution_code in self._termination_codes:
+                    self._termination_codes.remove(execution_code)
+                    self._execution_codes.remove(execution_code)
+                    infos['total_cost'] = total_cost
+                    infos['wargning'] = "This Soffos Pipeline has been prematurely terminated"
+                    return self._finish(infos, keep_outputs)
+                
+                # execute
+                group = [index]
+                if self._batch_stages and is_batchable(stage.service):
+                    group += self._get_batchable(stages, infos, index, executed)
+
+                stage_kwargs = {"priority": priority} if priority else {}
+                if apikey is not None:
+                    stage_kwargs["apikey"] = apikey
+                if deadline is not None:
+                    stage_kwargs["deadline"] = self._get_stage_deadline(deadline, stages, group, executed)
+
+                if len(group) == 1:
+                    print(f"running {stage.service._service}.")
+                    payload = self._get_stage_payload(stage, index, infos, pending, apikey)
+                    responses = [stage.service.get_response(payload, **stage_kwargs)]
+                else:
+                    print(f"running {[stages[position].service._service for position in group]} in one batch.")
+                    calls = [
+                        (stages[position].service, self._get_stage_payload(stages[position], position, infos, pending, apikey))
+                        for position in group
+                    ]
+                    batch_service = BatchService(apikey=apikey or self._apikey, key_pool=self._key_pool)
+                    responses = batch_service.get_responses(user_input['user'], calls, **stage_kwargs)
+
+                for position, response in zip(group, responses):
+                    if "error" in response:
+                        raise ValueError(response)
+                    
+                    print(f"Response ready for {stages[position].name}")
+                    total_cost += response['cost']['total_cost']
+                    self._store(infos, stages[position], position, response, last_uses, spiller, free=False)
+                    executed.add(position)
+
+                # an output is dead once every stage up to its last reader has run
+                while freed + 1 in executed:
+                    freed += 1
+                    if keep_outputs is not None:
+                        self._free(infos, keep_outputs, last_uses, freed)
+                # the pre_process of later stages runs while those stages wait for their turn
+                self._start_pre_processes(stages, infos, index + 1, pending, executed)
+
+            infos['total_cost'] = total_cost
+            return self._finish(infos, keep_outputs)
+
+        finally:
+            for future in pending.values():
+                future.cancel()
+            if spiller is not None:
+                spiller.cleanup()
+            self._unlease_key(apikey)
+            # remove this execution code from execution codes in effect:
+            if execution_code and execution_code in self._execution_codes:
+                self._execution_codes.remove(execution_code)
+
+
+    def run_many(self, user_inputs:list, max_workers:int=8) -> list:
+        '''
+        Runs the pipeline on a batch of user inputs and returns their results in the same order.
+        Each stage is run for the whole batch before the next one, with up to max_workers
+        concurrent requests. A source notation's pre_process_many function is called once with the
+        values of the whole batch instead of calling pre_process on each of them.
+        Execution codes are not used: a batch cannot be terminated. With a key pool, each user input
+        leases its own key.
+        '''
+        if not isinstance(user_inputs, list) or not user_inputs:
+            raise ValueError("user_inputs should be a non-empty list of dictionaries.")
+        runs = [self._start(user_input, use_execution_code=False)[0] for user_input in user_inputs]
+        if len({len(stages) for stages in runs}) > 1:
+            raise ValueError("All the user inputs should resolve to the same stages.")
+
+        batch = [{'user_input': user_input} for user_input in user_inputs]
+        costs = [0.00] * len(user_inputs)
+        keep_outputs = self._keep_outputs
+        last_uses = get_last_uses(runs[0]) if keep_outputs is not None else None
+        spiller = Spiller(self._spill_threshold, self._spill_directory) if self._spill_threshold else None
+        apikeys = []
+
+        try:
+            for _ in user_inputs:
+                apikeys.append(self._lease_key())
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(user_inputs))) as executor:
+                for index, stage in enumerate(runs[0]):
+                    print(f"running {stage.service._service} on {len(user_inputs)} inputs.")
+                    payloads = self._get_payloads([stages[index] for stages in runs], batch)
+                    for payload, user_input, apikey in zip(payloads, user_inputs, apikeys):
+                        if 'user' not in payload:
+                            payload["user"] = user_input['user']
+                        payload['apikey'] = apikey or self._apikey
+
+                    # services keep the state of their last call so each request gets its own copy
+                    responses = list(executor.map(
+                        lambda item: copy.copy(item[0].service).get_response(item[1], apikey=item[2]),
+                        zip([stages[index] for stages in runs], payloads, apikeys)
+                    ))
+                    for position, response in enumerate(responses):
+                        if "error" in response:
+                            raise ValueError(response)
+                        costs[position] += response['cost']['total_cost']
+                        self._store(batch[position], runs[position][index], index, response, last_uses, spiller)
+                    print(f"Responses ready for {stage.name}")
+
+            results = []
+            for infos, cost in zip(batch, costs):
+                infos['total_cost'] = cost
+                results.append(self._finish(infos, keep_outputs))
+            return results
+
+        finally:
+            if spiller is not None:
+                spiller.cleanup()
+            for apikey in apikeys:
+                self._unlease_key(apikey)
+
+
+    def _start(self, user_input, use_execution_code:bool=True) -> tuple:
+        '''
+        Validates a run's user_input and returns its stages and execution code
+        '''
         if not isinstance(user_input, dict):
             raise ValueError("User input should be a dictionary.")
 
@@ -65,71 +241,196 @@ class Pipeline:
             stages = self._stages
 
         # termination referencing
-        execution_code = user_input.get("execution_code")
+        execution_code = user_input.get("execution_code") if use_execution_code else None
         if execution_code:
-            execution_code = self._apikey + execution_code
+            execution_code = (self._apikey or "") + execution_code # no api key with a key pool
             if execution_code in self._execution_codes:
                 raise ValueError("This execution code is still being used in an existing pipeline run.")
             else:
                 self._execution_codes.append(execution_code)
 
         self.validate_pipeline(user_input, stages)
+        return stages, execution_code
 
-        # Initialization of values
-        infos = {}
-        infos['user_input'] = user_input
-        total_cost = 0.00
 
-        # Execute per stage
-        for stage in stages:
-            stage: Node
-            # premature termination
-            if execution_code in self._termination_codes:
-                self._termination_codes.remove(execution_code)
-                self._execution_codes.remove(execution_code)
-                infos['total_cost'] = total_cost
-                infos['wargning'] = "This Soffos Pipeline has been prematurely terminated"
-                return infos
-            
-            # execute
-            print(f"running {stage.service._service}.")
-            tmp_source: dict = stage.source
-            payload = {}
-            for key, notation in tmp_source.items():
-                # prepare payload
-                if is_node_input(notation): # value is pointing to another node
-                    value = infos[notation['source']][notation['field']]
-                    if "pre_process" in notation:
-                        if callable(infos[notation['pre_process']]):
-                            payload[key] = notation['pre_process'](value)
-                        else:
-                            raise ValueError(f"{stage.name}: pre_process value should be a function.")
-                    
-                    else:
-                        payload[key] = value
-                else:
-                    payload[key] = notation
+    def _start_pre_processes(self, stages:list, infos:dict, start:int, pending:dict, executed:set=()):
+        '''
+        Starts the thread and process pre_processes of the stages from start on, except the executed
+        ones, whose values are already available
+        '''
+        for index in range(start, len(stages)):
+            if index in executed:
+                continue
+            for key, notation in stages[index].source.items():
+                if not is_node_input(notation) or not has_pre_process(notation) or (index, key) in pending:
+                    continue
+                output = infos.get(notation['source'])
+                if output is None or notation['field'] not in output or not self._is_pre_process(notation):
+                    continue
+                if get_mode(notation) != INLINE:
+                    pending[(index, key)] = pre_process(notation, load(output[notation['field']]))
 
-            if 'user' not in payload:
-                payload["user"] = user_input['user']
-            
-            payload['apikey'] = self._apikey
 
-            response = stage.service.get_response(payload)
-            if "error" in response:
-                raise ValueError(response)
-            
-            print(f"Response ready for {stage.name}")
-            infos[stage.name] = response
-            total_cost += response['cost']['total_cost']
+    def _get_payload(self, stage:Node, index:int, infos:dict, pending:dict) -> dict:
+        payload = {}
+        for key, notation in stage.source.items():
+            # prepare payload
+            future = pending.pop((index, key), None)
+            payload[key] = future.result() if future is not None else self._get_value(stage, notation, infos)
+        return payload
 
-        infos['total_cost'] = total_cost
 
-        # remove this execution code from execution codes in effect:
-        if execution_code:
-            self._execution_codes.remove(execution_code)
+    def _get_stage_payload(self, stage:Node, index:int, infos:dict, pending:dict, apikey:str=None) -> dict:
+        payload = self._get_payload(stage, index, infos, pending)
+        if 'user' not in payload:
+            payload["user"] = infos['user_input']['user']
+        
+        payload['apikey'] = apikey or self._apikey
+        return payload
+
+
+    def _lease_key(self) -> str:
+        '''
+        The key of the pool a run sends its stages with, None without a pool. It is given back
+        with _unlease_key when the run ends.
+        '''
+        if self._key_pool is None:
+            return None
+        apikey = self._key_pool.lease()
+        if apikey is None:
+            raise ValueError({"status": "Error", "error": "No api key of the pool is available."})
+        return apikey
+
 
-        return infos
+    def _unlease_key(self, apikey:str):
+        if apikey is not None:
+            self._key_pool.unlease(apikey)
+
+
+    def _get_stage_deadline(self, deadline:Deadline, stages:list, group:list, executed:set) -> Deadline:
+        '''
+        The deadline of the stages of a group: their share of the run's time left. The time left is
+        shared between the stages left in proportion to their services' timeouts.
+        '''
+        left = [position for position in range(len(stages)) if position not in executed]
+        remaining = deadline.remaining()
+        if remaining < MIN_TIMEOUT * (len(left) - len(group) + 1):
+            raise ValueError({
+                "status": "Error",
+                "error": f"The pipeline cannot finish before its deadline: {remaining:.2f}s left for {len(left)} stages."
+            })
+        weights = {position: stages[position].service.get_request_timeout() for position in left}
+        share = sum(weights[position] for position in group) / sum(weights.values())
+        return deadline.within(remaining * share)
+
+
+    def _get_batchable(self, stages:list, infos:dict, index:int, executed:set) -> list:
+        '''
+        The stages after index that can be sent in the same batch: batchable stages that did not
+        run yet and whose sources are all available
+        '''
+        group = []
+        for position in range(index + 1, len(stages)):
+            stage = stages[position]
+            if position in executed or not is_batchable(stage.service):
+                continue
+            ready = all(
+                notation['source'] in infos and notation['field'] in infos[notation['source']]
+                for notation in stage.source.values() if is_node_input(notation)
+            )
+            if ready:
+                group.append(position)
+        return group
+
+
+    def _get_payloads(self, stages:list, batch:list) -> list:
+        '''
+        The payloads of a stage for a batch of runs. stages holds the stage of each run.
+        '''
+        payloads = [{} for _ in batch]
+        for key, notation in stages[0].source.items():
+            batched = is_node_input(notation) and has_pre_process(notation) and self._is_pre_process(notation) \
+                and all(stage.source[key] == notation for stage in stages)
+            if batched:
+                values = [load(infos[notation['source']][notation['field']]) for infos in batch]
+                values = pre_process_many(notation, values)
+            else:
+                values = [self._get_value(stage, stage.source[key], infos) for stage, infos in zip(stages, batch)]
+            for payload, value in zip(payloads, values):
+                payload[key] = value
+        return payloads
+
+
+    def _get_value(self, stage:Node, notation, infos:dict):
+        '''
+        The payload value of a source notation
+        '''
+        if not is_node_input(notation):
+            return notation
+        # value is pointing to another node
+        value = load(infos[notation['source']][notation['field']])
+        if not has_pre_process(notation):
+            return value
+        if not self._is_pre_process(notation):
+            raise ValueError(f"{stage.name}: pre_process value should be a function.")
+        return pre_process(notation, value).result()
+
+
+    def _is_pre_process(self, notation:dict) -> bool:
+        return all(
+            callable(notation[field]) for field in ("pre_process", "pre_process_many") if field in notation
+        )
+
+
+    def _store(self, infos:dict, stage:Node, index:int, response:dict, last_uses:dict, spiller:Spiller, free:bool=True):
+        '''
+        Keeps the outputs of a stage's response that are returned or read by a later stage.
+        free also drops the outputs whose last reader is this stage.
+        '''
+        keep_outputs = self._keep_outputs
+        if isinstance(response, SearchResult) and (keep_outputs is not None or spiller is not None):
+            # the lazy text is built before the response is rebuilt as a plain dictionary
+            response = response.to_dict()
+        if keep_outputs is not None:
+            # outputs that are neither returned nor read by a later stage are dropped right away
+            response = {
+                field: value for field, value in response.items()
+                if keep_outputs.keeps(stage.name, field) or last_uses.get((stage.name, field), -1) > index
+            }
+        if spiller is not None:
+            response = {field: spiller.spill(value) for field, value in response.items()}
+        infos[stage.name] = response
+
+        if free and keep_outputs is not None:
+            self._free(infos, keep_outputs, last_uses, index)
+
+
+    def _free(self, infos:dict, keep_outputs:OutputFilter, last_uses:dict, index:int):
+        '''
+        Drops the outputs whose last reader is the stage at index
+        '''
+        for (source, field), last_use in last_uses.items():
+            if last_use != index or source == "user_input" or keep_outputs.keeps(source, field):
+                continue
+            output = infos.get(source)
+            if output is not None and field in output:
+                value = output.pop(field)
+                if isinstance(value, SpilledValue):
+                    value.remove()
+
+
+    def _finish(self, infos:dict, keep_outputs:OutputFilter) -> dict:
+        '''
+        Reads back the spilled outputs that are returned and drops the stages that have none
+        '''
+        result = {}
+        for name, output in infos.items():
+            if isinstance(output, dict) and name != "user_input":
+                output = {field: load(value) for field, value in output.items()}
+                if keep_outputs is not None and not output:
+                    continue
+            result[name] = output
+        return result
 
 
     def validate_pipeline(self, user_input, stages):
@@ -162,7 +463,7 @@ class Pipeline:
             for key, notation in stage.source.items():
                 required_datatype = self.get_serviceio_datatype(stage.service._serviceio.input_structure[key])
                 if is_node_input(notation):
-                    if "pre_process" in notation:
+                    if has_pre_process(notation):
                         continue # will not check for type if there is a helper function
                     
                     if notation['source'] == "user_input":
@@ -256,7 +557,7 @@ class Pipeline:
     
     def terminate(self, termination_code):
         if termination_code:
-            self._termination_codes.append(self._apikey + termination_code)
+            self._termination_codes.append((self._apikey or "") + termination_code)
             return {"message": f"Request to terminate job {termination_code} received."}
 
         return {"message": f"Request to terminate job is not valid (execution code missing)."}
@@ -267,5 +568,5 @@ class Pipeline:
             return key
         return type(key)
     
-    def __call__(self, user_input):
-        return self.run(user_input)
\ No newline at end of file
+    def __call__(self, user_input, deadline=None, priority:str=None):
+        return self.run(user_input, deadline, priority)
\ No newline at end of file
@@ -0,0 +1,127 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Run the pre_process functions of pipeline source notations off the pipeline's thread
+-----------------------------------------------------
+'''
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+MODES = (INLINE, THREAD, PROCESS)
+
+# the sizes of the shared pools. None lets the process pool use one worker per CPU.
+THREAD_WORKERS = 8
+PROCESS_WORKERS = None
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def io_bound(function):
+    '''
+    Marks a pre_process function to run in the shared thread pool
+    '''
+    function.pre_process_mode = THREAD
+    return function
+
+
+def cpu_bound(function):
+    '''
+    Marks a pre_process function to run in the shared process pool.
+    The function, its argument and its result should be picklable: a module-level function
+    rather than a lambda or a closure.
+    '''
+    function.pre_process_mode = PROCESS
+    return function
+
+
+def has_pre_process(notation:dict) -> bool:
+    return "pre_process" in notation or "pre_process_many" in notation
+
+
+def get_mode(notation:dict) -> str:
+    '''
+    Where the pre_process of a source notation runs: its "pre_process_mode" key,
+    else the mode its function was marked with, else inline.
+    '''
+    function = notation.get("pre_process", notation.get("pre_process_many"))
+    mode = notation.get("pre_process_mode") or getattr(function, "pre_process_mode", INLINE)
+    if mode not in MODES:
+        raise ValueError(f"pre_process_mode should be one of {MODES}. {mode} is provided.")
+    return mode
+
+
+def get_executor(mode:str):
+    with _lock:
+        if mode not in _executors:
+            if mode == THREAD:
+                _executors[mode] = ThreadPoolExecutor(max_workers=THREAD_WORKERS)
+            else:
+                _executors[mode] = ProcessPoolExecutor(max_workers=PROCESS_WORKERS)
+        return _executors[mode]
+
+
+def shutdown():
+    '''
+    Waits for and closes the shared pools. The next pre_process opens new ones.
+    '''
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+
+
+def submit(function, value, mode:str) -> Future:
+    '''
+    Starts function(value) in the pool of the mode. Inline functions are run right away.
+    '''
+    if mode != INLINE:
+        return get_executor(mode).submit(function, value)
+    future = Future()
+    try:
+        future.set_result(function(value))
+    except Exception as error:
+        future.set_exception(error)
+    return future
+
+
+def pre_process(notation:dict, value) -> Future:
+    '''
+    Starts pre-processing a value with the notation's pre_process function
+    (or its pre_process_many function on a batch of one)
+    '''
+    mode = get_mode(notation)
+    if "pre_process" in notation:
+        return submit(notation["pre_process"], value, mode)
+    future = Future()
+    batch = submit(notation["pre_process_many"], [value], mode)
+    batch.add_done_callback(lambda done: _first(done, future))
+    return future
+
+
+def pre_process_many(notation:dict, values:list) -> list:
+    '''
+    Pre-processes the values of a batch with the notation's pre_process_many function, called
+    once with the list of values, or else with its pre_process function on each value
+    '''
+    mode = get_mode(notation)
+    if "pre_process_many" in notation:
+        results = list(submit(notation["pre_process_many"], values, mode).result())
+        if len(results) != len(values):
+            raise ValueError(f"pre_process_many returned {len(results)} values for {len(values)} inputs.")
+        return results
+
+    futures = [submit(notation["pre_process"], value, mode) for value in values]
+    return [future.result() for future in futures]
+
+
+def _first(batch:Future, future:Future):
+    try:
+        future.set_result(batch.result()[0])
+    except Exception as error:
+        future.set_exception(error)
@@ -0,0 +1,3 @@
+from .base import Prescreen
+from .profanity import ProfanityScreen
+from .language import LanguageScreen
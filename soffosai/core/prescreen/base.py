@@ -0,0 +1,111 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Answer high-confidence service calls locally
+-----------------------------------------------------
+'''
+import abc
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Prescreen(abc.ABC):
+    '''
+    Base of the local fast paths of a service. screen() answers a text locally with a confidence
+    between 0 and 1. Texts up to max_chars answered with a confidence of at least threshold are
+    not sent to the API. A shadow_rate fraction of the local answers is also sent to the API in
+    the background to measure how often the local answer agrees with it (see metrics).
+    '''
+    def __init__(self, threshold:float=0.9, max_chars:int=2000, shadow_rate:float=0.0) -> None:
+        if not 0 <= threshold <= 1 or not 0 <= shadow_rate <= 1:
+            raise ValueError("threshold and shadow_rate should be between 0 and 1.")
+        self.threshold = threshold
+        self.max_chars = max_chars
+        self.shadow_rate = shadow_rate
+        self._lock = threading.Lock()
+        self._executor = None
+        self.local = 0
+        self.remote = 0
+        self.shadow_calls = 0
+        self.shadow_agreements = 0
+
+
+    @property
+    def metrics(self) -> dict:
+        calls = self.local + self.remote
+        return {
+            "local": self.local,
+            "remote": self.remote,
+            "hit_rate": self.local / calls if calls else 0.0,
+            "shadow_calls": self.shadow_calls,
+            "agreement_rate": self.shadow_agreements / self.shadow_calls if self.shadow_calls else None
+        }
+
+
+    @abc.abstractmethod
+    def screen(self, text:str) -> tuple:
+        '''
+        The local response for the text and its confidence
+        '''
+
+
+    @abc.abstractmethod
+    def agrees(self, local:dict, remote:dict) -> bool:
+        '''
+        Whether a local response gives the same answer as the API's
+        '''
+
+
+    def get_response(self, service, payload:dict, get_response, **kwargs) -> dict:
+        '''
+        The local response of the service's payload when it is confident enough, otherwise the API's
+        '''
+        service._payload = payload
+        allow_input, message = service.validate_payload()
+        if not allow_input:
+            raise ValueError(message)
+
+        text = payload.get("text") or ""
+        response, confidence = (None, 0.0) if len(text) > self.max_chars else self.screen(text)
+        if response is None or confidence < self.threshold:
+            with self._lock:
+                self.remote += 1
+            return get_response(payload, **kwargs)
+
+        with self._lock:
+            self.local += 1
+            shadow = self.shadow_rate and random.random() < self.shadow_rate
+            if shadow and self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+        if shadow:
+            # services keep the state of their last call so the shadow call gets its own instance
+            shadow_service = type(service)(apikey=service._apikey)
+            self._executor.submit(self._shadow, shadow_service, dict(payload), response)
+
+        response = dict(response)
+        response["cost"] = {"total_cost": 0.0}
+        response["charged_character_count"] = 0
+        response["prescreened"] = True
+        response["confidence"] = confidence
+        return response
+
+
+    def close(self):
+        '''
+        Waits for the pending shadow calls
+        '''
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+    def _shadow(self, service, payload:dict, local:dict):
+        remote = service.get_response(payload)
+        if "error" in remote:
+            return
+        agrees = self.agrees(local, remote)
+        with self._lock:
+            self.shadow_calls += 1
+            if agrees:
+                self.shadow_agreements += 1
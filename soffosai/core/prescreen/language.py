@@ -0,0 +1,158 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Local language identification of clear-cut texts
+-----------------------------------------------------
+'''
+import re
+import unicodedata
+from .base import Prescreen
+
+
+# the most frequent words of each language. A word may belong to several languages.
+FUNCTION_WORDS = {
+    "en": "the of and to in is that it for was on are as with his they at be this from have or by "
+          "one had not but what all were when we there can an your which their said if do will each "
+          "about how up out them then she many some so these would other into has more her two like "
+          "him see time could no make than first been its who now people my made over did down only "
+          "way find use may long very after just where most know get through back much before "
+          "go good new write our used me man too any day same right look think also around another "
+          "came come work three must because does part even place well such here take why things help "
+          "put years different away again off went old number great tell men say small every found "
+          "still between name should home big give air line set own under read last never us left end "
+          "along while might next sound below saw something thought both few those always looked show "
+          "large often together asked house don't world going want school important until form food "
+          "keep children feet land side without boy once animals life enough took sometimes four head "
+          "above kind began almost live page got earth need far hand high year mother light parts country "
+          "father let night following picture being study second eyes soon times story boys since white "
+          "days ever paper hard near sentence better best across during today others however sure means "
+          "knew it's try told young miles sun ways thing whole hear example heard several change answer "
+          "room sea against top turned learn point city play toward five using himself usually i you he "
+          "am a",
+    "es": "de la que el en y a los se del las un por con no una su para es al lo como más o pero sus le "
+          "ha me si sin sobre este ya entre cuando todo esta ser son dos también fue había era muy años "
+          "hasta desde está mi porque qué sólo han yo hay vez puede todos así nos ni parte tiene él uno "
+          "donde bien tiempo mismo ese ahora cada e vida otro después te otros aunque esa eso hace otra "
+          "gobierno tan durante siempre día tanto ella tres sí dijo sido gran país según menos",
+    "fr": "de la le et les des en un du une que est pour qui dans a par plus pas au sur ne se ce il sont "
+          "avec ou son aux mais elle nous comme ont y été cette sa ses leur je on être fait tout lui "
+          "bien aussi même était peut deux sans dont entre très ces où tous vous ils avait après encore "
+          "sous avant moins depuis autres alors leurs fait donc c'est n'est qu'il d'un d'une l'on",
+    "de": "der die und in den von zu das mit sich des auf für ist im dem nicht ein die eine als auch es "
+          "an werden aus er hat dass sie nach wird bei einer um am sind noch wie einem über einen so "
+          "zum war haben nur oder aber vor zur bis mehr durch man sein wurde sei ich ihr wir kann "
+          "gegen vom schon wenn habe seine ihre dann unter wir soll ich eines jahr zwei diese dieser "
+          "wieder keine seiner jetzt sehr",
+    "it": "di e il la che in a per un è del non i le si con da una sono al lo della ha come ma gli "
+          "anche dei più nel alla se ci suo io questo essere tutto loro ne dal o sua mi cosa hanno "
+          "era fa molto quando così ancora nella stato tra perché quello due solo sempre dopo ogni "
+          "già senza delle nella degli questa noi lui lei voi",
+    "pt": "de a o que e do da em um para é com não uma os no se na por mais as dos como mas foi ao ele "
+          "das tem à seu sua ou ser quando muito há nos já está eu também só pelo pela até isso ela "
+          "entre era depois sem mesmo aos ter seus quem nas me esse eles estão você tinha foram essa "
+          "num nem suas meu às minha têm numa pelos elas havia seja qual será nós tenho lhe deles",
+    "nl": "de het een van en in is dat op te zijn voor met die niet aan er om ook als bij of maar door "
+          "over ze uit dan naar nog wel kan geen hij wat zo was al worden meer had heeft wordt ik je "
+          "ons tot worden hun deze zou werd waren dit mijn toen zich wij nu moet veel",
+}
+
+# scripts that are written by one language only, or nearly so
+_SCRIPT_LANGUAGES = {
+    "HANGUL": "ko",
+    "HIRAGANA": "ja",
+    "KATAKANA": "ja",
+    "GREEK": "el",
+    "HEBREW": "he",
+    "THAI": "th",
+    "CJK": "zh",
+}
+_WORD = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+
+
+def _script(char:str):
+    try:
+        name = unicodedata.name(char)
+    except ValueError:
+        return None
+    return name.split(" ")[0]
+
+
+class LanguageScreen(Prescreen):
+    '''
+    Local fast path of the LanguageDetectionService for clear-cut texts:
+    - a text whose letters are mostly in a script used by a single language (Hangul, Greek,
+    Hebrew, Thai, Chinese, Japanese kana) is in that language.
+    - for texts in the Latin script, each language gets the share of the text's words that are
+    among its most frequent words. A text of at least min_words words is in the best language
+    when that share is at least min_coverage. The confidence is how much the best language leads
+    the second one.
+    Other texts are sent to the API. labels maps the language codes ("en", "es", "fr", "de", "it",
+    "pt", "nl", "ko", "ja", "el", "he", "th", "zh") to the values returned as language.
+    ```
+    service = LanguageDetectionService(prescreen=LanguageScreen(threshold=0.8, shadow_rate=0.01))
+    ```
+    '''
+    def __init__(self, threshold:float=0.8, max_chars:int=2000, shadow_rate:float=0.0, min_words:int=4,
+        min_coverage:float=0.25, labels:dict=None) -> None:
+        super().__init__(threshold=threshold, max_chars=max_chars, shadow_rate=shadow_rate)
+        self.min_words = min_words
+        self.min_coverage = min_coverage
+        self.labels = labels or {}
+        self._words = {language: set(words.split()) for language, words in FUNCTION_WORDS.items()}
+        self._weights = {}
+        for vocabulary in self._words.values():
+            for word in vocabulary:
+                self._weights[word] = self._weights.get(word, 0) + 1
+        self._weights = {word: 1 / count for word, count in self._weights.items()}
+
+
+    def screen(self, text:str) -> tuple:
+        language, confidence = self._by_script(text)
+        if language is None:
+            language, confidence = self._by_words(text)
+        if language is None:
+            return None, 0.0
+        return {"language": self.labels.get(language, language)}, confidence
+
+
+    def agrees(self, local:dict, remote:dict) -> bool:
+        return str(local.get("language")).lower() == str(remote.get("language")).lower()
+
+
+    def _by_script(self, text:str) -> tuple:
+        counts = {}
+        letters = 0
+        for char in text:
+            if not char.isalpha():
+                continue
+            letters += 1
+            script = _script(char)
+            counts[script] = counts.get(script, 0) + 1
+        if not letters:
+            return None, 0.0
+
+        kana = counts.get("HIRAGANA", 0) + counts.get("KATAKANA", 0)
+        if kana:
+            # Japanese mixes kana with Chinese characters
+            counts["HIRAGANA"] = kana + counts.pop("CJK", 0)
+            counts.pop("KATAKANA", None)
+        script, count = max(counts.items(), key=lambda item: item[1])
+        if script not in _SCRIPT_LANGUAGES:
+            return None, 0.0
+        return _SCRIPT_LANGUAGES[script], count / letters
+
+
+    def _by_words(self, text:str) -> tuple:
+        words = _WORD.findall(text.lower().replace("’", "'"))
+        if len(words) < self.min_words:
+            return None, 0.0
+        scores = []
+        for language, vocabulary in self._words.items():
+            known = [word for word in words if word in vocabulary]
+            # words shared by several languages count less
+            scores.append((sum(self._weights[word] for word in known), len(known), language))
+        scores.sort(reverse=True)
+        (best, known, language), (second, _, _) = scores[0], scores[1]
+        if not best or known / len(words) < self.min_coverage:
+            return None, 0.0
+        return language, (best - second) / best
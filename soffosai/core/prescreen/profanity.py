@@ -0,0 +1,188 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Local word-list profanity screening
+-----------------------------------------------------
+'''
+import re
+from collections import deque
+from .base import Prescreen
+from .language import FUNCTION_WORDS, _WORD
+
+
+# common English profanities. Words are matched at the start of a word so inflections match too.
+DEFAULT_WORDS = [
+    "arse", "asshole", "bastard", "bitch", "bollocks", "bullshit", "cock", "crap", "cunt", "dick",
+    "dickhead", "douche", "fag", "fuck", "goddamn", "jackass", "motherfucker", "piss", "prick",
+    "pussy", "shit", "slut", "twat", "wanker", "whore",
+]
+
+# insults and threats that are not profanities. A text with one of them is left to the API.
+HOSTILE_WORDS = [
+    "idiot", "stupid", "moron", "dumb", "retard", "worthless", "pathetic", "loser", "ugly", "fat",
+    "kill", "die", "dead", "murder", "hurt", "hate", "shut", "trash", "scum", "disgusting", "freak",
+    "creep", "imbecile", "fool", "ignorant", "useless", "kys", "rape", "suck", "damn", "hell", "screw",
+]
+
+# everyday words that are clean in any context, together with the most frequent English words.
+# A text is only answered clean locally when nearly all its words are known clean words.
+CLEAN_WORDS = FUNCTION_WORDS["en"].split() + """
+    hello hi hey thanks thank please yes ok okay sorry welcome morning afternoon evening weekend
+    week month today tomorrow yesterday meeting team project report email call send sent reply
+    question questions information service customer order product price delivery support account
+    data document file page text summary review update version plan time date schedule available
+    nice happy glad great good fine love like enjoy wonderful beautiful lovely interesting helpful
+    weather sunny rain water coffee tea lunch dinner breakfast family friend friends children
+    book books music movie game games team office business company market money cost payment
+    car bus train trip travel hotel room city town street park garden
+    open close start finish check please let know send share discuss agree idea ideas
+    """.split()
+
+# letters hidden behind symbols or digits ("f*ck", "sh1t") are left to the API
+_OBFUSCATED = re.compile(r"[a-z][*@#$%!1340_.][a-z*@#$%]", re.IGNORECASE)
+
+
+class _Automaton:
+    '''
+    Aho-Corasick automaton that finds all the occurrences of a set of words in one pass
+    '''
+    def __init__(self, words:list) -> None:
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for word in words:
+            state = 0
+            for char in word:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append(word)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+
+    def find(self, text:str):
+        '''
+        Yields (start, end, word) for every occurrence of a word in the text
+        '''
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for word in self._output[state]:
+                yield index + 1 - len(word), index + 1, word
+
+
+class ProfanityScreen(Prescreen):
+    '''
+    Local fast path of the ProfanityService:
+    - a text in which one of the words is found as a whole word, or followed by a common
+    inflection, is offensive with a confidence of offensive_confidence.
+    - a text without any of the words, without obfuscated words and without insults or threats
+    (HOSTILE_WORDS) is clean with a confidence of clean_confidence times the share of its words
+    that are known clean words (vocabulary, CLEAN_WORDS by default). Harmless words still make up
+    abuse ("go back to your country"), so the default clean_confidence is below the default
+    threshold and only offensive texts are answered locally. Raise clean_confidence above the
+    threshold to also answer texts made of everyday words locally.
+    - words found inside other words ("Scunthorpe") and obfuscated words are uncertain and sent
+    to the API.
+    ```
+    service = ProfanityService(prescreen=ProfanityScreen(threshold=0.9, shadow_rate=0.01))
+    ```
+    '''
+    inflections = ("", "s", "es", "ed", "er", "ers", "ing", "in", "y", "head", "heads")
+
+    def __init__(self, words:list=None, threshold:float=0.9, max_chars:int=2000, shadow_rate:float=0.0,
+        clean_confidence:float=0.85, offensive_confidence:float=0.95, vocabulary:list=None,
+        hostile_words:list=None) -> None:
+        super().__init__(threshold=threshold, max_chars=max_chars, shadow_rate=shadow_rate)
+        self.clean_confidence = clean_confidence
+        self.offensive_confidence = offensive_confidence
+        self._automaton = _Automaton([word.lower() for word in (words or DEFAULT_WORDS)])
+        self._vocabulary = {word.lower() for word in (vocabulary or CLEAN_WORDS)}
+        self._hostile_words = {word.lower() for word in (hostile_words or HOSTILE_WORDS)}
+
+
+    def screen(self, text:str) -> tuple:
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            return None, 0.0 # the spans would not match the text
+        profanities = []
+        uncertain = False
+        for start, end, word in self._automaton.find(lowered):
+            if start > 0 and lowered[start - 1].isalnum():
+                uncertain = True # inside another word
+                continue
+            word_end = end
+            while word_end < len(lowered) and lowered[word_end].isalnum():
+                word_end += 1
+            if lowered[end:word_end] not in self.inflections:
+                uncertain = True
+                continue
+            if profanities and profanities[-1]["span_start"] == start:
+                profanities[-1] = {"text": text[start:word_end], "span_start": start, "span_end": word_end}
+            else:
+                profanities.append({"text": text[start:word_end], "span_start": start, "span_end": word_end})
+
+        if profanities:
+            return {
+                "profanities": profanities,
+                "offensive_probability": self.offensive_confidence,
+                "offensive_prediction": True
+            }, self.offensive_confidence
+        if uncertain or _OBFUSCATED.search(text):
+            return None, 0.0
+        confidence = self._clean_confidence(lowered)
+        if confidence is None:
+            return None, 0.0
+        return {
+            "profanities": [],
+            "offensive_probability": round(1 - confidence, 6),
+            "offensive_prediction": False
+        }, confidence
+
+
+    def agrees(self, local:dict, remote:dict) -> bool:
+        return bool(local.get("offensive_prediction")) == bool(remote.get("offensive_prediction"))
+
+
+    def _clean_confidence(self, lowered:str) -> float:
+        '''
+        The confidence that a text without profanities is clean: clean_confidence times the share
+        of known clean words. None when it has an insult or a threat.
+        '''
+        words = _WORD.findall(lowered)
+        if not words:
+            return self.clean_confidence
+        known = 0
+        for word in words:
+            if self._is_in(word, self._hostile_words):
+                return None
+            if self._is_in(word, self._vocabulary):
+                known += 1
+        return self.clean_confidence * known / len(words)
+
+
+    def _is_in(self, word:str, words:set) -> bool:
+        '''
+        Whether the word, or the word without a common inflection, is one of words
+        '''
+        if word in words:
+            return True
+        for suffix in ("'s", "s", "es", "ed", "d", "ing", "ly"):
+            if word.endswith(suffix) and word[:-len(suffix)] in words:
+                return True
+        return False
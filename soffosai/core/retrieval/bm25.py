@@ -0,0 +1,110 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: In-memory BM25 inverted index
+-----------------------------------------------------
+'''
+import re
+import math
+import heapq
+import threading
+from collections import Counter
+
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text:str) -> list:
+    '''
+    The lowercase words of a text
+    '''
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    '''
+    Ranks texts by their BM25 relevance to a query using an inverted index, so a search only
+    visits the texts that contain one of the query's terms.
+    Texts are added and removed under a key such as a document_id.
+    '''
+    def __init__(self, k1:float=1.5, b:float=0.75) -> None:
+        if k1 < 0 or not 0 <= b <= 1:
+            raise ValueError("k1 should not be negative and b should be between 0 and 1.")
+        self.k1 = k1
+        self.b = b
+        self._postings = {} # term -> {key: term frequency}
+        self._lengths = {} # key -> number of terms
+        self._texts = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+
+    def __contains__(self, key) -> bool:
+        return key in self._lengths
+
+
+    def get_text(self, key) -> str:
+        return self._texts.get(key)
+
+
+    def add(self, key, text:str):
+        '''
+        Indexes the text under key. Replaces the text that was indexed under the same key.
+        '''
+        terms = tokenize(text)
+        with self._lock:
+            self._remove(key)
+            for term, count in Counter(terms).items():
+                self._postings.setdefault(term, {})[key] = count
+            self._lengths[key] = len(terms)
+            self._texts[key] = text
+            self._total_length += len(terms)
+
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+
+    def search(self, query:str, top_n:int=None, keys=None) -> list:
+        '''
+        The (key, score) of the texts that contain at least one term of the query, best first.
+        keys restricts the search to a collection of keys.
+        '''
+        with self._lock:
+            if not self._lengths:
+                return []
+            count = len(self._lengths)
+            average_length = self._total_length / count or 1
+            scores = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, frequency in postings.items():
+                    if keys is not None and key not in keys:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / average_length)
+                    scores[key] = scores.get(key, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        if top_n is None:
+            return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(top_n, scores.items(), key=lambda item: item[1])
+
+
+    def _remove(self, key):
+        if key not in self._lengths:
+            return
+        for term in set(tokenize(self._texts[key])):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(key)
+        del self._texts[key]
@@ -0,0 +1,164 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Narrow the context of Question Answering locally before calling Soffos
+-----------------------------------------------------
+'''
+import threading
+from soffosai.core.chunking import TextChunker
+from .bm25 import BM25Index
+
+
+class QuestionAnsweringPrefilter:
+    '''
+    Reduces the content that the Question Answering service has to read to the passages that
+    are relevant to the question:
+    - the texts of the documents are split into passages of about passage_chars characters and
+    indexed locally with BM25 (see add_document).
+    - a call with document_ids whose texts are all known locally is sent with the best passages
+    of those documents packed into a document_text of at most max_chars characters.
+    With pack=False, or when some of the documents are not known locally, the document_ids are
+    narrowed to the max_documents most relevant known documents and the unknown ones.
+    - a call with a document_text longer than max_chars is sent with its best passages only.
+    Payloads that no passage matches are sent unchanged.
+    ```
+    prefilter = QuestionAnsweringPrefilter(max_chars=4000)
+    prefilter.add_document(document_id, text)
+    QuestionAnsweringService(prefilter=prefilter)(user="client_id", question="Who is Neo?", document_ids=[...])
+    ```
+    '''
+    separator = "\n\n"
+
+    def __init__(self, max_chars:int=4000, max_documents:int=5, passage_chars:int=600, pack:bool=True) -> None:
+        if max_chars <= 0 or max_documents <= 0:
+            raise ValueError("max_chars and max_documents should be positive integers.")
+        self.max_chars = max_chars
+        self.max_documents = max_documents
+        self.pack = pack
+        self._chunker = TextChunker(max_chars=passage_chars, overlap=0)
+        self._index = BM25Index()
+        self._passages = {} # document_id -> keys of its passages in the index
+        self._lock = threading.Lock()
+
+
+    def __contains__(self, document_id:str) -> bool:
+        return document_id in self._passages
+
+
+    def add_document(self, document_id:str, text:str):
+        '''
+        Makes the text of an ingested document known locally
+        '''
+        with self._lock:
+            self._remove_document(document_id)
+            keys = []
+            for position, chunk in enumerate(self._chunker.split(text)):
+                key = (document_id, position)
+                self._index.add(key, chunk.text)
+                keys.append(key)
+            self._passages[document_id] = keys
+
+
+    def remove_document(self, document_id:str):
+        with self._lock:
+            self._remove_document(document_id)
+
+
+    def select_documents(self, question:str, document_ids:list=None) -> list:
+        '''
+        The known documents that match the question, most relevant first.
+        document_ids restricts the selection to these documents.
+        '''
+        keys = self._get_keys(document_ids)
+        ranked = {}
+        for (document_id, _), _ in self._index.search(question, keys=keys):
+            ranked.setdefault(document_id, None)
+        return list(ranked)
+
+
+    def pack_documents(self, question:str, document_ids:list=None):
+        '''
+        The best passages of the known documents that fit in max_chars, in document order.
+        None if no passage matches the question.
+        '''
+        keys = self._get_keys(document_ids)
+        order = {document_id: position for position, document_id in enumerate(document_ids or [])}
+        return self._pack(
+            self._index, self._index.search(question, keys=keys),
+            sort_key = lambda key: (order.get(key[0], len(order)), str(key[0]), key[1])
+        )
+
+
+    def pack_text(self, question:str, text:str):
+        '''
+        The best passages of a text that fit in max_chars, in their original order.
+        None if no passage matches the question.
+        '''
+        index = BM25Index()
+        for position, chunk in enumerate(self._chunker.split(text)):
+            index.add(position, chunk.text)
+        return self._pack(index, index.search(question), sort_key=None)
+
+
+    def apply(self, payload:dict) -> dict:
+        '''
+        The Question Answering payload with its context narrowed to the question
+        '''
+        question = payload.get("question") or payload.get("message")
+        if not question:
+            return payload
+
+        if payload.get("document_ids"):
+            document_ids = payload["document_ids"]
+            known = [document_id for document_id in document_ids if document_id in self]
+            if self.pack and len(known) == len(document_ids):
+                document_text = self.pack_documents(question, document_ids)
+                if document_text is not None:
+                    payload = dict(payload)
+                    payload.pop("document_ids")
+                    payload["document_text"] = document_text
+                return payload
+
+            selected = self.select_documents(question, known)[:self.max_documents]
+            if not selected:
+                return payload
+            unknown = [document_id for document_id in document_ids if document_id not in self]
+            payload = dict(payload)
+            payload["document_ids"] = selected + unknown
+            return payload
+
+        document_text = payload.get("document_text")
+        if document_text and len(document_text) > self.max_chars:
+            packed = self.pack_text(question, document_text)
+            if packed is not None:
+                payload = dict(payload)
+                payload["document_text"] = packed
+        return payload
+
+
+    def _get_keys(self, document_ids:list):
+        if document_ids is None:
+            return None
+        return {key for document_id in document_ids for key in self._passages.get(document_id, [])}
+
+
+    def _pack(self, index:BM25Index, ranked:list, sort_key):
+        if not ranked:
+            return None
+        chosen = []
+        size = 0
+        for key, _ in ranked:
+            text = index.get_text(key)
+            added = len(text) + (len(self.separator) if chosen else 0)
+            if size + added > self.max_chars:
+                continue # a shorter passage further down may still fit
+            chosen.append(key)
+            size += added
+        if not chosen:
+            return None
+        return self.separator.join(index.get_text(key) for key in sorted(chosen, key=sort_key))
+
+
+    def _remove_document(self, document_id:str):
+        for key in self._passages.pop(document_id, []):
+            self._index.remove(key)
@@ -4,28 +4,44 @@ Created at: 2023-04-17
 Purpose: Soffos Services Objects
 -----------------------------------------------------
 '''
+from soffosai.utils.lazy_import import lazy_attributes
 
-from .service import SoffosAIService, inspect_arguments
-from .ambiguity_detection import AmbiguityDetectionService
-from .answer_scoring import AnswerScoringService
-from .contradiction_detection import ContradictionDetectionService
-from .documents import DocumentsIngestService, DocumentsSearchService, DocumentsDeleteService, DocumentsService
-from .email_analysis import EmailAnalysisService
-from .emotion_detection import EmotionDetectionService
-from .file_converter import FileConverterService
-from .language_detection import LanguageDetectionService
-from .lets_discuss import LetsDiscussService, LetsDiscussCreateService, LetsDiscussRetrieveService, LetsDiscussDeleteService
-from .logical_error_detection import LogicalErrorDetectionService
-from .microlesson import MicrolessonService
-from .NER import NamedEntityRecognitionService
-from .paraphrase import ParaphraseService
-from .profanity import ProfanityService
-from .qna_generation import QuestionAndAnswerGenerationService
-from .question_answering import QuestionAnsweringService
-from .review_tagger import ReviewTaggerService
-from .sentiment_analysis import SentimentAnalysisService
-from .simplify import SimplifyService
-from .summarization import SummarizationService
-from .table_generator import TableGeneratorService
-from .tag_generation import TagGenerationService
-from .transcript_correction import TranscriptCorrectionService
+# each service module is only imported when its service is first accessed
+_LAZY_ATTRIBUTES = {
+    "SoffosAIService": ".service",
+    "inspect_arguments": ".service",
+    "AmbiguityDetectionService": ".ambiguity_detection",
+    "AnswerScoringService": ".answer_scoring",
+    "BatchService": ".batch_service",
+    "ContradictionDetectionService": ".contradiction_detection",
+    "DocumentsIngestService": ".documents",
+    "DocumentsSearchService": ".documents",
+    "DocumentsDeleteService": ".documents",
+    "DocumentsService": ".documents",
+    "EmailAnalysisService": ".email_analysis",
+    "EmotionDetectionService": ".emotion_detection",
+    "FileConverterService": ".file_converter",
+    "LanguageDetectionService": ".language_detection",
+    "LetsDiscussService": ".lets_discuss",
+    "LetsDiscussCreateService": ".lets_discuss",
+    "LetsDiscussRetrieveService": ".lets_discuss",
+    "LetsDiscussDeleteService": ".lets_discuss",
+    "LogicalErrorDetectionService": ".logical_error_detection",
+    "MicrolessonService": ".microlesson",
+    "NamedEntityRecognitionService": ".NER",
+    "ParaphraseService": ".paraphrase",
+    "ProfanityService": ".profanity",
+    "QuestionAndAnswerGenerationService": ".qna_generation",
+    "QuestionAnsweringService": ".question_answering",
+    "ReviewTaggerService": ".review_tagger",
+    "SentimentAnalysisService": ".sentiment_analysis",
+    "SimplifyService": ".simplify",
+    "SummarizationService": ".summarization",
+    "TableGeneratorService": ".table_generator",
+    "TagGenerationService": ".tag_generation",
+    "TranscriptCorrectionService": ".transcript_correction",
+}
+
+__getattr__, __dir__ = lazy_attributes(__name__, globals(), _LAZY_ATTRIBUTES)
+
+__all__ = list(_LAZY_ATTRIBUTES)
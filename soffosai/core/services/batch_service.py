@@ -0,0 +1,95 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Send several service requests in one round trip
+-----------------------------------------------------
+'''
+import copy
+import json
+from .service import SoffosAIService, inspect_arguments
+from soffosai.common.constants import ServiceString, FORM_DATA_REQUIRED
+
+
+# cheap text analysis services whose requests are worth grouping
+BATCHABLE_SERVICES = [
+    ServiceString.AMBIGUITY_DETECTION,
+    ServiceString.CONTRADICTION_DETECTION,
+    ServiceString.EMOTION_DETECTION,
+    ServiceString.LANGUAGE_DETECTION,
+    ServiceString.LOGICAL_ERROR_DETECTION,
+    ServiceString.NER,
+    ServiceString.PROFANITY,
+    ServiceString.REVIEW_TAGGER,
+    ServiceString.SENTIMENT_ANALYSIS,
+    ServiceString.TAG_GENERATION,
+]
+
+
+def is_batchable(service) -> bool:
+    '''
+    Whether the calls of a service instance can be sent through the BatchService: a JSON service of
+    BATCHABLE_SERVICES that sends its payload as it is. A prescreen or an overridden get_response
+    would be bypassed.
+    '''
+    if not isinstance(service, SoffosAIService) or service._service not in BATCHABLE_SERVICES \
+        or service._service in FORM_DATA_REQUIRED:
+        return False
+    if hasattr(service, "_prescreen"):
+        return service._prescreen is None
+    return type(service).get_response is SoffosAIService.get_response
+
+
+class BatchService(SoffosAIService):
+    '''
+    Sends several service requests in one round trip.
+    Each request is {"service": <ServiceString>, "payload": <the payload of that service>} and the
+    "responses" of the response are the responses of the requests, in order.
+    get_responses() sends the calls of service instances and splits the response.
+    '''
+
+    def __init__(self, **kwargs) -> None:
+        service = ServiceString.BATCH_SERVICE
+        super().__init__(service, **kwargs)
+
+
+    def __call__(self, user:str, requests:list) -> dict:
+        self._args_dict = inspect_arguments(self.__call__, user, requests)
+        return super().__call__()
+
+
+    def get_responses(self, user:str, calls:list, **kwargs) -> list:
+        '''
+        Sends (service, payload) calls in one request and returns the response of each call.
+        A call without its own cost gets a share of the batch's cost proportional to the size of its payload.
+        When the batch fails, every call gets the error response.
+        '''
+        requests = []
+        for service, payload in calls:
+            # services keep the state of their last call so the payload is checked on a copy
+            checked = copy.copy(service)
+            checked._payload = payload
+            allow_input, message = checked.validate_payload()
+            if not allow_input:
+                raise ValueError(message)
+            requests.append({
+                "service": service._service,
+                "payload": {key: value for key, value in payload.items() if key != "apikey"}
+            })
+
+        response = self.get_response({"user": user, "requests": requests}, **kwargs)
+        if "error" in response:
+            return [response for _ in calls]
+        responses = response.get("responses") or []
+        if len(responses) != len(calls):
+            error = {"status": "Error", "error": f"batch-service returned {len(responses)} responses for {len(calls)} requests."}
+            return [error for _ in calls]
+
+        sizes = [len(json.dumps(request["payload"], default=str)) for request in requests]
+        total_cost = (response.get("cost") or {}).get("total_cost", 0.0)
+        split = []
+        for size, call_response in zip(sizes, responses):
+            call_response = dict(call_response)
+            if "cost" not in call_response and "error" not in call_response:
+                call_response["cost"] = {"total_cost": total_cost * size / sum(sizes)}
+            split.append(call_response)
+        return split
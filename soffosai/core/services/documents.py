@@ -4,73 +4,298 @@ Created at: 2023-06-26
 Purpose: Easily use Documents Ingest, Search, and Delete Service
 -----------------------------------------------------
 '''
+import heapq
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import soffosai
 from .service import SoffosAIService, inspect_arguments
 from soffosai.common.constants import ServiceString
 from soffosai.common.service_io_map import SERVICE_IO_MAP
 from soffosai.common.serviceio_fields import ServiceIO
+from soffosai.client.search_result import SearchResult
+
+
+def _rename_document_name(data:dict) -> dict:
+    # the sdk validates document_name but the api receives it as name
+    if "document_name" in data:
+        data["name"] = data.pop("document_name")
+    return data
+
+
+def _validate(service:SoffosAIService, payload:dict):
+    service._payload = payload
+    allow_input, message = service.validate_payload()
+    if not allow_input:
+        raise ValueError(message)
+
+
+def _ingest(service:SoffosAIService, payload:dict, get_response, **kwargs) -> dict:
+    '''
+    Ingests the payload unless the catalog knows a document with the same content, name and meta.
+    Keeps the catalog and the search cache in sync.
+    '''
+    catalog = service._catalog
+    search_cache = service._search_cache
+    if catalog is None and search_cache is None:
+        return get_response(payload, **kwargs)
+
+    _validate(service, payload)
+    apikey = payload.get("apikey", service._apikey)
+    name = payload.get("document_name")
+    if catalog is not None:
+        content_hash = catalog.content_hash(payload.get("text"), payload.get("tagged_elements"))
+        document_id = catalog.find(apikey, content_hash, name, payload.get("meta"))
+        if document_id is not None and catalog.verify and not _exists(service, payload, document_id, **kwargs):
+            catalog.remove(apikey, [document_id])
+            document_id = None
+        if document_id is not None:
+            return {
+                "success": True,
+                "document_id": document_id,
+                "cost": {"total_cost": 0.0},
+                "charged_character_count": 0,
+                "deduplicated": True
+            }
+
+    response = get_response(payload, **kwargs)
+    if "error" not in response and response.get("document_id"):
+        if catalog is not None:
+            catalog.add(apikey, response["document_id"], content_hash, name, payload.get("meta"))
+        if search_cache is not None:
+            search_cache.on_ingest(apikey, response["document_id"], payload.get("meta"))
+    return response
+
+
+def _exists(service:SoffosAIService, payload:dict, document_id:str, **kwargs) -> bool:
+    '''
+    Whether a document of the catalog still exists: a search by its document_id finds passages.
+    It is assumed to exist when the search fails, so that it is not ingested twice.
+    '''
+    search_payload = {"user": payload["user"], "document_ids": [document_id], "top_n_natural_language": 1}
+    if "apikey" in payload:
+        search_payload["apikey"] = payload["apikey"]
+    search = SoffosAIService(ServiceString.DOCUMENTS_SEARCH, apikey=service._apikey, key_pool=service._key_pool)
+    response = search.get_response(search_payload, **kwargs)
+    return "error" in response or bool(response.get("passages"))
+
+
+def _delete(service:SoffosAIService, payload:dict, get_response, **kwargs) -> dict:
+    '''
+    Deletes the documents and removes them from the catalog and the search cache
+    '''
+    response = get_response(payload, **kwargs)
+    if "error" not in response:
+        apikey = payload.get("apikey", service._apikey)
+        if service._catalog is not None:
+            service._catalog.remove(apikey, payload["document_ids"])
+        if service._search_cache is not None:
+            service._search_cache.on_delete(apikey, payload["document_ids"])
+    return response
+
+
+def _search(service:SoffosAIService, payload:dict, get_response, **kwargs) -> dict:
+    '''
+    Searches from the search cache first
+    '''
+    search_cache = service._search_cache
+    if search_cache is None:
+        return _narrow_search(service, payload, get_response, **kwargs)
+
+    apikey = payload.get("apikey", service._apikey)
+    response = search_cache.get(apikey, payload)
+    if response is not None:
+        response["cost"] = {"total_cost": 0.0}
+        response["charged_character_count"] = 0
+        response["cache_hit"] = True
+        return response
+
+    response = _narrow_search(service, payload, get_response, **kwargs)
+    if "error" not in response:
+        search_cache.set(apikey, payload, response)
+    return response
+
+
+def _to_search_result(response:dict) -> dict:
+    '''
+    Wraps a successful search response in a SearchResult whose text is built on demand
+    '''
+    if "error" in response:
+        return response
+    return SearchResult(response)
+
+
+def _passage_score(passage, score_key:str=None) -> float:
+    '''
+    The highest score of a passage. score_key chooses between the "keyword" and "semantic" scores,
+    both are considered when it is None.
+    '''
+    if not isinstance(passage, dict):
+        return 0.0
+    scores = passage.get("scores") or []
+    if isinstance(scores, dict):
+        scores = [scores]
+    keys = [score_key] if score_key else ["keyword", "semantic"]
+    values = [
+        score[key] for score in scores if isinstance(score, dict)
+        for key in keys if isinstance(score.get(key), (int, float))
+    ]
+    return max(values) if values else 0.0
+
+
+def _passage_key(passage) -> tuple:
+    if not isinstance(passage, dict):
+        passage = {"content": str(passage)}
+    content = (passage.get("content") or "").encode("utf-8")
+    return passage.get("document_id"), hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def _merge_searches(responses:list, top_k:int, score_key:str=None) -> dict:
+    '''
+    Keeps the top_k best scored passages of several searches. A passage found by several
+    searches is only kept once with its best score.
+    '''
+    best = {} # (document_id, content hash) -> (score, order, passage)
+    order = 0
+    for response in responses:
+        for passage in response.get("passages") or []:
+            key = _passage_key(passage)
+            score = _passage_score(passage, score_key)
+            if key not in best or score > best[key][0]:
+                # the order breaks ties in favour of the earlier query and passage
+                best[key] = (score, -order, passage)
+            order += 1
+
+    top = heapq.nlargest(top_k, best.values(), key=lambda item: item[:2])
+    merged = {"passages": [passage for _, _, passage in top]}
+    costs = [response.get("cost") or {} for response in responses]
+    merged["cost"] = {"total_cost": sum(cost.get("total_cost", 0) for cost in costs)}
+    charged = [response.get("charged_character_count") for response in responses]
+    if any(count is not None for count in charged):
+        merged["charged_character_count"] = sum(count or 0 for count in charged)
+    merged["query_count"] = len(responses)
+    return merged
+
+
+def _narrow_search(service:SoffosAIService, payload:dict, get_response, **kwargs) -> dict:
+    '''
+    Replaces the filters of a search by the document_ids that match them in an authoritative catalog
+    '''
+    catalog = service._catalog
+    if catalog is None or not catalog.authoritative or not payload.get("filters") or payload.get("document_ids"):
+        return get_response(payload, **kwargs)
+
+    document_ids = catalog.resolve(payload.get("apikey", service._apikey), filters=payload["filters"])
+    if document_ids is None:
+        return get_response(payload, **kwargs)
+    if len(document_ids) == 0:
+        return {"passages": [], "text": "", "cost": {"total_cost": 0.0}, "charged_character_count": 0}
+
+    payload = dict(payload)
+    payload.pop("filters")
+    payload["document_ids"] = document_ids
+    return get_response(payload, **kwargs)
+
 
 class DocumentsIngestService(SoffosAIService):
     '''
     The Documents module enables ingestion of content into Soffos.
     Takes in the text and gives the document_id to reference the text in Soffos database
+
+    ** catalog: a soffosai.core.documents.DocumentCatalog that records the ingested documents and
+    prevents ingesting the same document twice. Defaults to soffosai.document_catalog.
+    ** search_cache: a soffosai.core.caching.SearchCache to invalidate when a document is ingested.
+    Defaults to soffosai.search_cache.
     '''
 
     def __init__(self,  **kwargs) -> None:
         service = ServiceString.DOCUMENTS_INGEST
         super().__init__(service, **kwargs)
+        self._catalog = kwargs.get("catalog", soffosai.document_catalog)
+        self._search_cache = kwargs.get("search_cache", soffosai.search_cache)
     
     def __call__(self, user:str, document_name:str, text:str=None, tagged_elements:list=None, meta:dict=None):
         self._args_dict = inspect_arguments(self.__call__, user, document_name, text, tagged_elements, meta)
-        self._args_dict['name'] = document_name
-        self._args_dict.pop('document_name')
         return super().__call__()
 
 
+    def get_data(self):
+        return _rename_document_name(super().get_data())
+
+
+    def get_response(self, payload={}, **kwargs) -> dict:
+        return _ingest(self, payload, super().get_response, **kwargs)
+
+
 class DocumentsSearchService(SoffosAIService):
     '''
     The Documents module enables search of ingested contents from Soffos.
+
+    ** catalog: an authoritative soffosai.core.documents.DocumentCatalog narrows searches by
+    filters to the matching document_ids. Defaults to soffosai.document_catalog.
+    ** search_cache: a soffosai.core.caching.SearchCache that repeated searches are answered from.
+    Defaults to soffosai.search_cache.
     '''
 
     def __init__(self,  **kwargs) -> None:
         service = ServiceString.DOCUMENTS_SEARCH
         super().__init__(service, **kwargs)
+        self._catalog = kwargs.get("catalog", soffosai.document_catalog)
+        self._search_cache = kwargs.get("search_cache", soffosai.search_cache)
     
 
     def __call__(self, user:str, query:str=None, filters:dict=None, document_ids:list=None, top_n_keywords:int=5,
         top_n_natural_language:int=5, date_from:str=None, date_until:str=None):
         self._args_dict = inspect_arguments(self.__call__, user, query, filters, document_ids, top_n_keywords,
         top_n_natural_language, date_from, date_until)
-        response:dict = super().__call__()
-        text = ""
-        for passage in response.get('passages'):
-            text = text + passage
-        response['text'] = text
-        return response
+        return super().__call__()
+
+
+    def get_response(self, payload={}, **kwargs) -> dict:
+        return _to_search_result(_search(self, payload, super().get_response, **kwargs))
 
 
 class DocumentsDeleteService(SoffosAIService):
     '''
     The Documents module enables deletion of ingested contents from Soffos.
+
+    ** catalog: a soffosai.core.documents.DocumentCatalog that the deleted documents are removed from.
+    Defaults to soffosai.document_catalog.
+    ** search_cache: a soffosai.core.caching.SearchCache to invalidate when documents are deleted.
+    Defaults to soffosai.search_cache.
     '''
 
     def __init__(self,  **kwargs) -> None:
         service = ServiceString.DOCUMENTS_DELETE
         super().__init__(service, **kwargs)
+        self._catalog = kwargs.get("catalog", soffosai.document_catalog)
+        self._search_cache = kwargs.get("search_cache", soffosai.search_cache)
     
     def __call__(self, user:str, document_ids:list):
         self._args_dict = inspect_arguments(self.__call__, user, document_ids)
         return super().__call__()
 
 
+    def get_response(self, payload={}, **kwargs) -> dict:
+        return _delete(self, payload, super().get_response, **kwargs)
+
+
 class DocumentsService(SoffosAIService):
     '''
     The Documents module enables ingestion of content into Soffos.
     User can ingest text and get the reference to it as document_id.
     Cal also Retrieve the context and delete the ingested text from Soffos db.
+
+    ** catalog: a soffosai.core.documents.DocumentCatalog kept in sync with ingest and delete.
+    Defaults to soffosai.document_catalog.
+    ** search_cache: a soffosai.core.caching.SearchCache used by search and invalidated by ingest
+    and delete. Defaults to soffosai.search_cache.
     '''
     def __init__(self,  **kwargs) -> None:
         service = ServiceString.DOCUMENTS_SEARCH
         super().__init__(service, **kwargs)
+        self._catalog = kwargs.get("catalog", soffosai.document_catalog)
+        self._search_cache = kwargs.get("search_cache", soffosai.search_cache)
+        self._service_kwargs = kwargs
     
 
     def __call__(self, user:str, query:str=None, filters:dict=None, document_ids:list=None, top_n_keywords:int=5,
@@ -92,10 +317,15 @@ class DocumentsService(SoffosAIService):
         self._service = ServiceString.DOCUMENTS_INGEST
         self._serviceio:ServiceIO = SERVICE_IO_MAP.get(self._service)
         self._args_dict = inspect_arguments(self.ingest, user, document_name, text, tagged_elements, meta)
-        self._args_dict['name'] = document_name
-        self._args_dict.pop('document_name')
         return self.get_response(payload=self._args_dict)
 
+
+    def get_data(self):
+        data = super().get_data()
+        if self._service == ServiceString.DOCUMENTS_INGEST:
+            return _rename_document_name(data)
+        return data
+
     
     def delete(self, user:str, document_ids:list):
         self._service = ServiceString.DOCUMENTS_DELETE
@@ -104,11 +334,42 @@ class DocumentsService(SoffosAIService):
         return self.get_response(payload=self._args_dict)
 
 
+    def search_many(self, user:str, queries:list, top_k:int=10, score_key:str=None, filters:dict=None,
+        document_ids:list=None, top_n_keywords:int=5, top_n_natural_language:int=5, date_from:str=None,
+        date_until:str=None, max_workers:int=8):
+        '''
+        Runs a search for each query concurrently and merges their passages into the top_k best
+        scored ones. Passages with the same document_id and content are only returned once.
+        score_key ranks the passages by their "keyword" or "semantic" score. By default the
+        higher of the two is used.
+        '''
+        if not queries:
+            raise ValueError("queries should not be empty.")
+        if top_k <= 0 or max_workers <= 0:
+            raise ValueError("top_k and max_workers should be positive integers.")
+        if score_key not in (None, "keyword", "semantic"):
+            raise ValueError("score_key should be 'keyword', 'semantic' or None.")
+
+        def search(query:str) -> dict:
+            # services keep the state of their last call so each query gets its own instance
+            return DocumentsSearchService(**self._service_kwargs)(
+                user, query=query, filters=filters, document_ids=document_ids, top_n_keywords=top_n_keywords,
+                top_n_natural_language=top_n_natural_language, date_from=date_from, date_until=date_until
+            )
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as executor:
+            responses = list(executor.map(search, queries))
+
+        for response in responses:
+            if "error" in response:
+                return response
+        return SearchResult(_merge_searches(responses, top_k, score_key))
+
+
     def get_response(self, payload:dict, **kwargs) -> dict:
-        response = super().get_response(payload, **kwargs)
-        text = ""
-        if response.get('passages'):
-            for passage in response.get['passages']:
-                text = text + passage
-            response['text'] = text
-        return response
+        if self._service == ServiceString.DOCUMENTS_INGEST:
+            return _ingest(self, payload, super().get_response, **kwargs)
+        if self._service == ServiceString.DOCUMENTS_DELETE:
+            return _delete(self, payload, super().get_response, **kwargs)
+
+        return _to_search_result(_search(self, payload, super().get_response, **kwargs))
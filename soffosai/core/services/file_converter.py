@@ -5,6 +5,7 @@ Purpose: Easily use File Converter Service
 -----------------------------------------------------
 '''
 from typing import Union
+import soffosai
 from .service import SoffosAIService, inspect_arguments
 from soffosai.common.constants import ServiceString
 
@@ -14,14 +15,43 @@ _NORMALIZE_VALUES = [0, 1]
 class FileConverterService(SoffosAIService):
     '''
     The File Converter extracts text from various types of files.
+
+    ** cache: a soffosai.core.caching.FileConverterCache. When the same file content was already
+    converted with the same normalize value, the cached output is returned without uploading
+    the file. Defaults to soffosai.file_converter_cache.
     '''
 
     def __init__(self,  **kwargs) -> None:
         service = ServiceString.FILE_CONVERTER
         super().__init__(service, **kwargs)
+        self._cache = kwargs.get("cache", soffosai.file_converter_cache)
     
     def __call__(self, user:str, file:str, normalize:int=0):
         if normalize not in _NORMALIZE_VALUES:
             raise ValueError(f"{self._service}: normalize can only accept a value of 0 or 1")
         self._args_dict = inspect_arguments(self.__call__, user, file, normalize)
         return super().__call__()
+
+
+    def get_response(self, payload={}, **kwargs) -> dict:
+        if self._cache is None:
+            return super().get_response(payload, **kwargs)
+
+        self._payload = payload
+        allow_input, message = self.validate_payload()
+        if not allow_input:
+            raise ValueError(message)
+
+        key = self._cache.get_key(payload["file"], payload.get("normalize", 0))
+        if key is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                cached["cost"] = {"total_cost": 0.0}
+                cached["charged_character_count"] = 0
+                cached["cache_hit"] = True
+                return cached
+
+        response = super().get_response(payload, **kwargs)
+        if key is not None and "error" not in response:
+            self._cache.set(key, response)
+        return response
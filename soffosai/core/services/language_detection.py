@@ -11,12 +11,22 @@ from soffosai.common.constants import ServiceString
 class LanguageDetectionService(SoffosAIService):
     '''
     The Language Detection module detects the dominant language in the provided text.
+
+    ** prescreen: a soffosai.core.prescreen.LanguageScreen that answers clear-cut texts locally
+    without calling the API.
     '''
 
     def __init__(self,  **kwargs) -> None:
         service = ServiceString.LANGUAGE_DETECTION
         super().__init__(service, **kwargs)
+        self._prescreen = kwargs.get("prescreen")
     
     def __call__(self, user:str, text:str):
         self._args_dict = inspect_arguments(self.__call__, user, text)
         return super().__call__()
+
+
+    def get_response(self, payload={}, **kwargs) -> dict:
+        if self._prescreen is None:
+            return super().get_response(payload, **kwargs)
+        return self._prescreen.get_response(self, payload, super().get_response, **kwargs)
@@ -4,21 +4,64 @@ Created at: 2023-06-26
 Purpose: Easily use Let's Discuss Service
 -----------------------------------------------------
 '''
+import soffosai
 from .service import SoffosAIService, inspect_arguments
 from soffosai.common.constants import ServiceString
 from soffosai.common.service_io_map import SERVICE_IO_MAP
 from soffosai.common.serviceio_fields import ServiceIO
 
 
+def _get_response(service:SoffosAIService, payload:dict, get_response, **kwargs) -> dict:
+    '''
+    Keeps the message store in sync and answers retrieve_sessions from it
+    '''
+    store = service._message_store
+    if store is None:
+        return get_response(payload, **kwargs)
+
+    apikey = payload.get("apikey", service._apikey)
+    if service._service == ServiceString.LETS_DISCUSS_RETRIEVE:
+        service._payload = payload
+        allow_input, message = service.validate_payload()
+        if not allow_input:
+            raise ValueError(message)
+        user = payload.get("user")
+        if store.needs_reconcile(apikey, user):
+            error = store.reconcile(
+                apikey, user, lambda return_messages: get_response(dict(payload, return_messages=return_messages), **kwargs)
+            )
+            if error is not None:
+                return error
+        return store.get_sessions(apikey, user, return_messages=payload.get("return_messages", False))
+
+    response = get_response(payload, **kwargs)
+    if "error" in response:
+        return response
+    if service._service == ServiceString.LETS_DISCUSS_CREATE:
+        store.add_session(apikey, payload.get("user"), response["session_id"], payload.get("context"))
+    elif service._service == ServiceString.LETS_DISCUSS:
+        response["message_id"] = store.add_message(
+            apikey, payload.get("user"), payload["session_id"], payload.get("query"), response.get("response"),
+            message_id = response.get("message_id")
+        )
+    elif service._service == ServiceString.LETS_DISCUSS_DELETE:
+        store.remove_sessions(apikey, payload.get("user"), payload["session_ids"])
+    return response
+
+
 class LetsDiscussService(SoffosAIService):
     '''
     The Let's Discuss module allows the user to have a conversation with the AI about the content 
     provided by the user. The main difference between this module and the Question Answering module 
     is that Let's Discuss keeps a history of the interactions.
+
+    ** message_store: a soffosai.core.discuss.MessageStore that records the sessions and messages
+    and answers retrieve_sessions locally. Defaults to soffosai.discuss_message_store.
     '''
     def __init__(self,  **kwargs) -> None:
         service = ServiceString.LETS_DISCUSS
         super().__init__(service, **kwargs)
+        self._message_store = kwargs.get("message_store", soffosai.discuss_message_store)
 
 
     def create(self, user:str, context:str):
@@ -49,10 +92,20 @@ class LetsDiscussService(SoffosAIService):
         return self.get_response(payload=self._args_dict)
 
 
+    def get_response(self, payload={}, **kwargs) -> dict:
+        return _get_response(self, payload, super().get_response, **kwargs)
+
+
 class LetsDiscussCreateService(SoffosAIService):
     '''
     A separate class for LetsDiscuss service to be used for creating a session only.
     '''
+    def __init__(self,  **kwargs) -> None:
+        service = ServiceString.LETS_DISCUSS_CREATE
+        super().__init__(service, **kwargs)
+        self._message_store = kwargs.get("message_store", soffosai.discuss_message_store)
+
+
     def __call__(self, user:str, context:str):
         self._service = ServiceString.LETS_DISCUSS_CREATE
         self._serviceio:ServiceIO = SERVICE_IO_MAP.get(self._service)
@@ -60,10 +113,20 @@ class LetsDiscussCreateService(SoffosAIService):
         return super().__call__()
 
 
+    def get_response(self, payload={}, **kwargs) -> dict:
+        return _get_response(self, payload, super().get_response, **kwargs)
+
+
 class LetsDiscussRetrieveService(SoffosAIService):
     '''
     A separate class for LetsDiscuss service to be used for retrieving sessions only.
     '''
+    def __init__(self,  **kwargs) -> None:
+        service = ServiceString.LETS_DISCUSS_RETRIEVE
+        super().__init__(service, **kwargs)
+        self._message_store = kwargs.get("message_store", soffosai.discuss_message_store)
+
+
     def __call__(self, user:str, return_messages:bool):
         self._service = ServiceString.LETS_DISCUSS_RETRIEVE
         self._serviceio:ServiceIO = SERVICE_IO_MAP.get(self._service)
@@ -71,12 +134,26 @@ class LetsDiscussRetrieveService(SoffosAIService):
         return super().__call__()
 
 
+    def get_response(self, payload={}, **kwargs) -> dict:
+        return _get_response(self, payload, super().get_response, **kwargs)
+
+
 class LetsDiscussDeleteService(SoffosAIService):
     '''
     A separate class for LetsDiscuss service to be used for deleting sessions only.
     '''
+    def __init__(self,  **kwargs) -> None:
+        service = ServiceString.LETS_DISCUSS_DELETE
+        super().__init__(service, **kwargs)
+        self._message_store = kwargs.get("message_store", soffosai.discuss_message_store)
+
+
     def __call__(self, user:str, session_ids:list):
         self._service = ServiceString.LETS_DISCUSS_DELETE
         self._serviceio:ServiceIO = SERVICE_IO_MAP.get(self._service)
         self._args_dict = inspect_arguments(self.__call__, user, session_ids)
         return super().__call__()
+
+
+    def get_response(self, payload={}, **kwargs) -> dict:
+        return _get_response(self, payload, super().get_response, **kwargs)
@@ -11,13 +11,23 @@ from soffosai.common.constants import ServiceString
 class ProfanityService(SoffosAIService):
     '''
     This module detects profanities and the level of offensiveness in a body of text.
+
+    ** prescreen: a soffosai.core.prescreen.ProfanityScreen that answers clear-cut texts locally
+    without calling the API.
     '''
 
     def __init__(self,  **kwargs) -> None:
         service = ServiceString.PROFANITY
         super().__init__(service, **kwargs)
+        self._prescreen = kwargs.get("prescreen")
     
 
     def __call__(self, user:str, text:str):
         self._args_dict = inspect_arguments(self.__call__, user, text)
         return super().__call__()
+
+
+    def get_response(self, payload={}, **kwargs) -> dict:
+        if self._prescreen is None:
+            return super().get_response(payload, **kwargs)
+        return self._prescreen.get_response(self, payload, super().get_response, **kwargs)
@@ -4,6 +4,7 @@ Created at: 2023-06-27
 Purpose: Easily use Question Answering Service
 -----------------------------------------------------
 '''
+import soffosai
 from .service import SoffosAIService, inspect_arguments
 from soffosai.common.constants import ServiceString
 
@@ -14,11 +15,18 @@ class QuestionAnsweringService(SoffosAIService):
     questions posed on a large amount of content. It includes basic intent recognition capabilities 
     to enable appropriate responses to incorrect or profane language, or typical personal questions 
     like "How are you?" and greetings
+
+    ** prefilter: a soffosai.core.retrieval.QuestionAnsweringPrefilter that narrows the
+    document_text or document_ids to the passages relevant to the question before the call.
+    ** cache: a soffosai.core.caching.QuestionAnsweringCache that answers questions similar to
+    earlier ones about the same documents. Defaults to soffosai.question_answering_cache.
     '''
 
     def __init__(self,  **kwargs) -> None:
         service = ServiceString.QUESTION_ANSWERING
         super().__init__(service, **kwargs)
+        self._prefilter = kwargs.get("prefilter")
+        self._cache = kwargs.get("cache", soffosai.question_answering_cache)
     
 
     def __call__(self, user:str, question:str, document_text:str=None, document_ids:list=None, 
@@ -28,3 +36,31 @@ class QuestionAnsweringService(SoffosAIService):
         self._args_dict['message'] = question
         return super().__call__()
 
+
+    def get_response(self, payload={}, **kwargs) -> dict:
+        if self._cache is None:
+            return self._get_response(payload, **kwargs)
+
+        self._payload = payload
+        allow_input, message = self.validate_payload()
+        if not allow_input:
+            raise ValueError(message)
+
+        apikey = payload.get("apikey", self._apikey)
+        cached = self._cache.get(apikey, payload)
+        if cached is not None:
+            cached["cost"] = {"total_cost": 0.0}
+            cached["charged_character_count"] = 0
+            cached["cache_hit"] = True
+            return cached
+
+        response = self._get_response(payload, **kwargs)
+        if "error" not in response:
+            self._cache.set(apikey, payload, response)
+        return response
+
+
+    def _get_response(self, payload:dict, **kwargs) -> dict:
+        if self._prefilter is not None:
+            payload = self._prefilter.apply(payload)
+        return super().get_response(payload, **kwargs)
@@ -4,10 +4,15 @@ Created at: 2023-04-01
 Purpose: The base Service class
 -----------------------------------------------------
 '''
+import time
 import inspect
 import soffosai
 import json, io
-import abc, requests, os, mimetypes, uuid
+import abc, os, mimetypes, uuid
+from soffosai.client.multipart import MultipartEncoder, DEFAULT_CHUNK_SIZE
+from soffosai.client.session import get_session
+from soffosai.client.timeouts import get_timeout, MIN_TIMEOUT
+from soffosai.client.key_pool import KEY_BOUND_SERVICES
 from soffosai.common.constants import SOFFOS_SERVICE_URL, FORM_DATA_REQUIRED
 from soffosai.common.service_io_map import SERVICE_IO_MAP
 from soffosai.common.serviceio_fields import ServiceIO
@@ -16,6 +21,10 @@ from soffosai.common.serviceio_fields import ServiceIO
 visit_docs_message = "Kindly visit https://platform.soffos.ai/playground/docs#/ for guidance."
 input_structure_message = "To learn what the input dictionary should look like, access it by <your_service_instance>.input_structure"
 
+# responses that are worth retrying, and the wait before the first retry (doubled after each one)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_BACKOFF = 0.5
+
 
 def inspect_arguments(func, *args, **kwargs):
     '''
@@ -78,6 +87,26 @@ def is_valid_uuid(uuid_string):
 class SoffosAIService:
     '''
     Base service class for all Soffos Services
+
+    ** File uploads are streamed from the file handle. They can be configured with the
+    chunk_size, progress_callback and use_mmap keyword arguments. 
+    See soffosai.client.multipart.MultipartEncoder.
+    ** timeout: seconds a request waits for the API. Defaults to the service's timeout in
+    soffosai.client.timeouts.
+    ** retries: how many times a request is sent again after a connection error, a timeout, a 429 or
+    a 5xx response. Uploads of file handles are not retried.
+    ** adaptive_timeouts: a soffosai.client.AdaptiveTimeouts that learns the timeout of the service
+    from its latencies. Defaults to soffosai.adaptive_timeouts.
+    ** concurrency_limits: a soffosai.client.ConcurrencyLimits that adapts the number of concurrent
+    requests of the service to its latency and overloads. Defaults to soffosai.concurrency_limits.
+    ** scheduler: a soffosai.client.RequestScheduler that orders the requests by priority class and
+    user. Defaults to soffosai.request_scheduler. priority is the class of the service's requests,
+    get_response also takes one.
+    ** key_pool: a soffosai.client.ApiKeyPool that spreads the requests over several api keys.
+    Defaults to soffosai.api_key_pool. It is not used when the service is given an apikey, and the
+    Documents and Let's Discuss services only use the key pinned by get_response's apikey.
+    get_response also takes a timeout and a deadline (soffosai.client.timeouts.Deadline): the
+    request and its retries are not sent past the deadline.
     '''
     def __init__(self, service:str, **kwargs) -> None:            
         if kwargs.get("apikey"):
@@ -94,6 +123,18 @@ class SoffosAIService:
         self._payload = {}
         self._payload_keys = self._payload.keys()
         self._args_dict = {}
+        self._chunk_size = kwargs.get("chunk_size", DEFAULT_CHUNK_SIZE)
+        self._progress_callback = kwargs.get("progress_callback")
+        self._use_mmap = kwargs.get("use_mmap", False)
+        self._timeout = kwargs.get("timeout")
+        self._retries = kwargs.get("retries", 0)
+        self._adaptive_timeouts = kwargs.get("adaptive_timeouts", soffosai.adaptive_timeouts)
+        self._concurrency_limits = kwargs.get("concurrency_limits", soffosai.concurrency_limits)
+        self._scheduler = kwargs.get("scheduler", soffosai.request_scheduler)
+        self._priority = kwargs.get("priority")
+        self._key_pool = kwargs.get("key_pool", soffosai.api_key_pool)
+        # without a pinned key, requests use any key of the pool
+        self._use_any_key = not kwargs.get("apikey") and service not in KEY_BOUND_SERVICES
 
 
     @property
@@ -152,6 +193,9 @@ class SoffosAIService:
         input_structure = self._serviceio.input_structure
         value_errors = []
         for key, value in self._payload.items():
+            if key == "file" and hasattr(value, "read"): # file-like objects are streamed as they are
+                continue
+
             if key in input_structure.keys():
 
                 if not isinstance(input_structure[key], type):
@@ -189,13 +233,51 @@ class SoffosAIService:
         return request_data
 
 
-    def handle_file(self, file_stream, filename, mime_type):
-        # Using read(), seek() and other file like object operations on file_stream 
-        buffer = file_stream.read()
-        file_stream.seek(0)  # it's a good practice to reset the file pointer
-        stream = io.BytesIO(buffer)
-        file_tuple = (filename, stream, mime_type)
-        return file_tuple
+    def handle_file(self, file_stream, filename, mime_type, data:dict):
+        '''
+        Prepares the streaming multipart body of a file upload.
+        The file is read in chunks while the request is being sent instead of being copied in memory.
+        '''
+        return MultipartEncoder(
+            fields = data,
+            file_field = "file",
+            file_stream = file_stream,
+            filename = filename,
+            mime_type = mime_type,
+            chunk_size = self._chunk_size,
+            progress_callback = self._progress_callback,
+            use_mmap = self._use_mmap
+        )
+
+
+    def post_file(self, session, data:dict, timeout:float=None, apikey:str=None):
+        '''
+        Uploads the payload's file together with the rest of the payload as form data
+        '''
+        timeout = timeout or get_timeout(self._service)
+        file_obj = self._payload.get('file')
+        if isinstance(file_obj, str):
+            with open(file_obj, 'rb') as file:
+                return self._post_file_stream(session, data, file, file_obj, timeout, apikey)
+        
+        return self._post_file_stream(session, data, file_obj, getattr(file_obj, "name", "file"), timeout, apikey)
+
+
+    def _post_file_stream(self, session, data:dict, file_stream, path:str, timeout:float, apikey:str=None):
+        filename = str(os.path.basename(path))
+        mime_type, _ = mimetypes.guess_type(filename)
+        with self.handle_file(file_stream, filename, mime_type, data) as encoder:
+            headers = dict(self.headers)
+            headers["content-type"] = encoder.content_type
+            if apikey:
+                headers["x-api-key"] = apikey
+            return session.post(
+                url = SOFFOS_SERVICE_URL + self._service + "/",
+                headers = headers,
+                # without a known size the body is sent with chunked transfer encoding
+                data = encoder if encoder.size is not None else iter(encoder),
+                timeout = timeout
+            )
 
 
     def get_response(self, payload={}, **kwargs) -> dict:
@@ -213,71 +295,23 @@ class SoffosAIService:
         if not self._service:
             raise ValueError("Please provide the service you need from Soffos AI.")
 
+        import requests # deferred so that `import soffosai` does not pay for the HTTP stack
+
         response = None
         data = self.get_data()
-
-        if self._service not in FORM_DATA_REQUIRED:
-            self.headers["content-type"] = "application/json"
-            try:
-                response = requests.post(
-                    url = SOFFOS_SERVICE_URL + self._service + "/",
-                    headers = self.headers,
-                    json = data,
-                    timeout = 120
-                )
-                response.raise_for_status()
-            except (requests.exceptions.HTTPError, requests.exceptions.ConnectionError, 
-                    requests.exceptions.Timeout, requests.exceptions.RequestException) as err:
-                return {
-                    "status": 'Error',
-                    "error": str(err)
-                }
-            
-        else:
-            file_obj = self._payload.get('file')
-            if isinstance(file_obj, str):
-                filename = str(os.path.basename(file_obj))
-                mime_type, _ = mimetypes.guess_type(file_obj)
-                with open(file_obj, 'rb') as file:
-                    files = {
-                        "file": (filename, file, mime_type)
-                    }
-                    try:
-                        response = requests.post(
-                            url = SOFFOS_SERVICE_URL + self._service + "/",
-                            headers = self.headers,
-                            data = data,
-                            files = files,
-                            timeout=120
-                        )
-                        response.raise_for_status()
-                    except (requests.exceptions.HTTPError, requests.exceptions.ConnectionError, 
-                            requests.exceptions.Timeout, requests.exceptions.RequestException) as err:
-                        return {
-                            "status": 'Error',
-                            "error": str(err)
-                        }
-
-            else:
-                filename = file_obj.name
-                mime_type, _ = mimetypes.guess_type(filename)
-                files = self.handle_file(file_obj, filename, mime_type)
-
-                try:
-                    response = requests.post(
-                        url = SOFFOS_SERVICE_URL + self._service + "/",
-                        headers = self.headers,
-                        data = data,
-                        files = files,
-                        timeout=120
-                    )
-                    response.raise_for_status()
-                except (requests.exceptions.HTTPError, requests.exceptions.ConnectionError, 
-                        requests.exceptions.Timeout, requests.exceptions.RequestException) as err:
-                    return {
-                        "status": 'Error',
-                        "error": str(err)
-                    }
+        session = get_session()
+
+        try:
+            response = self._post(
+                session, data, kwargs.get("timeout"), kwargs.get("deadline"), kwargs.get("priority"), kwargs.get("apikey")
+            )
+            response.raise_for_status()
+        except (requests.exceptions.HTTPError, requests.exceptions.ConnectionError, 
+                requests.exceptions.Timeout, requests.exceptions.RequestException) as err:
+            return {
+                "status": 'Error',
+                "error": str(err)
+            }
         
         if response.ok:
             return response.json()
@@ -288,6 +322,169 @@ class SoffosAIService:
             }
 
 
+    def get_request_timeout(self, size:int=None) -> float:
+        '''
+        The timeout of a request with a payload of size characters: the service instance's timeout,
+        else the learned one, else the service's default
+        '''
+        if self._timeout:
+            return self._timeout
+        if self._adaptive_timeouts is not None:
+            timeout = self._adaptive_timeouts.timeout(self._service, size)
+            if timeout is not None:
+                return timeout
+        return get_timeout(self._service)
+
+
+    def get_payload_size(self, data:dict) -> int:
+        '''
+        The size of a request's payload in characters, or of its file in bytes
+        '''
+        if self._service not in FORM_DATA_REQUIRED:
+            return len(json.dumps(data, default=str))
+        file_obj = self._payload.get('file')
+        try:
+            if isinstance(file_obj, str):
+                return os.path.getsize(file_obj)
+            return os.fstat(file_obj.fileno()).st_size
+        except (OSError, AttributeError, ValueError, io.UnsupportedOperation):
+            return None
+
+
+    def _post(self, session, data:dict, timeout:float=None, deadline=None, priority:str=None, apikey:str=None):
+        '''
+        Sends the request, and sends it again up to retries times after a failure, without
+        waiting for the API past the deadline. With a key pool, each attempt takes a key of the
+        pool, the apikey one when it is pinned, and an attempt whose key is taken out is sent
+        again at once with another key. An attempt only waits for its scheduler turn once it has
+        its concurrency slot and its key, and gives the turn back before a retry's backoff, so that
+        requests waiting on a busy service or key do not hold the turns of the other services.
+        '''
+        import requests
+
+        adaptive_timeouts = self._adaptive_timeouts
+        size = self.get_payload_size(data) if adaptive_timeouts is not None else None
+        timeout = timeout or self.get_request_timeout(size)
+        retries = self._retries
+        rereadable = self._service not in FORM_DATA_REQUIRED or isinstance(self._payload.get('file'), str)
+        if not rereadable:
+            retries = 0 # a file handle cannot be read again
+
+        limiter = None
+        if self._concurrency_limits is not None:
+            limiter = self._concurrency_limits.get_limiter(self._service)
+
+        key_pool = self._key_pool
+        if key_pool is not None and (apikey not in key_pool if apikey else not self._use_any_key):
+            key_pool = None
+        switches = len(key_pool) - 1 if key_pool is not None and not apikey and rereadable else 0
+
+        attempt = 0
+        while True:
+            request_timeout = self._get_attempt_timeout(timeout, deadline)
+            key = apikey
+            if key_pool is not None:
+                key = key_pool.acquire(apikey, deadline)
+                if key is None:
+                    raise requests.exceptions.RequestException(f"{self._service}: no api key of the pool is available.")
+
+            limited = False
+            ticket = None
+            start = None
+            response = None
+            error = None
+            overloaded = True
+            taken_out = False
+            try:
+                if limiter is not None:
+                    if limiter.acquire(request_timeout if deadline is not None else None) is None:
+                        raise requests.exceptions.Timeout(f"{self._service}: no request slot was free before the deadline.")
+                    limited = True
+                if self._scheduler is not None:
+                    ticket, reason = self._scheduler.acquire(priority or self._priority, self._payload.get("user"), deadline)
+                    if ticket is None:
+                        raise requests.exceptions.RequestException(f"{self._service}: {reason}")
+                request_timeout = self._get_attempt_timeout(timeout, deadline)
+
+                start = time.monotonic()
+                try:
+                    response = self._send(session, data, request_timeout, key)
+                    overloaded = response.status_code in RETRY_STATUSES
+                    if adaptive_timeouts is not None:
+                        adaptive_timeouts.record(self._service, time.monotonic() - start, size)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                    if adaptive_timeouts is not None and isinstance(err, requests.exceptions.ReadTimeout):
+                        # the latency is at least the timeout
+                        adaptive_timeouts.record(self._service, request_timeout, size, timed_out=True)
+                    error = err
+            finally:
+                if ticket is not None:
+                    self._scheduler.release(ticket)
+                # an attempt that was not sent says nothing about the service or the key
+                if limited:
+                    if start is None:
+                        limiter.cancel()
+                    else:
+                        limiter.release(start, overloaded)
+                if key_pool is not None:
+                    if start is None:
+                        key_pool.cancel(key)
+                    else:
+                        taken_out = self._release_key(key_pool, key, response, error)
+
+            if taken_out and switches > 0:
+                switches -= 1
+                continue
+            if response is not None and not overloaded:
+                return response
+
+            backoff = RETRY_BACKOFF * 2 ** attempt
+            # no retry when it could not be sent before the deadline
+            if attempt >= retries or (deadline is not None and deadline.remaining() < backoff + MIN_TIMEOUT):
+                if error is not None:
+                    raise error
+                return response
+            attempt += 1
+            time.sleep(backoff)
+
+
+    def _get_attempt_timeout(self, timeout:float, deadline) -> float:
+        if deadline is None:
+            return timeout
+        request_timeout = min(timeout, deadline.remaining())
+        if request_timeout < MIN_TIMEOUT:
+            import requests
+            raise requests.exceptions.Timeout(f"{self._service}: the deadline is exceeded.")
+        return request_timeout
+
+
+    def _release_key(self, key_pool, key:str, response, error) -> bool:
+        '''
+        Gives the key of an attempt back to the pool with how the attempt went. Returns whether the key was taken out.
+        '''
+        if response is None:
+            return key_pool.release(key, failed=error is not None)
+        status = response.status_code
+        quota = status == 429 and "quota" in response.text.lower()
+        return key_pool.release(key, status, quota=quota)
+
+
+    def _send(self, session, data:dict, timeout:float, apikey:str=None):
+        if self._service not in FORM_DATA_REQUIRED:
+            self.headers["content-type"] = "application/json"
+            headers = self.headers
+            if apikey:
+                headers = dict(headers)
+                headers["x-api-key"] = apikey
+            return session.post(
+                url = SOFFOS_SERVICE_URL + self._service + "/",
+                headers = headers,
+                json = data,
+                timeout = timeout
+            )
+        return self.post_file(session, data, timeout, apikey)
+
+
     def __call__(self, **kwargs)->dict:
         return self.get_response(payload=self._args_dict,**kwargs)
 
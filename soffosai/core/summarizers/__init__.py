@@ -0,0 +1,2 @@
+from .map_reduce import MapReduceSummarizationService
+from .incremental import IncrementalSummarizer
@@ -0,0 +1,172 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Keep a rolling summary of an append-only text stream
+-----------------------------------------------------
+'''
+import re
+import threading
+from soffosai.core.services import SummarizationService
+
+
+_SENTENCE_END = re.compile(r"[.!?][\"')\]]*\s+")
+
+
+class IncrementalSummarizer:
+    '''
+    Summarizes a growing text such as a meeting transcript or a log without sending the whole
+    text on every update. Each update sends the previous summary and the text appended since
+    then (the tail), so its cost does not grow with the length of the stream.
+    ```
+    summarizer = IncrementalSummarizer(user="client_id", sent_length=5)
+    for line in transcript:
+        summarizer.append(line)
+    print(summarizer.flush())
+    ```
+    ** min_tail_chars: the tail is summarized once it is at least this long. Only whole
+    sentences are sent, the unfinished sentence at the end waits for the next update.
+    ** max_tail_chars: the longest tail sent in one update.
+    ** rebalance_every: every rebalance_every updates, the summary is rebuilt from the summaries of
+    the sections of the stream so that it does not drift towards the latest text. The summarized
+    text is kept until it makes a section of section_chars, which is then summarized and dropped.
+    Once the section summaries are longer than section_chars they are summarized together into one,
+    so the kept text and the cost of a rebalance stay under about twice section_chars whatever the
+    length of the stream. 0 disables rebalancing and the summarized text is not kept.
+    '''
+    def __init__(self, user:str, sent_length:int=5, min_tail_chars:int=2000, max_tail_chars:int=8000,
+        rebalance_every:int=20, section_chars:int=10000, **kwargs) -> None:
+        if not 0 < min_tail_chars <= max_tail_chars:
+            raise ValueError("Tail sizes should satisfy 0 < min_tail_chars <= max_tail_chars.")
+        self.user = user
+        self.sent_length = sent_length
+        self._min_tail_chars = min_tail_chars
+        self._max_tail_chars = max_tail_chars
+        self._rebalance_every = rebalance_every
+        self._service_kwargs = kwargs
+        self._summary = None
+        self._section_chars = section_chars
+        self._sections = [] # summaries of the older summarized text, kept for rebalancing
+        self._window = "" # summarized text that is not yet in a section summary
+        self._position = 0
+        self._tail = ""
+        self._update_count = 0
+        self._total_cost = 0.0
+        self._lock = threading.Lock()
+
+
+    @property
+    def summary(self) -> str:
+        '''
+        The summary of the text up to position
+        '''
+        return self._summary
+
+
+    @property
+    def position(self) -> int:
+        '''
+        The offset in the stream where the text that is not yet summarized starts
+        '''
+        return self._position
+
+
+    @property
+    def tail(self) -> str:
+        '''
+        The text that is not yet summarized
+        '''
+        return self._tail
+
+
+    @property
+    def total_cost(self) -> float:
+        return self._total_cost
+
+
+    def append(self, text:str):
+        '''
+        Adds text to the stream. Updates the summary if the tail is long enough.
+        Returns the latest summarization response or None if the summary was not updated.
+        '''
+        with self._lock:
+            self._tail += text
+            response = None
+            while len(self._tail) >= self._min_tail_chars:
+                cut = self._find_cut(self._tail)
+                if cut is None:
+                    break
+                response = self._update(cut)
+            return response
+
+
+    def flush(self):
+        '''
+        Summarizes the whole tail including an unfinished last sentence.
+        Returns the latest summarization response or None if there was nothing to summarize.
+        '''
+        with self._lock:
+            response = None
+            while self._tail.strip():
+                response = self._update(min(len(self._tail), self._max_tail_chars))
+            return response
+
+
+    def rebalance(self):
+        '''
+        Rebuilds the summary from the section summaries and the summarized text not yet in a section
+        '''
+        with self._lock:
+            return self._rebalance()
+
+
+    def _find_cut(self, tail:str):
+        '''
+        Where the part of the tail to be sent ends: after the last complete sentence that fits
+        '''
+        window = tail[:self._max_tail_chars]
+        cut = None
+        for match in _SENTENCE_END.finditer(window):
+            cut = match.end()
+        if cut is None and len(tail) >= self._max_tail_chars:
+            cut = self._max_tail_chars
+        return cut
+
+
+    def _update(self, cut:int):
+        segment = self._tail[:cut]
+        text = segment if self._summary is None else self._summary + "\n\n" + segment
+        response = self._summarize(text)
+        self._summary = response["summary"]
+        self._tail = self._tail[cut:]
+        self._position += cut
+        self._update_count += 1
+        if self._rebalance_every:
+            self._window += segment
+            if len(self._window) >= self._section_chars:
+                self._sections.append(self._summarize(self._window)["summary"])
+                self._window = ""
+                if sum(len(section) for section in self._sections) >= self._section_chars:
+                    self._sections = [self._summarize("\n\n".join(self._sections))["summary"]]
+            if self._update_count % self._rebalance_every == 0:
+                return self._rebalance()
+        return response
+
+
+    def _rebalance(self):
+        if not self._rebalance_every or not (self._sections or self._window):
+            return None
+        response = self._summarize("\n\n".join(self._sections + [self._window]).strip())
+        self._summary = response["summary"]
+        return response
+
+
+    def _summarize(self, text:str) -> dict:
+        response = SummarizationService(**self._service_kwargs)(user=self.user, text=text, sent_length=self.sent_length)
+        if "error" in response:
+            raise ValueError(response)
+        self._add_cost(response)
+        return response
+
+
+    def _add_cost(self, response:dict):
+        self._total_cost += (response.get("cost") or {}).get("total_cost", 0)
@@ -0,0 +1,127 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: Summarize very large texts by summarizing their sections then the summaries
+-----------------------------------------------------
+'''
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from soffosai.common.constants import ServiceString
+from soffosai.core.caching import LRUCache
+from soffosai.core.chunking import ContentDefinedChunker
+from soffosai.core.services import SoffosAIService, SummarizationService, inspect_arguments
+
+
+class MapReduceSummarizationService(SoffosAIService):
+    '''
+    Summarizes texts of any length. The text is split into sections that are summarized in
+    parallel, then the joined summaries are summarized the same way until they fit in one
+    section which is summarized into sent_length sentences.
+
+    Section boundaries depend on the content of the text and the summaries are cached, so
+    summarizing an edited text only summarizes again the sections that changed and the summaries
+    that include them.
+
+    ** section_chars: the average length of a section. Sections are at most twice as long.
+    ** section_sent_length: the number of sentences of the summary of each section.
+    ** max_workers: the maximum number of summarization requests running at the same time.
+    ** max_depth: the maximum number of rounds of section summaries. What is left after them is
+    summarized in one request.
+    ** cache: where the summaries are kept. Share it between instances to reuse summaries.
+    The other keyword arguments (timeout, retries, key_pool, scheduler...) configure the
+    summarization requests of the sections, and get_response's keyword arguments (deadline,
+    priority, apikey...) are given to each of them.
+    When the section summaries are not shorter than their text, an error response is returned
+    with the cost of the requests already sent.
+    '''
+    def __init__(self, section_chars:int=10000, section_sent_length:int=5, max_workers:int=4,
+        max_depth:int=5, cache:LRUCache=None, **kwargs) -> None:
+        service = ServiceString.SUMMARIZATION
+        super().__init__(service, **kwargs)
+        if max_workers <= 0:
+            raise ValueError("max_workers should be a positive integer.")
+        self._chunker = ContentDefinedChunker(
+            average_chars = section_chars,
+            min_chars = section_chars // 4,
+            max_chars = section_chars * 2
+        )
+        self._section_sent_length = section_sent_length
+        self._max_workers = max_workers
+        self._max_depth = max_depth
+        self._cache = cache if cache is not None else LRUCache(max_entries=4096)
+        self._service_kwargs = kwargs
+
+
+    def __call__(self, user:str, text:str, sent_length:int):
+        self._args_dict = inspect_arguments(self.__call__, user, text, sent_length)
+        return super().__call__()
+
+
+    def get_response(self, payload={}, **kwargs) -> dict:
+        self._payload = payload
+        allow_input, message = self.validate_payload()
+        if not allow_input:
+            raise ValueError(message)
+
+        fresh_responses = [] # the responses that were not taken from the cache
+        text = payload["text"]
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            for _ in range(self._max_depth):
+                sections = self._chunker.split(text)
+                if len(sections) <= 1:
+                    break
+
+                results = list(executor.map(
+                    lambda section: self._summarize(payload["user"], section.text, self._section_sent_length, **kwargs),
+                    sections
+                ))
+                for response, fresh in results:
+                    if "error" in response:
+                        return response
+                    if fresh:
+                        fresh_responses.append(response)
+
+                summarized = "\n\n".join(response["summary"] for response, _ in results)
+                if len(summarized) >= len(text):
+                    return {
+                        "status": "Error",
+                        "error": f"{self._service}: the section summaries are not shorter than the text. Lower section_sent_length.",
+                        "cost": {"total_cost": self._get_cost(fresh_responses)},
+                        "request_count": len(fresh_responses)
+                    }
+                text = summarized
+
+        response, fresh = self._summarize(payload["user"], text, payload["sent_length"], **kwargs)
+        if "error" in response:
+            return response
+        if fresh:
+            fresh_responses.append(response)
+
+        # the cost covers all the summarization requests that were sent for this text
+        response = dict(response)
+        response["cost"] = dict(response.get("cost") or {})
+        response["cost"]["total_cost"] = self._get_cost(fresh_responses)
+        response["request_count"] = len(fresh_responses)
+        return response
+
+
+    def _get_cost(self, responses:list) -> float:
+        return sum((response.get("cost") or {}).get("total_cost", 0) for response in responses)
+
+
+    def _summarize(self, user:str, text:str, sent_length:int, **kwargs):
+        '''
+        Returns the summarization response and whether it was requested from Soffos
+        (False when it was found in the cache)
+        '''
+        key = (hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest(), sent_length)
+        response = self._cache.get(key)
+        if response is not None:
+            return response, False
+
+        # services keep the state of their last call so each request gets its own instance
+        section_payload = {"user": user, "text": text, "sent_length": sent_length}
+        response = SummarizationService(**self._service_kwargs).get_response(section_payload, **kwargs)
+        if "error" not in response:
+            self._cache.set(key, response)
+        return response, True
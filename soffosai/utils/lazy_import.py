@@ -0,0 +1,33 @@
+'''
+Copyright (c)2022 - Soffos.ai - All rights reserved
+Created at: 2026-10-19
+Purpose: PEP 562 lazy attribute loading for the soffosai packages
+-----------------------------------------------------
+'''
+import importlib
+import importlib.util
+
+
+def lazy_attributes(package:str, namespace:dict, attributes:dict):
+    '''
+    Creates the module level __getattr__ and __dir__ of a package so that its public names
+    are only imported on first access.
+    attributes maps the public name to the (relative) module that defines it, or to the module
+    itself for a subpackage (".core" for "core"). The other submodules of the package are
+    imported on first access too, as they were when the package imported them eagerly.
+    '''
+    def __getattr__(name):
+        module_name = attributes.get(name)
+        if module_name is None:
+            if name.startswith("__") or importlib.util.find_spec(f"{package}.{name}") is None:
+                raise AttributeError(f"module {package!r} has no attribute {name!r}")
+            module_name = f".{name}"
+        module = importlib.import_module(module_name, package)
+        value = module if module.__name__ == f"{package}.{name}" else getattr(module, name)
+        namespace[name] = value # cache it so __getattr__ is not called again
+        return value
+
+    def __dir__():
+        return sorted(set(namespace.keys()) | set(attributes.keys()))
+
+    return __getattr__, __dir__
@@ -0,0 +1,108 @@
+'''
+Compares a Pipeline of independent analysis stages with and without batch_stages.
+The Soffos API is replaced by a local stand-in server that adds a fixed network round trip to
+every request and a small amount of work per service, like cheap analysis services.
+
+usage: python tests/benchmarks/batch_stages.py [runs] [round_trip_ms]
+'''
+import io
+import sys
+import json
+import time
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import soffosai
+import soffosai.core.services.service as service_module
+from soffosai import ServiceString
+from soffosai.core import Node
+from soffosai.core.pipelines import Pipeline
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+ROUND_TRIP = (float(sys.argv[2]) if len(sys.argv) > 2 else 80) / 1000
+SECONDS_PER_SERVICE = 0.005
+TEXT = "The support team answered quickly and the replacement arrived the next day. " * 10
+REQUESTS = []
+
+RESPONSES = {
+    ServiceString.SENTIMENT_ANALYSIS: {"sentiment_breakdown": [], "sentiment_overall": {"negative": 0.1, "neutral": 0.2, "positive": 0.7}},
+    ServiceString.EMOTION_DETECTION: {"spans": []},
+    ServiceString.LANGUAGE_DETECTION: {"language": "en"},
+    ServiceString.TAG_GENERATION: {"tags": [{"tag": "support", "score": 0.9}]},
+}
+
+
+def answer(service:str, payload:dict) -> dict:
+    time.sleep(SECONDS_PER_SERVICE)
+    response = dict(RESPONSES[service])
+    response["cost"] = {"total_cost": len(payload["text"]) * 0.000001}
+    return response
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        service = self.path.split("/service/", 1)[1].strip("/")
+        REQUESTS.append(service)
+        time.sleep(ROUND_TRIP)
+        if service == ServiceString.BATCH_SERVICE:
+            responses = [answer(request["service"], request["payload"]) for request in payload["requests"]]
+            response = {
+                "responses": responses,
+                "cost": {"total_cost": sum(response["cost"]["total_cost"] for response in responses)}
+            }
+        else:
+            response = answer(service, payload)
+        body = json.dumps(response).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_pipeline(batch_stages:bool) -> Pipeline:
+    text = {"source": "user_input", "field": "text"}
+    nodes = [
+        Node("sentiment", ServiceString.SENTIMENT_ANALYSIS, {"text": text}),
+        Node("emotion", ServiceString.EMOTION_DETECTION, {"text": text}),
+        Node("language", ServiceString.LANGUAGE_DETECTION, {"text": text}),
+        Node("tags", ServiceString.TAG_GENERATION, {"text": text}),
+    ]
+    return Pipeline(nodes, batch_stages=batch_stages)
+
+
+def run(batch_stages:bool) -> tuple:
+    pipeline = make_pipeline(batch_stages)
+    REQUESTS.clear()
+    latencies = []
+    cost = 0.0
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()): # the pipeline prints its progress
+            result = pipeline.run({"user": "benchmark", "text": TEXT})
+        latencies.append(time.perf_counter() - start)
+        cost += result["total_cost"]
+    return sum(latencies) / len(latencies), len(REQUESTS) / RUNS, cost
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    service_module.SOFFOS_SERVICE_URL = f"http://127.0.0.1:{server.server_address[1]}/service/"
+    soffosai.api_key = "benchmark"
+
+    separate_latency, separate_requests, separate_cost = run(False)
+    batched_latency, batched_requests, batched_cost = run(True)
+    server.shutdown()
+
+    print(f"4 analysis stages, {ROUND_TRIP * 1000:.0f} ms round trip, {RUNS} runs")
+    print(f"separate requests: {separate_latency * 1000:8.1f} ms per run, {separate_requests:.0f} round trips, cost {separate_cost:.6f}")
+    print(f"batch_stages:      {batched_latency * 1000:8.1f} ms per run, {batched_requests:.0f} round trips, cost {batched_cost:.6f}")
+
+
+if __name__ == "__main__":
+    main()
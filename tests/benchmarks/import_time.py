@@ -0,0 +1,56 @@
+'''
+Guards the cold start cost of `import soffosai`.
+Each measurement runs in a fresh interpreter. Exits with a non-zero status when the import
+is slower than the budget or when it pulls in modules that should only load on first use.
+
+usage: python tests/benchmarks/import_time.py [budget_in_ms] [runs]
+'''
+import json
+import subprocess
+import sys
+
+BUDGET_MS = float(sys.argv[1]) if len(sys.argv) > 1 else 50.0
+RUNS = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+# modules that must not be imported by a bare `import soffosai`
+DEFERRED_MODULES = [
+    "requests",
+    "soffosai.core.services.service",
+    "soffosai.core.nodes.node",
+    "soffosai.core.pipelines.pipeline",
+    "soffosai.common.serviceio_fields.service_io",
+]
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import soffosai
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({"elapsed_ms": elapsed, "modules": list(sys.modules)}))
+'''
+
+
+def measure():
+    output = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout)
+
+
+def main():
+    results = [measure() for _ in range(RUNS)]
+    best = min(result["elapsed_ms"] for result in results)
+    loaded = [name for name in DEFERRED_MODULES if name in results[0]["modules"]]
+
+    print(f"import soffosai: best of {RUNS} runs = {best:.2f} ms (budget {BUDGET_MS:.2f} ms)")
+    errors = []
+    if best > BUDGET_MS:
+        errors.append(f"import took {best:.2f} ms which is over the {BUDGET_MS:.2f} ms budget")
+    if loaded:
+        errors.append(f"these modules should be imported lazily: {loaded}")
+
+    if errors:
+        print("\n".join(errors))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+'''
+Compares Question Answering with and without the local QuestionAnsweringPrefilter.
+The Soffos API is replaced by a local stand-in server whose latency and charged characters
+grow with the amount of context it has to read, like the real service.
+
+usage: python tests/benchmarks/qa_prefilter.py [documents] [questions]
+'''
+import sys
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import soffosai
+import soffosai.core.services.service as service_module
+from soffosai import QuestionAnsweringService
+from soffosai.core.retrieval import QuestionAnsweringPrefilter
+
+DOCUMENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+QUESTIONS = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+SECONDS_PER_MILLION_CHARS = 2.0
+
+random.seed(7)
+VOCABULARY = ["word%d" % index for index in range(5000)]
+CORPUS = {}
+
+
+def make_document(index:int) -> str:
+    paragraphs = []
+    for _ in range(20):
+        sentences = [
+            " ".join(random.choice(VOCABULARY) for _ in range(12)).capitalize() + "."
+            for _ in range(4)
+        ]
+        paragraphs.append(" ".join(sentences))
+    paragraphs[random.randrange(20)] += f" The code name of project {index} is topic{index}."
+    return "\n\n".join(paragraphs)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if payload.get("document_text") is not None:
+            context = len(payload["document_text"])
+        else:
+            context = sum(len(CORPUS[document_id]) for document_id in payload["document_ids"])
+        time.sleep(context / 1000000 * SECONDS_PER_MILLION_CHARS)
+        charged = context + len(payload["message"])
+        body = json.dumps({
+            "answer": "",
+            "charged_character_count": charged,
+            "cost": {"total_cost": charged * 0.000001}
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run(questions:list, service_kwargs:dict) -> tuple:
+    latencies = []
+    charged = 0
+    for question, document_ids in questions:
+        start = time.perf_counter()
+        response = QuestionAnsweringService(**service_kwargs)(user="benchmark", question=question, document_ids=document_ids)
+        latencies.append(time.perf_counter() - start)
+        charged += response["charged_character_count"]
+    return sum(latencies) / len(latencies), charged
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    service_module.SOFFOS_SERVICE_URL = f"http://127.0.0.1:{server.server_address[1]}/service/"
+    soffosai.api_key = "benchmark"
+
+    for index in range(DOCUMENTS):
+        CORPUS["%032x" % index] = make_document(index)
+    document_ids = list(CORPUS)
+    questions = []
+    for _ in range(QUESTIONS):
+        index = random.randrange(DOCUMENTS)
+        questions.append((f"What is the code name of project {index}? topic{index}", document_ids))
+
+    start = time.perf_counter()
+    prefilter = QuestionAnsweringPrefilter(max_chars=4000)
+    for document_id, text in CORPUS.items():
+        prefilter.add_document(document_id, text)
+    index_seconds = time.perf_counter() - start
+
+    baseline_latency, baseline_charged = run(questions, {})
+    prefilter_latency, prefilter_charged = run(questions, {"prefilter": prefilter})
+    server.shutdown()
+
+    print(f"corpus: {DOCUMENTS} documents, {sum(map(len, CORPUS.values()))} characters, indexed in {index_seconds:.2f}s")
+    print(f"without prefilter: {baseline_latency * 1000:8.1f} ms per question, {baseline_charged:10d} charged characters")
+    print(f"with prefilter:    {prefilter_latency * 1000:8.1f} ms per question, {prefilter_charged:10d} charged characters")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+'''
+A pipeline that summarizes the text of a Documents Search. The search response builds its "text"
+lazily, and the summary stage must still read it when the pipeline drops or spills its outputs.
+'''
+import json
+from soffosai.core.nodes import Node, SummarizationNode
+from soffosai.core.services import DocumentsSearchService
+from soffosai.core.pipelines import Pipeline
+
+
+def get_nodes():
+    return [
+        Node("search", DocumentsSearchService, {"query": {"source": "user_input", "field": "query"}, "top_n_natural_language": 5}),
+        SummarizationNode(name="summ", text={"source": "search", "field": "text"}, sent_length={"source": "user_input", "field": "sent_length"})
+    ]
+
+
+src = {
+    "user": "client_id",
+    "query": "Who is Neo?",
+    "sent_length": 2
+}
+
+for options in ({}, {"keep_outputs": ["summ"]}, {"spill_threshold": 5}):
+    output = Pipeline(nodes=get_nodes(), **options).run(user_input=src)
+    assert "summ" in output, options
+    print(json.dumps(output["summ"], indent=4))